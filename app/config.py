@@ -53,6 +53,70 @@ class Settings:
     STORAGE_AVATAR_BUCKET = os.getenv("AVATAR_BUCKET", "avatars")
     STORAGE_OPPORTUNITY_BUCKET = os.getenv("OPPORTUNITY_BUCKET", "opportunity-images")
     STORAGE_CV_BUCKET = os.getenv("CV_BUCKET", "cvs")
+    STORAGE_CARD_BUCKET = os.getenv("CARD_BUCKET", "organization-cards")
+    MAX_CV_SIZE = 10 * 1024 * 1024  # 10MB
+    # Signed direct-upload URLs must be finalized within this many seconds
+    SIGNED_UPLOAD_TTL = int(os.getenv("SIGNED_UPLOAD_TTL", "900"))
+    # Finalized image uploads are processed in the background; unfinished ones are retried this often
+    UPLOAD_RENDITION_SWEEP_INTERVAL = float(os.getenv("UPLOAD_RENDITION_SWEEP_INTERVAL", "60"))  # seconds
+    # Max parallel storage uploads per request (multi-image opportunity uploads)
+    MAX_CONCURRENT_UPLOADS = int(os.getenv("MAX_CONCURRENT_UPLOADS", "3"))
+    # Image renditions (thumb/card/full) are built in a process pool at upload time
+    IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+    IMAGE_PROCESS_TIMEOUT = int(os.getenv("IMAGE_PROCESS_TIMEOUT", "30"))  # seconds
+    IMAGE_AVIF_ENABLED = os.getenv("IMAGE_AVIF_ENABLED", "True").lower() == "true"
+    # Storage deletes are queued and flushed in batches by a background thread
+    STORAGE_DELETE_FLUSH_INTERVAL = float(os.getenv("STORAGE_DELETE_FLUSH_INTERVAL", "5"))  # seconds
+    STORAGE_DELETE_BATCH_SIZE = int(os.getenv("STORAGE_DELETE_BATCH_SIZE", "100"))
+    # Orphan reconciler (0 disables the periodic run)
+    STORAGE_GC_INTERVAL = int(os.getenv("STORAGE_GC_INTERVAL", str(6 * 60 * 60)))  # seconds
+    STORAGE_GC_GRACE_SECONDS = int(os.getenv("STORAGE_GC_GRACE_SECONDS", str(24 * 60 * 60)))
+    STORAGE_GC_MAX_DELETIONS = int(os.getenv("STORAGE_GC_MAX_DELETIONS", "1000"))  # per bucket per run
+    STORAGE_GC_RATE_PER_SECOND = int(os.getenv("STORAGE_GC_RATE_PER_SECOND", "50"))
+    # Write-behind counters (post likes) are flushed to the database this often
+    COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "5"))  # seconds
+    # Realtime push (SSE/WebSocket). Use "redis" (pip install redis) when running several workers
+    REALTIME_BACKEND = os.getenv("REALTIME_BACKEND", "local").lower()
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REALTIME_HEARTBEAT_SECONDS = float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "15"))
+    REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))  # per connection
+    REALTIME_MAX_CONNECTIONS = int(os.getenv("REALTIME_MAX_CONNECTIONS", "10000"))  # per worker
+    # Automatic screening of comments/community posts against moderation_terms
+    MODERATION_ENABLED = os.getenv("MODERATION_ENABLED", "True").lower() == "true"
+    MODERATION_REFRESH_INTERVAL = float(os.getenv("MODERATION_REFRESH_INTERVAL", "60"))  # seconds
+    # Near-duplicate (SimHash) spam detection per user/IP
+    SPAM_DETECTION_ENABLED = os.getenv("SPAM_DETECTION_ENABLED", "True").lower() == "true"
+    # Reverse proxies (IPs or CIDRs, comma-separated) whose X-Forwarded-For is believed
+    TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+    SPAM_WINDOW_SECONDS = int(os.getenv("SPAM_WINDOW_SECONDS", "3600"))
+    SPAM_MAX_DISTANCE = int(os.getenv("SPAM_MAX_DISTANCE", "10"))  # bits of 64
+    SPAM_REJECT_AFTER = int(os.getenv("SPAM_REJECT_AFTER", "3"))  # near-duplicates before rejecting
+    SPAM_MIN_WORDS = int(os.getenv("SPAM_MIN_WORDS", "5"))
+    SPAM_INDEX_MAX_ENTRIES = int(os.getenv("SPAM_INDEX_MAX_ENTRIES", "100000"))
+    SPAM_MAX_PER_SENDER = int(os.getenv("SPAM_MAX_PER_SENDER", "200"))  # recent fingerprints kept per user/IP
+    # Public community feed cache: newest N approved posts per category, reloaded after TTL
+    COMMUNITY_FEED_WINDOW = int(os.getenv("COMMUNITY_FEED_WINDOW", "200"))
+    COMMUNITY_FEED_TTL = float(os.getenv("COMMUNITY_FEED_TTL", "60"))  # seconds
+    # GET /api/user/home payload is cached per user for this long
+    HOME_CACHE_TTL = float(os.getenv("HOME_CACHE_TTL", "5"))  # seconds
+    # GET /api/organizer/dashboard payload is cached per organizer for this long
+    ORGANIZER_DASHBOARD_CACHE_TTL = float(os.getenv("ORGANIZER_DASHBOARD_CACHE_TTL", "10"))  # seconds
+    # Concurrent fan-out of independent queries inside a handler
+    FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "32"))  # shared by all requests in a worker
+    FANOUT_MAX_CONCURRENCY = int(os.getenv("FANOUT_MAX_CONCURRENCY", "6"))  # per request
+    FANOUT_TIMEOUT = float(os.getenv("FANOUT_TIMEOUT", "10"))  # seconds
+    # Admin dashboard metrics are recomputed in the background this often
+    ADMIN_METRICS_REFRESH_INTERVAL = float(os.getenv("ADMIN_METRICS_REFRESH_INTERVAL", "30"))  # seconds
+    # Admin audit entries are queued and written to admin_activity_log in batches
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2"))  # seconds
+    AUDIT_MAX_QUEUE = int(os.getenv("AUDIT_MAX_QUEUE", "10000"))  # oldest entries dropped beyond this
+    AUDIT_MAX_RETRY_DELAY = float(os.getenv("AUDIT_MAX_RETRY_DELAY", "60"))  # seconds
+    # Monthly admin_activity_log partitions older than this are moved to audit_archive (0 = keep all)
+    AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+    AUDIT_MAINTENANCE_INTERVAL = float(os.getenv("AUDIT_MAINTENANCE_INTERVAL", "21600"))  # seconds
+    # Admin exports read this many rows per query
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
     
     # Validation
     def validate(self):
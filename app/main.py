@@ -6,9 +6,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
+from app.utils.image_processing import shutdown_image_pool
+from app.utils.storage_gc import start_storage_workers, stop_storage_workers
+from app.utils.counters import start_counters, stop_counters
+from app.utils.realtime import start_realtime, stop_realtime
+from app.utils.moderation import start_moderation, stop_moderation
+from app.utils.concurrency import shutdown_fanout
+from app.utils.dashboard_metrics import start_dashboard_metrics, stop_dashboard_metrics
+from app.utils.audit import start_audit_log, stop_audit_log
+from app.utils.upload_renditions import start_upload_renditions, stop_upload_renditions
 from app.routers import auth, users
 from app.routers import organizer, admin_comprehensive, opportunity_with_images
-from app.routers import categories, blogs, community, comments, donations, contact, applications
+from app.routers import categories, blogs, community, comments, donations, contact, applications, uploads, realtime
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -48,6 +57,8 @@ app.include_router(comments.router)
 app.include_router(donations.router)
 app.include_router(contact.router)
 app.include_router(applications.router)
+app.include_router(uploads.router)
+app.include_router(realtime.router)
 
 # Root endpoint
 @app.get("/")
@@ -80,6 +91,13 @@ async def startup_event():
         settings.validate()
         print(f"✓ {settings.APP_NAME} v{settings.VERSION} started successfully")
         print(f"✓ Supabase configured: {settings.SUPABASE_URL[:30]}...")
+        start_storage_workers()
+        start_counters()
+        start_realtime()
+        start_moderation()
+        start_dashboard_metrics()
+        start_audit_log()
+        start_upload_renditions()
     except ValueError as e:
         print(f"✗ Configuration error: {e}")
         raise
@@ -89,5 +107,14 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
+    stop_realtime()
+    stop_upload_renditions()
+    shutdown_image_pool()
+    stop_storage_workers()
+    stop_counters()
+    stop_moderation()
+    stop_dashboard_metrics()
+    stop_audit_log()
+    shutdown_fanout()
     print(f"✓ {settings.APP_NAME} shutting down")
 
@@ -39,6 +39,13 @@ class CommentStatusEnum(str, Enum):
     VISIBLE = "visible"
     HIDDEN = "hidden"
     FLAGGED = "flagged"
+    PENDING = "pending"  # Held by automatic screening
+
+
+class ModerationLanguageEnum(str, Enum):
+    """Language of a moderation term"""
+    EN = "en"
+    KM = "km"
 
 
 class UserRoleEnum(str, Enum):
@@ -66,6 +73,8 @@ class DashboardMetrics(BaseModel):
     opportunities_count: dict = Field(default_factory=dict)  # {status: count}
     organizers_count: dict = Field(default_factory=dict)  # {status: count}
     users_count: int = 0
+    generated_at: Optional[datetime] = None  # when the snapshot was computed
+    age_seconds: Optional[float] = None  # how old the snapshot was when served
     
     class Config:
         json_schema_extra = {
@@ -82,7 +91,9 @@ class DashboardMetrics(BaseModel):
                     "rejected": 2,
                     "suspended": 1
                 },
-                "users_count": 1250
+                "users_count": 1250,
+                "generated_at": "2026-10-19T08:30:00Z",
+                "age_seconds": 12.4
             }
         }
 
@@ -244,6 +255,7 @@ class BlogUpdate(BaseModel):
 class BlogResponse(BlogBase):
     """Blog response"""
     id: str
+    comments_count: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -273,6 +285,12 @@ class CommunityPostListItem(BaseModel):
     status: CommunityStatusEnum = CommunityStatusEnum.PENDING
     tags: List[str] = Field(default_factory=list)
     reject_reason: Optional[str] = Field(None, alias="rejection_reason")
+    moderation_reason: Optional[str] = None  # Set when held by automatic screening
+
+    # The stored counter can briefly go negative (see increment_post_likes)
+    @validator("likes", pre=True)
+    def clamp_likes(cls, v):
+        return max(0, v or 0)
     
     class Config:
         populate_by_name = True
@@ -335,6 +353,7 @@ class CommentListItem(BaseModel):
     content: str
     created_at: datetime
     status: CommentStatusEnum = CommentStatusEnum.VISIBLE
+    moderation_reason: Optional[str] = None  # Set when held by automatic screening
     
     class Config:
         from_attributes = True
@@ -350,6 +369,99 @@ class CommentApproveRequest(BaseModel):
     pass
 
 
+# ============================================
+# BULK MODERATION
+# ============================================
+
+BULK_MODERATION_MAX_IDS = 500
+
+
+class CommentBulkActionEnum(str, Enum):
+    """Bulk comment actions"""
+    HIDE = "hide"
+    APPROVE = "approve"
+
+
+class CommunityBulkActionEnum(str, Enum):
+    """Bulk community post actions"""
+    APPROVE = "approve"
+    REJECT = "reject"
+    DELETE = "delete"
+
+
+class CommentBulkRequest(BaseModel):
+    """Apply one action to many comments"""
+    ids: List[str] = Field(..., min_length=1, max_length=BULK_MODERATION_MAX_IDS)
+    action: CommentBulkActionEnum
+
+
+class CommunityBulkRequest(BaseModel):
+    """Apply one action to many community posts"""
+    ids: List[str] = Field(..., min_length=1, max_length=BULK_MODERATION_MAX_IDS)
+    action: CommunityBulkActionEnum
+    reason: Optional[str] = Field(None, min_length=10, max_length=500)  # required for reject
+
+    @validator("reason", always=True)
+    def reason_required_for_reject(cls, v, values):
+        if values.get("action") == CommunityBulkActionEnum.REJECT and not v:
+            raise ValueError("reason is required to reject posts")
+        return v
+
+
+class BulkItemOutcomeEnum(str, Enum):
+    """What happened to one ID of a bulk request"""
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    INVALID_ID = "invalid_id"
+
+
+class BulkItemResult(BaseModel):
+    id: str
+    outcome: BulkItemOutcomeEnum
+
+
+class BulkModerationResponse(BaseModel):
+    """Per-ID outcomes of a bulk moderation request"""
+    action: str
+    requested: int
+    succeeded: int
+    results: List[BulkItemResult]
+
+
+# ============================================
+# MODERATION TERMS
+# ============================================
+
+class ModerationTermsCreate(BaseModel):
+    """Add terms to the screening list (duplicates are skipped)"""
+    terms: List[str] = Field(..., min_length=1, max_length=1000)
+    language: ModerationLanguageEnum = ModerationLanguageEnum.EN
+
+
+class ModerationTermUpdate(BaseModel):
+    """Enable or disable a term"""
+    is_active: bool
+
+
+class ModerationTermResponse(BaseModel):
+    """Screening list entry"""
+    id: int
+    term: str
+    language: ModerationLanguageEnum
+    is_active: bool = True
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ModerationCheckRequest(BaseModel):
+    """Text to run through the screen without saving anything"""
+    text: str = Field(..., min_length=1, max_length=20000)
+
+
 # ============================================
 # DONATIONS
 # ============================================
@@ -366,6 +478,61 @@ class DonationListItem(BaseModel):
         from_attributes = True
 
 
+# ============================================
+# ANALYTICS
+# ============================================
+
+class AnalyticsMetricEnum(str, Enum):
+    """Time series kept in daily_rollups"""
+    SIGNUPS = "signups"
+    DONATIONS = "donations"
+    DONATION_AMOUNT = "donation_amount"
+    APPLICATIONS = "applications"
+    OPPORTUNITIES_BY_STATUS = "opportunities_by_status"
+
+
+class AnalyticsGranularityEnum(str, Enum):
+    """Bucket size"""
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class TimeseriesPoint(BaseModel):
+    """One bucket: value per dimension (role, status, ...) and their total"""
+    bucket: date
+    values: dict = Field(default_factory=dict)  # {dimension: value}
+    total: float = 0.0
+
+
+class TimeseriesResponse(BaseModel):
+    """Time series read from the daily rollups"""
+    metric: AnalyticsMetricEnum
+    granularity: AnalyticsGranularityEnum
+    start: date
+    end: date
+    cumulative: bool  # values are levels at the end of each bucket, not per-bucket totals
+    points: List[TimeseriesPoint]
+
+
+# ============================================
+# EXPORTS
+# ============================================
+
+class ExportResourceEnum(str, Enum):
+    """Tables that can be exported"""
+    USERS = "users"
+    DONATIONS = "donations"
+    ORGANIZERS = "organizers"
+    AUDIT_LOG = "audit_log"
+
+
+class ExportFormatEnum(str, Enum):
+    """Export file formats"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 # ============================================
 # PAGINATION & FILTERING
 # ============================================
@@ -1,5 +1,5 @@
 """Pydantic models for comments system"""
-from typing import Optional, Literal
+from typing import Optional, Literal, Dict, List
 from datetime import datetime
 from pydantic import BaseModel, Field, UUID4
 
@@ -12,13 +12,15 @@ class CommentCreate(BaseModel):
     )
     entity_id: str = Field(..., description="ID of the entity (int for opportunities, UUID for blogs/posts)")
     content: str = Field(..., min_length=1, max_length=2000, description="Comment content")
+    parent_id: Optional[str] = Field(None, description="ID of the comment being replied to (same entity)")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "entity_type": "opportunity",
                 "entity_id": "1",
-                "content": "This looks like an amazing opportunity! I'd love to participate."
+                "content": "This looks like an amazing opportunity! I'd love to participate.",
+                "parent_id": None
             }
         }
 
@@ -48,6 +50,14 @@ class CommentResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
+    # Threading
+    parent_id: Optional[str] = None
+    root_id: Optional[str] = None
+    depth: int = 0
+    reply_count: int = 0  # Visible replies at any depth below this comment
+    replies: List["CommentResponse"] = []  # First replies of a top-level comment (thread listing only)
+    replies_cursor: Optional[str] = None  # Cursor for GET /comments/{id}/replies when more replies exist
+    
     # User can edit/delete only their own comments
     can_edit: bool = False
     can_delete: bool = False
@@ -59,7 +69,35 @@ class CommentResponse(BaseModel):
 class CommentsListResponse(BaseModel):
     """Paginated list of comments"""
     comments: list[CommentResponse]
-    total: int
+    total: Optional[int] = None  # Items that can be paged through (top-level comments on entity lists; first page only)
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+    total_with_replies: Optional[int] = None  # Entity lists: visible comments including replies
+
+
+class CommentCountKey(BaseModel):
+    """One entity to count comments for"""
+    entity_type: Literal['opportunity', 'community_post', 'blog']
+    entity_id: str
+
+
+class CommentCountsRequest(BaseModel):
+    """Batch comment count lookup"""
+    items: List[CommentCountKey] = Field(..., min_length=1, max_length=200)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"entity_type": "opportunity", "entity_id": "1"},
+                    {"entity_type": "blog", "entity_id": "3f1c2a9e-5b7d-4e8f-9a0b-1c2d3e4f5a6b"}
+                ]
+            }
+        }
+
+
+class CommentCountsResponse(BaseModel):
+    """Visible comment counts keyed by entity_type, then entity_id"""
+    counts: Dict[str, Dict[str, int]]
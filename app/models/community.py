@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -61,13 +61,31 @@ class CommunityPostResponse(CommunityPostBase):
     """Community post response (Public/Organizer view)"""
     id: str
     organizer_id: str
-    organizer_name: Optional[str] = None  # Fetched via join
+    organizer_name: Optional[str] = None  # Denormalized onto the post
+    organizer_avatar: Optional[str] = None
     likes: int = 0
     comments: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
     status: CommunityStatusEnum
+
+    # The stored counter can briefly go negative (see increment_post_likes)
+    @validator("likes", pre=True)
+    def clamp_likes(cls, v):
+        return max(0, v or 0)
     
     class Config:
         from_attributes = True
         populate_by_name = True
+
+
+class PostLikeResponse(BaseModel):
+    """Result of liking / unliking a post"""
+    post_id: str
+    liked: bool  # Whether the current user likes the post after this call
+    likes: int  # Like count including increments not yet flushed to the database
+
+
+class LikedByMeRequest(BaseModel):
+    """Batch lookup of the current user's likes"""
+    post_ids: List[str] = Field(..., min_length=1, max_length=100)
@@ -77,15 +77,19 @@ class OpportunityResponse(BaseModel):
     title: str
     category_label: str
     location_label: str
-    images: Optional[str] = None
+    images: Optional[str] = None  # Legacy comma-separated full-size URLs
+    image_assets: Optional[list[dict]] = None  # Renditions, dimensions and placeholder per image
     description: Optional[str] = None
     organization: Optional[str] = None
     date_range: Optional[date] = None
     time_range: Optional[str] = None
     capacity: Optional[int] = None
+    approved_count: int = 0  # Maintained by trg_applications_approved_count
+    spots_left: Optional[int] = None  # None when capacity is not set
     transport: Optional[str] = None
     housing: Optional[str] = None
     meals: Optional[str] = None
+    comments_count: int = 0
     created_at: str  # Supabase timestamp
 
     class Config:
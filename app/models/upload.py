@@ -0,0 +1,47 @@
+"""Pydantic models for direct-to-storage (signed URL) uploads"""
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class UploadPurpose(str, Enum):
+    """What the uploaded file will be attached to"""
+    OPPORTUNITY_IMAGE = "opportunity_image"
+    AVATAR = "avatar"
+    CV = "cv"
+
+
+class SignedUploadRequest(BaseModel):
+    """Ask for a signed URL to upload one file directly to storage"""
+    purpose: UploadPurpose
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name (used for the extension)")
+    content_type: str = Field(..., description="MIME type the client will upload with")
+    size: int = Field(..., gt=0, description="File size in bytes")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "purpose": "opportunity_image",
+                "filename": "beach-cleanup.jpg",
+                "content_type": "image/jpeg",
+                "size": 2345678
+            }
+        }
+
+
+class SignedUploadResponse(BaseModel):
+    """Signed URL the client PUTs the file to, then finalizes with upload_id"""
+    upload_id: str
+    bucket: str
+    path: str
+    signed_url: str
+    token: str
+    expires_at: datetime
+    max_size: int
+
+
+class FinalizeUploadRequest(BaseModel):
+    """Attach a finished upload"""
+    opportunity_id: Optional[int] = Field(None, description="Required for opportunity_image uploads")
+    application_id: Optional[int] = Field(None, description="Optional for cv uploads; without it only the URL is returned")
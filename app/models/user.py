@@ -2,7 +2,7 @@
 User Pydantic models for request/response validation
 """
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import date, datetime
 from enum import Enum
 
@@ -93,4 +93,14 @@ class ProfileCompleteness(BaseModel):
     filled_fields: int
     total_fields: int
     missing_fields: list[str]
-    is_complete: bool
\ No newline at end of file
+    is_complete: bool
+
+
+class UserHome(BaseModel):
+    """Everything the volunteer home page needs; a section that failed is null and named in errors"""
+    profile: Optional[dict] = None
+    stats: Optional[UserStats] = None
+    profile_completeness: Optional[ProfileCompleteness] = None
+    recommendations: Optional[list] = None
+    applications: Optional[dict] = None  # Same shape as GET /api/applications/my
+    errors: Dict[str, str] = Field(default_factory=dict)
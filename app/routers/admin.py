@@ -8,6 +8,9 @@ from datetime import datetime
 from app.models.organizer import ApplicationAction
 from app.utils.security import get_current_user, extract_user_id
 from app.database import get_supabase
+from app.utils.concurrency import run_concurrently
+from app.utils.audit import audit_log
+from app.utils import organizer_review
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -43,18 +46,8 @@ async def require_admin(current_user = Depends(get_current_user)):
 
 
 def log_admin_action(admin_id: str, action: str, target_id: int, details: str = None):
-    """Log admin actions"""
-    supabase = get_supabase()
-    try:
-        log_data = {
-            "admin_id": admin_id,
-            "action": action,
-            "target_id": target_id,
-            "details": details
-        }
-        supabase.table("admin_activity_log").insert(log_data).execute()
-    except Exception as e:
-        print(f"Failed to log: {e}")
+    """Log admin actions (queued; written to admin_activity_log in batches)"""
+    audit_log.log(admin_id, action, "organizer_application", target_id, details)
 
 
 @router.get("/applications")
@@ -139,7 +132,7 @@ async def get_application_detail(
 
 
 @router.post("/applications/{application_id}/approve")
-async def approve_application(
+def approve_application(
     application_id: int,
     current_user = Depends(require_admin)
 ):
@@ -147,134 +140,45 @@ async def approve_application(
     Approve organizer application
     UPDATED: Now properly changes status from 'pending' to 'active'
     """
-    supabase = get_supabase()
     admin_id = extract_user_id(current_user)
     
     try:
-        # Get application
-        app_response = supabase.table("organizer_applications")\
-            .select("*")\
-            .match({"id": application_id})\
-            .single()\
-            .execute()
-        
-        if not app_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Application not found"
-            )
-        
-        application = app_response.data
-        
         # Make approve idempotent:
         # - pending   -> approve and promote to organizer
         # - approved  -> return OK (already approved)
         # - rejected  -> block (needs a new application)
-        if application['status'] == 'approved':
+        # The application, user profile and organizer profile change in one transaction
+        result = organizer_review.approve_organizer_application(application_id, admin_id, "approved")
+        application = result.get("application") or {}
+        
+        if not result.get("changed"):
             return {
-                "message": f"ℹ️  {application['organization_name']} is already approved.",
+                "message": f"ℹ️  {application.get('organization_name')} is already approved.",
                 "application_id": application_id,
-                "organization_name": application['organization_name'],
+                "organization_name": application.get('organization_name'),
                 "status": "approved"
             }
-        if application['status'] != 'pending':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot approve {application['status']} application"
-            )
-        
-        # Update application status to 'approved'
-        supabase.table("organizer_applications")\
-            .update({
-                "status": "approved",
-                "reviewed_at": datetime.utcnow().isoformat(),
-                "reviewed_by": admin_id
-            })\
-            .match({"id": application_id})\
-            .execute()
-        
-        # Update user profile: role stays 'organizer', but status changes to 'active'
-        supabase.table("user_profiles")\
-            .update({
-                "role": "organizer",
-                "status": "active"  # IMPORTANT: Change from 'pending' to 'active'
-            })\
-            .match({"user_id": application['user_id']})\
-            .execute()
-        
-        # Create or update organizer profile
-        organizer_profile_data = {
-            "user_id": application['user_id'],
-            "organization_name": application['organization_name'],
-            "organizer_type": application['organizer_type'],
-            "phone": application['phone'],
-            "card_image_url": application.get('card_image_url'),
-            "verified_at": datetime.utcnow().isoformat()
-        }
-
-        # NOTE: Supabase python client will silently return an empty .data list if RLS blocks the insert
-        # or if the table structure/constraints reject it. So we explicitly validate the response.
-        organizer_profile_result = None
-        try:
-            existing_profile = (
-                supabase.table("organizer_profiles")
-                .select("id")
-                .eq("user_id", application['user_id'])
-                .execute()
-            )
-
-            if existing_profile.data:
-                organizer_profile_result = (
-                    supabase.table("organizer_profiles")
-                    .update(organizer_profile_data)
-                    .eq("user_id", application['user_id'])
-                    .execute()
-                )
-            else:
-                organizer_profile_result = (
-                    supabase.table("organizer_profiles")
-                    .insert(organizer_profile_data)
-                    .execute()
-                )
-
-            if not organizer_profile_result.data:
-                # Provide a clearer explanation for the most common real-world causes.
-                raise Exception(
-                    "organizer_profiles write returned no data. "
-                    "Most likely causes: (1) Row Level Security (RLS) blocked the insert/update, "
-                    "(2) the service key is not being used, (3) table constraints rejected the row, "
-                    "or (4) the table/columns differ from expected schema."
-                )
-        except Exception as profile_error:
-            # At this point the application is approved + role updated, but profile creation failed.
-            # We surface a useful message so you can fix RLS/schema and re-run approve safely.
-            print(f"ERROR creating organizer_profiles row for user_id={application['user_id']}: {profile_error}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Application approved, but failed to create organizer profile: {profile_error}"
-            )
         
         # Log action
         log_admin_action(
             admin_id, 
             "approve_organizer", 
             application_id,
-            f"Approved: {application['organization_name']}"
+            f"Approved: {application.get('organization_name')}"
         )
         
         return {
-            "message": f"✅ {application['organization_name']} approved! Organizer features are now enabled.",
+            "message": f"✅ {application.get('organization_name')} approved! Organizer features are now enabled.",
             "application_id": application_id,
-            "organization_name": application['organization_name'],
-            "status": "approved"
+            "organization_name": application.get('organization_name'),
+            "status": "approved",
+            "organizer_profile": result.get("organizer_profile")
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
         print(f"Approve error: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to approve: {str(e)}"
@@ -282,7 +186,7 @@ async def approve_application(
 
 
 @router.post("/applications/{application_id}/reject")
-async def reject_application(
+def reject_application(
     application_id: int,
     action: ApplicationAction,
     current_user = Depends(require_admin)
@@ -291,58 +195,19 @@ async def reject_application(
     Reject organizer application
     UPDATED: Now properly handles rejection
     """
-    supabase = get_supabase()
     admin_id = extract_user_id(current_user)
     
     try:
-        # Get application
-        app_response = supabase.table("organizer_applications")\
-            .select("*")\
-            .match({"id": application_id})\
-            .single()\
-            .execute()
-        
-        if not app_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Application not found"
-            )
-        
-        application = app_response.data
-        
-        if application['status'] != 'pending':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot reject {application['status']} application"
-            )
-        
-        # Update application status to 'rejected'
-        supabase.table("organizer_applications")\
-            .update({
-                "status": "rejected",
-                "reviewed_at": datetime.utcnow().isoformat(),
-                "reviewed_by": admin_id,
-                "rejection_reason": action.reason
-            })\
-            .match({"id": application_id})\
-            .execute()
-        
-        # Update user profile: status stays 'pending' (they're still blocked)
-        # OR you can change role back to 'user' if you want them to use app as regular user
-        supabase.table("user_profiles")\
-            .update({
-                "status": "rejected"  # Keep them blocked
-                # OR: "role": "user", "status": "active"  # Let them be regular user
-            })\
-            .match({"user_id": application['user_id']})\
-            .execute()
+        # Application and user status change in one transaction; the user stays blocked
+        result = organizer_review.reject_organizer_application(application_id, admin_id, action.reason)
+        application = result.get("application") or {}
         
         # Log action
         log_admin_action(
             admin_id,
             "reject_organizer",
             application_id,
-            f"Rejected: {application['organization_name']} - {action.reason}"
+            f"Rejected: {application.get('organization_name')} - {action.reason}"
         )
         
         return {
@@ -362,50 +227,34 @@ async def reject_application(
 
 
 @router.get("/stats")
-async def get_admin_stats(current_user = Depends(require_admin)):
+def get_admin_stats(current_user = Depends(require_admin)):
     """Get dashboard statistics"""
     supabase = get_supabase()
-    
-    try:
-        # Pending applications
-        pending = supabase.table("organizer_applications")\
-            .select("id", count="exact")\
-            .eq("status", "pending")\
-            .execute()
-        
-        # Total users
-        users = supabase.table("user_profiles")\
-            .select("id", count="exact")\
-            .eq("role", "user")\
-            .execute()
-        
-        # Organizers
-        organizers = supabase.table("user_profiles")\
+
+    def count_profiles(role: str):
+        return supabase.table("user_profiles")\
             .select("id", count="exact")\
-            .eq("role", "organizer")\
+            .eq("role", role)\
             .execute()
-        
-        # Admins
-        admins = supabase.table("user_profiles")\
+
+    # Four independent counts, run concurrently
+    fanout = run_concurrently({
+        "pending_applications": lambda: supabase.table("organizer_applications")\
             .select("id", count="exact")\
-            .eq("role", "admin")\
-            .execute()
-        
-        return {
-            "pending_applications": pending.count or 0,
-            "total_users": users.count or 0,
-            "total_organizers": organizers.count or 0,
-            "total_admins": admins.count or 0
-        }
-        
-    except Exception as e:
-        print(f"Stats error: {e}")
-        return {
-            "pending_applications": 0,
-            "total_users": 0,
-            "total_organizers": 0,
-            "total_admins": 0
-        }
+            .eq("status", "pending")\
+            .execute(),
+        "total_users": lambda: count_profiles("user"),
+        "total_organizers": lambda: count_profiles("organizer"),
+        "total_admins": lambda: count_profiles("admin"),
+    })
+    for error in fanout.errors.values():
+        print(f"Stats error: {error}")
+
+    # A failed count is reported as 0, as before
+    return {
+        name: (fanout.results[name].count or 0) if name in fanout.results else 0
+        for name in ("pending_applications", "total_users", "total_organizers", "total_admins")
+    }
 
 
 @router.get("/logs")
@@ -11,9 +11,11 @@ Implements all admin endpoints per specification:
 - Comments moderation
 - Donations view
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date, timedelta
 
 from app.models.admin import (
     # Dashboard
@@ -57,9 +59,35 @@ from app.models.admin import (
     CommentHideRequest,
     CommentApproveRequest,
     
+    # Moderation terms
+    ModerationTermsCreate,
+    ModerationTermUpdate,
+    ModerationTermResponse,
+    ModerationCheckRequest,
+    ModerationLanguageEnum,
+    
     # Donations
     DonationListItem,
     
+    # Bulk moderation
+    CommentBulkRequest,
+    CommentBulkActionEnum,
+    CommunityBulkRequest,
+    CommunityBulkActionEnum,
+    BulkItemOutcomeEnum,
+    BulkItemResult,
+    BulkModerationResponse,
+    
+    # Exports
+    ExportResourceEnum,
+    ExportFormatEnum,
+    
+    # Analytics
+    AnalyticsMetricEnum,
+    AnalyticsGranularityEnum,
+    TimeseriesPoint,
+    TimeseriesResponse,
+    
     # Common
     PaginatedResponse,
     VisibilityEnum,
@@ -68,6 +96,16 @@ from app.models.admin import (
 )
 from app.utils.security import get_current_user, extract_user_id
 from app.database import get_supabase
+from app.utils.image_upload import delete_image_assets, get_image_assets
+from app.utils.storage_gc import reconcile_job
+from app.utils.moderation import content_screen, normalize_text, screen_content
+from app.utils.community_feed import community_feed
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.cache import invalidate_organizer_dashboard
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+from app.utils.audit import audit_log, audit_retention
+from app.utils import organizer_review
+from app.utils.export import ExportSource, TableExport, EXPORT_FORMATS
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -107,20 +145,73 @@ def require_admin(current_user = Depends(get_current_user)):
 
 
 def log_admin_action(admin_id: str, action: str, target_type: str, target_id: str, details: str = None):
-    """Log admin actions for audit trail"""
-    supabase = get_supabase()
-    try:
-        log_data = {
-            "admin_id": admin_id,
-            "action": action,
-            "target_type": target_type,
-            "target_id": target_id,
-            "details": details,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        supabase.table("admin_activity_log").insert(log_data).execute()
-    except Exception as e:
-        print(f"WARNING: Failed to log admin action: {e}")
+    """Log admin actions for audit trail (queued; written to admin_activity_log in batches)"""
+    audit_log.log(admin_id, action, target_type, target_id, details)
+
+
+def trigram_search(
+    rpc: str,
+    search: str,
+    filters: dict,
+    limit: int,
+    offset: int,
+    cursor: Optional[str]
+):
+    """
+    Run one of the admin_search_* RPCs (trigram index, ranked by similarity).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    after = decode_cursor(cursor, 2)
+    params = {
+        "p_query": search,
+        "p_limit": limit + 1,
+        "p_after_score": after[0] if after else None,
+        "p_after_id": after[1] if after else None,
+        "p_offset": offset,
+        **filters,
+    }
+    matches = get_supabase().rpc(rpc, params).execute().data or []
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    next_cursor = encode_cursor(matches[-1]["score"], matches[-1]["id"]) if has_more else None
+    return [m["row_data"] for m in matches], next_cursor
+
+
+def split_bulk_ids(ids: List[str]):
+    """
+    Deduplicate (keeping order) and separate well-formed UUIDs from the rest.
+    UUIDs are returned in canonical form (lowercase, hyphenated) to match the database.
+    """
+    valid, invalid, seen = [], [], set()
+    for raw in ids:
+        try:
+            key = str(uuid.UUID(raw))
+        except ValueError:
+            key = None
+        if (key or raw) in seen:
+            continue
+        seen.add(key or raw)
+        if key:
+            valid.append(key)
+        else:
+            invalid.append(raw)
+    return valid, invalid
+
+
+def bulk_response(action: str, ids: List[str], done_ids, outcome: BulkItemOutcomeEnum) -> BulkModerationResponse:
+    """Per-ID outcomes: done_ids got outcome, other well-formed IDs were not found"""
+    valid, invalid = split_bulk_ids(ids)
+    done = {str(i).lower() for i in done_ids}
+    results = [
+        BulkItemResult(id=i, outcome=outcome if i in done else BulkItemOutcomeEnum.NOT_FOUND)
+        for i in valid
+    ] + [BulkItemResult(id=i, outcome=BulkItemOutcomeEnum.INVALID_ID) for i in invalid]
+    return BulkModerationResponse(
+        action=action,
+        requested=len(valid) + len(invalid),
+        succeeded=len(done & set(valid)),
+        results=results
+    )
 
 
 # ============================================
@@ -128,54 +219,27 @@ def log_admin_action(admin_id: str, action: str, target_type: str, target_id: st
 # ============================================
 
 @router.get("/metrics", response_model=DashboardMetrics)
-def get_dashboard_metrics(current_user = Depends(require_admin)):
+def get_dashboard_metrics(
+    refresh: bool = Query(False, description="Recompute now instead of serving the snapshot"),
+    current_user = Depends(require_admin)
+):
     """
     GET /admin/metrics
-    Returns dashboard aggregates: donations total, opportunities count, organizers count, users count
+    Returns dashboard aggregates: donations total, opportunities count, organizers count, users count.
+    Served from a snapshot recomputed in the background; age_seconds says how old it is.
     """
-    supabase = get_supabase()
-    
+    if refresh:
+        dashboard_metrics.refresh()
+
+    data, age = dashboard_metrics.get()
+    if data is None:
+        # Return empty metrics if the aggregates could not be computed yet
+        return DashboardMetrics()
+
     try:
-        # Donations total
-        donations_response = supabase.table("donations")\
-            .select("amount")\
-            .execute()
-        donations_total = sum(d.get('amount', 0) for d in (donations_response.data or []))
-        
-        # Opportunities count by status
-        opportunities_response = supabase.table("opportunities")\
-            .select("status")\
-            .execute()
-        opportunities_count = {}
-        for opp in (opportunities_response.data or []):
-            status = opp.get('status', 'unknown')
-            opportunities_count[status] = opportunities_count.get(status, 0) + 1
-        
-        # Organizers count by status
-        organizers_response = supabase.table("organizer_applications")\
-            .select("status")\
-            .execute()
-        organizers_count = {}
-        for org in (organizers_response.data or []):
-            status = org.get('status', 'unknown')
-            organizers_count[status] = organizers_count.get(status, 0) + 1
-        
-        # Users count
-        users_response = supabase.table("user_profiles")\
-            .select("id", count="exact")\
-            .execute()
-        users_count = users_response.count or 0
-        
-        return DashboardMetrics(
-            donations_total=donations_total,
-            opportunities_count=opportunities_count,
-            organizers_count=organizers_count,
-            users_count=users_count
-        )
-        
+        return DashboardMetrics(**data, age_seconds=round(age, 1))
     except Exception as e:
         print(f"ERROR: Metrics error: {e}")
-        # Return empty metrics on error
         return DashboardMetrics()
 
 
@@ -185,19 +249,42 @@ def get_dashboard_metrics(current_user = Depends(require_admin)):
 
 @router.get("/organizers")
 def list_organizers(
+    response: Response,
     status: Optional[OrganizerStatusEnum] = None,
     search: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous search page"),
     current_user = Depends(require_admin)
 ):
     """
     GET /admin/organizers?status=pending|verified|rejected|suspended
-    List all organizer applications with filtering
+    List all organizer applications with filtering.
+    With search, matches organization name, contact person and email, best match
+    first; total is null and the next page's cursor is in the X-Next-Cursor header.
     """
     supabase = get_supabase()
     
     try:
+        # Search by organization name, contact person or email (trigram index)
+        if search and search.strip():
+            data, next_cursor = trigram_search(
+                "admin_search_organizers",
+                search,
+                {"p_status": status.value if status else None},
+                limit,
+                offset,
+                cursor
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return {
+                "data": data,
+                "total": None,
+                "limit": limit,
+                "offset": offset
+            }
+        
         query = supabase.table("organizer_applications")\
             .select("*", count="exact")\
             .order("submitted_at", desc=True)
@@ -206,24 +293,20 @@ def list_organizers(
         if status:
             query = query.eq("status", status.value)
         
-        # Search by organization name or email
-        if search:
-            # Note: Supabase doesn't support OR in Python client easily
-            # So we do two queries and merge (or use RPC function)
-            query = query.ilike("organization_name", f"%{search}%")
-        
         # Pagination
         query = query.range(offset, offset + limit - 1)
         
-        response = query.execute()
+        result = query.execute()
         
         return {
-            "data": response.data or [],
-            "total": response.count or 0,
+            "data": result.data or [],
+            "total": result.count or 0,
             "limit": limit,
             "offset": offset
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: List organizers error: {e}")
         raise HTTPException(
@@ -241,101 +324,33 @@ def approve_organizer(
     POST /admin/organizers/{id}/approve
     Approve organizer application
     """
-    supabase = get_supabase()
     admin_id = extract_user_id(current_user)
     
     try:
-        # Get application
-        app_response = supabase.table("organizer_applications")\
-            .select("*")\
-            .eq("id", organizer_id)\
-            .single()\
-            .execute()
+        # Application, user role and organizer profile change in one transaction
+        result = organizer_review.approve_organizer_application(organizer_id, admin_id, "verified")
+        application = result.get("application") or {}
         
-        if not app_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Organizer application not found"
-            )
-        
-        application = app_response.data
-        
-        # Check status
-        if application['status'] == 'verified':
+        if not result.get("changed"):
             return {
                 "message": "Organizer already verified",
                 "organizer_id": organizer_id
             }
         
-        if application['status'] != 'pending':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot approve {application['status']} application"
-            )
-        
-        # Update application
-        supabase.table("organizer_applications")\
-            .update({
-                "status": "verified",
-                "reviewed_at": datetime.utcnow().isoformat(),
-                "reviewed_by": admin_id
-            })\
-            .eq("id", organizer_id)\
-            .execute()
-        
-        # Update user profile
-        supabase.table("user_profiles")\
-            .update({
-                "role": "organizer",
-                "status": "active"
-            })\
-            .eq("user_id", application['user_id'])\
-            .execute()
-        
-        # Create organizer profile
-        organizer_profile_data = {
-            "user_id": application['user_id'],
-            "organization_name": application['organization_name'],
-            "organizer_type": application['organizer_type'],
-            "phone": application.get('phone'),
-            "website": application.get('website'),
-            "address": application.get('address'),
-            "description": application.get('description'),
-            "contact_person": application.get('contact_person'),
-            "registration_number": application.get('registration_number'),
-            "verified_at": datetime.utcnow().isoformat(),
-            "is_active": True
-        }
-        
-        # Check if profile exists
-        existing_profile = supabase.table("organizer_profiles")\
-            .select("id")\
-            .eq("user_id", application['user_id'])\
-            .execute()
-        
-        if existing_profile.data:
-            supabase.table("organizer_profiles")\
-                .update(organizer_profile_data)\
-                .eq("user_id", application['user_id'])\
-                .execute()
-        else:
-            supabase.table("organizer_profiles")\
-                .insert(organizer_profile_data)\
-                .execute()
-        
         # Log action
         log_admin_action(
             admin_id,
             "approve_organizer",
             "organizer",
             organizer_id,
-            f"Approved: {application['organization_name']}"
+            f"Approved: {application.get('organization_name')}"
         )
         
         return {
             "message": "Organizer approved successfully",
             "organizer_id": organizer_id,
-            "organization_name": application['organization_name']
+            "organization_name": application.get('organization_name'),
+            "organizer_profile": result.get("organizer_profile")
         }
         
     except HTTPException:
@@ -358,49 +373,12 @@ def reject_organizer(
     POST /admin/organizers/{id}/reject
     Reject organizer application with reason
     """
-    supabase = get_supabase()
     admin_id = extract_user_id(current_user)
     
     try:
-        # Get application
-        app_response = supabase.table("organizer_applications")\
-            .select("*")\
-            .eq("id", organizer_id)\
-            .single()\
-            .execute()
-        
-        if not app_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Organizer application not found"
-            )
-        
-        application = app_response.data
-        
-        if application['status'] != 'pending':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot reject {application['status']} application"
-            )
-        
-        # Update application
-        supabase.table("organizer_applications")\
-            .update({
-                "status": "rejected",
-                "reviewed_at": datetime.utcnow().isoformat(),
-                "reviewed_by": admin_id,
-                "rejection_reason": request.reason
-            })\
-            .eq("id", organizer_id)\
-            .execute()
-        
-        # Update user profile
-        supabase.table("user_profiles")\
-            .update({
-                "status": "rejected"
-            })\
-            .eq("user_id", application['user_id'])\
-            .execute()
+        # Application and user status change in one transaction
+        result = organizer_review.reject_organizer_application(organizer_id, admin_id, request.reason)
+        application = result.get("application") or {}
         
         # Log action
         log_admin_action(
@@ -408,7 +386,7 @@ def reject_organizer(
             "reject_organizer",
             "organizer",
             organizer_id,
-            f"Rejected: {application['organization_name']} - {request.reason}"
+            f"Rejected: {application.get('organization_name')} - {request.reason}"
         )
         
         return {
@@ -437,43 +415,12 @@ def suspend_organizer(
     POST /admin/organizers/{id}/suspend
     Suspend organizer account
     """
-    supabase = get_supabase()
     admin_id = extract_user_id(current_user)
     
     try:
-        # Get application
-        app_response = supabase.table("organizer_applications")\
-            .select("*")\
-            .eq("id", organizer_id)\
-            .single()\
-            .execute()
-        
-        if not app_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Organizer not found"
-            )
-        
-        application = app_response.data
-        
-        # Update application
-        supabase.table("organizer_applications")\
-            .update({
-                "status": "suspended",
-                "reviewed_at": datetime.utcnow().isoformat(),
-                "reviewed_by": admin_id,
-                "rejection_reason": request.reason
-            })\
-            .eq("id", organizer_id)\
-            .execute()
-        
-        # Update user profile
-        supabase.table("user_profiles")\
-            .update({
-                "status": "suspended"
-            })\
-            .eq("user_id", application['user_id'])\
-            .execute()
+        # Application and user status change in one transaction
+        result = organizer_review.suspend_organizer(organizer_id, admin_id, request.reason)
+        application = result.get("application") or {}
         
         # Log action
         log_admin_action(
@@ -481,7 +428,7 @@ def suspend_organizer(
             "suspend_organizer",
             "organizer",
             organizer_id,
-            f"Suspended: {application['organization_name']} - {request.reason}"
+            f"Suspended: {application.get('organization_name')} - {request.reason}"
         )
         
         return {
@@ -692,13 +639,16 @@ def list_opportunities(
     category: Optional[str] = None,
     status: Optional[OpportunityStatusEnum] = None,
     visibility: Optional[VisibilityEnum] = None,
+    available: Optional[bool] = None,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     current_user = Depends(require_admin)
 ):
     """
-    GET /admin/opportunities?search=&category=&status=&visibility=
+    GET /admin/opportunities?search=&category=&status=&visibility=&available=
     List all opportunities with filters
+
+    available=true: spots left or no capacity set; available=false: full
     """
     supabase = get_supabase()
     
@@ -716,6 +666,10 @@ def list_opportunities(
             query = query.eq("status", status.value)
         if visibility:
             query = query.eq("visibility", visibility.value)
+        if available is True:
+            query = query.or_("spots_left.is.null,spots_left.gt.0")
+        elif available is False:
+            query = query.eq("spots_left", 0)
         
         # Pagination
         query = query.range(offset, offset + limit - 1)
@@ -846,7 +800,7 @@ def update_opportunity(
     try:
         # Check if exists
         existing = supabase.table("opportunities")\
-            .select("id")\
+            .select("id, organizer_id")\
             .eq("id", opportunity_id)\
             .execute()
         
@@ -890,6 +844,7 @@ def update_opportunity(
             .update(update_data)\
             .eq("id", opportunity_id)\
             .execute()
+        invalidate_organizer_dashboard(existing.data[0].get("organizer_id"))
         
         # Log action
         log_admin_action(
@@ -927,7 +882,7 @@ def delete_opportunity(
     try:
         # Check if exists
         existing = supabase.table("opportunities")\
-            .select("id")\
+            .select("id, organizer_id, images, image_assets")\
             .eq("id", opportunity_id)\
             .execute()
         
@@ -942,6 +897,10 @@ def delete_opportunity(
             .delete()\
             .eq("id", opportunity_id)\
             .execute()
+        invalidate_organizer_dashboard(existing.data[0].get("organizer_id"))
+        
+        # Queue its images for deletion (removed in the background)
+        delete_image_assets(get_image_assets(existing.data[0]))
         
         # Log action
         log_admin_action(
@@ -1219,6 +1178,7 @@ def create_community_post(
         
         if not response.data:
             raise Exception("Failed to create community post")
+        community_feed.upsert(response.data[0])
         
         # Log action
         log_admin_action(
@@ -1267,7 +1227,7 @@ def approve_community_post(
         post = existing.data[0]
         
         # Update status
-        supabase.table("community_posts")\
+        updated = supabase.table("community_posts")\
             .update({
                 "status": "approved",
                 "updated_at": datetime.utcnow().isoformat()
@@ -1275,6 +1235,10 @@ def approve_community_post(
             .eq("id", post_id)\
             .execute()
         
+        # Slot the post into the cached public feed
+        if updated.data:
+            community_feed.upsert(updated.data[0])
+        
         # Log action
         log_admin_action(
             admin_id,
@@ -1336,6 +1300,7 @@ def reject_community_post(
             })\
             .eq("id", post_id)\
             .execute()
+        community_feed.remove(post_id)
         
         # Log action
         log_admin_action(
@@ -1392,6 +1357,7 @@ def delete_community_post(
             .delete()\
             .eq("id", post_id)\
             .execute()
+        community_feed.remove(post_id)
         
         # Log action
         log_admin_action(
@@ -1414,45 +1380,129 @@ def delete_community_post(
         )
 
 
+@router.post("/community/bulk", response_model=BulkModerationResponse)
+def bulk_moderate_community_posts(
+    request: CommunityBulkRequest,
+    current_user = Depends(require_admin)
+):
+    """
+    POST /admin/community/bulk
+    Approve, reject or delete up to 500 community posts in one statement.
+    Returns an outcome per ID; one audit entry is written for the whole batch.
+    """
+    supabase = get_supabase()
+    admin_id = extract_user_id(current_user)
+    valid, _ = split_bulk_ids(request.ids)
+    
+    try:
+        done = []
+        if valid and request.action == CommunityBulkActionEnum.DELETE:
+            deleted = supabase.table("community_posts")\
+                .delete()\
+                .in_("id", valid)\
+                .execute()
+            done = deleted.data or []
+            for post in done:
+                community_feed.remove(post["id"])
+        elif valid:
+            update_data = {"updated_at": datetime.utcnow().isoformat()}
+            if request.action == CommunityBulkActionEnum.APPROVE:
+                update_data["status"] = "approved"
+            else:
+                update_data["status"] = "rejected"
+                update_data["rejection_reason"] = request.reason
+            updated = supabase.table("community_posts")\
+                .update(update_data)\
+                .in_("id", valid)\
+                .execute()
+            done = updated.data or []
+            # Keep the cached public feed in step
+            for post in done:
+                community_feed.upsert(post)
+        
+        result = bulk_response(
+            request.action.value,
+            request.ids,
+            [post["id"] for post in done],
+            BulkItemOutcomeEnum.DELETED if request.action == CommunityBulkActionEnum.DELETE else BulkItemOutcomeEnum.UPDATED
+        )
+        
+        if done:
+            verb = {"approve": "Approved", "reject": "Rejected", "delete": "Deleted"}[request.action.value]
+            details = f"{verb} {len(done)} posts: {', '.join(str(p['id']) for p in done)}"
+            if request.action == CommunityBulkActionEnum.REJECT:
+                details += f" - {request.reason}"
+            log_admin_action(
+                admin_id,
+                f"bulk_{request.action.value}_community_post",
+                "community_post",
+                "bulk",
+                details
+            )
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: Bulk community moderation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to moderate community posts: {str(e)}"
+        )
+
+
 # ============================================
 # USERS MANAGEMENT
 # ============================================
 
 @router.get("/users", response_model=List[UserListItem])
 def list_users(
+    response: Response,
     search: Optional[str] = None,
     role: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous search page"),
     current_user = Depends(require_admin)
 ):
     """
     GET /admin/users?search=&role=
-    List all users
+    List all users. With search, matches name and email, best match first;
+    the next page's cursor is in the X-Next-Cursor header.
     """
     supabase = get_supabase()
     
     try:
-        query = supabase.table("user_profiles")\
-            .select("*", count="exact")\
-            .order("created_at", desc=True)
-        
-        # Filter by role
-        if role:
-            query = query.eq("role", role)
-        
-        # Search by name or email
-        if search:
-            query = query.or_(f"first_name.ilike.%{search}%,last_name.ilike.%{search}%,email.ilike.%{search}%")
-        
-        # Pagination
-        query = query.range(offset, offset + limit - 1)
-        
-        response = query.execute()
+        # Search by name or email (trigram index)
+        if search and search.strip():
+            rows, next_cursor = trigram_search(
+                "admin_search_users",
+                search,
+                {"p_role": role},
+                limit,
+                offset,
+                cursor
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            query = supabase.table("user_profiles")\
+                .select("*")\
+                .order("created_at", desc=True)
+            
+            # Filter by role
+            if role:
+                query = query.eq("role", role)
+            
+            # Pagination
+            query = query.range(offset, offset + limit - 1)
+            
+            rows = query.execute().data or []
         
         # Transform data with safe Unicode handling
         users = []
-        for user in (response.data or []):
+        for user in rows:
             try:
                 # Safely build name, handling potential Unicode issues
                 first_name = user.get('first_name', '') or ''
@@ -1476,6 +1526,8 @@ def list_users(
         
         return users
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Safe error logging - avoid printing user data with Unicode
         import logging
@@ -1605,20 +1657,38 @@ def deactivate_user(
 
 @router.get("/comments", response_model=List[CommentListItem])
 def list_comments(
+    response: Response,
     status: Optional[str] = None,
+    search: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous search page"),
     current_user = Depends(require_admin)
 ):
     """
-    GET /admin/comments?status=
-    List comments for moderation
+    GET /admin/comments?status=&search=
+    List comments for moderation. With search, matches content, best match first;
+    the next page's cursor is in the X-Next-Cursor header.
     """
     supabase = get_supabase()
     
     try:
+        # Search by content (trigram index)
+        if search and search.strip():
+            rows, next_cursor = trigram_search(
+                "admin_search_comments",
+                search,
+                {"p_status": status},
+                limit,
+                offset,
+                cursor
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return rows
+        
         query = supabase.table("comments")\
-            .select("*", count="exact")\
+            .select("*")\
             .order("created_at", desc=True)
         
         # Filter by status
@@ -1628,9 +1698,10 @@ def list_comments(
         # Pagination
         query = query.range(offset, offset + limit - 1)
         
-        response = query.execute()
-        return response.data or []
+        return query.execute().data or []
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR: List comments error: {e}")
         raise HTTPException(
@@ -1749,6 +1820,278 @@ def approve_comment(
         )
 
 
+@router.post("/comments/bulk", response_model=BulkModerationResponse)
+def bulk_moderate_comments(
+    request: CommentBulkRequest,
+    current_user = Depends(require_admin)
+):
+    """
+    POST /admin/comments/bulk
+    Hide or approve up to 500 comments in one statement.
+    Returns an outcome per ID; one audit entry is written for the whole batch.
+    """
+    supabase = get_supabase()
+    admin_id = extract_user_id(current_user)
+    valid, _ = split_bulk_ids(request.ids)
+    new_status = "hidden" if request.action == CommentBulkActionEnum.HIDE else "visible"
+    
+    try:
+        done = []
+        if valid:
+            updated = supabase.table("comments")\
+                .update({"status": new_status})\
+                .in_("id", valid)\
+                .execute()
+            done = [c["id"] for c in (updated.data or [])]
+        
+        result = bulk_response(request.action.value, request.ids, done, BulkItemOutcomeEnum.UPDATED)
+        
+        if done:
+            log_admin_action(
+                admin_id,
+                f"bulk_{request.action.value}_comment",
+                "comment",
+                "bulk",
+                f"{'Hidden' if request.action == CommentBulkActionEnum.HIDE else 'Approved'} {len(done)} comments: {', '.join(str(i) for i in done)}"
+            )
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: Bulk comment moderation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to moderate comments: {str(e)}"
+        )
+
+
+# ============================================
+# MODERATION TERMS
+# ============================================
+
+@router.get("/moderation/terms", response_model=List[ModerationTermResponse])
+def list_moderation_terms(
+    search: Optional[str] = None,
+    language: Optional[ModerationLanguageEnum] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    current_user = Depends(require_admin)
+):
+    """
+    GET /admin/moderation/terms?search=&language=
+    List the screening terms
+    """
+    supabase = get_supabase()
+
+    try:
+        query = supabase.table("moderation_terms")\
+            .select("*")\
+            .order("term")
+
+        if search:
+            query = query.ilike("term", f"%{search}%")
+        if language:
+            query = query.eq("language", language.value)
+
+        response = query.range(offset, offset + limit - 1).execute()
+        return response.data or []
+
+    except Exception as e:
+        print(f"ERROR: List moderation terms error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to list moderation terms: {str(e)}"
+        )
+
+
+@router.post("/moderation/terms", status_code=status.HTTP_201_CREATED)
+def add_moderation_terms(
+    payload: ModerationTermsCreate,
+    current_user = Depends(require_admin)
+):
+    """
+    POST /admin/moderation/terms
+    Add terms (bulk); terms already on the list are skipped.
+    The matcher is rebuilt in the background.
+    """
+    supabase = get_supabase()
+    admin_id = extract_user_id(current_user)
+
+    try:
+        # Stored normalized, so the unique index on lower(term) also catches duplicates here
+        terms = list(dict.fromkeys(
+            t for t in (normalize_text(term).strip() for term in payload.terms) if t
+        ))
+        if not terms:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No terms to add"
+            )
+
+        existing = supabase.table("moderation_terms")\
+            .select("term")\
+            .in_("term", terms)\
+            .execute()
+        known = {row["term"] for row in existing.data or []}
+        new_terms = [t for t in terms if t not in known]
+
+        if new_terms:
+            inserted = supabase.table("moderation_terms").insert([
+                {
+                    "term": term,
+                    "language": payload.language.value,
+                    "created_by": admin_id,
+                }
+                for term in new_terms
+            ]).execute()
+            content_screen.request_rebuild()
+
+            term_ids = [str(row["id"]) for row in inserted.data or [] if row.get("id") is not None]
+            log_admin_action(
+                admin_id,
+                "add_moderation_terms",
+                "moderation_terms",
+                ",".join(term_ids) or "bulk",
+                f"Added {len(new_terms)} {payload.language.value} terms"
+            )
+
+        return {
+            "message": f"Added {len(new_terms)} terms",
+            "added": len(new_terms),
+            "skipped": len(terms) - len(new_terms)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: Add moderation terms error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to add moderation terms: {str(e)}"
+        )
+
+
+@router.patch("/moderation/terms/{term_id}", response_model=ModerationTermResponse)
+def update_moderation_term(
+    term_id: int,
+    payload: ModerationTermUpdate,
+    current_user = Depends(require_admin)
+):
+    """
+    PATCH /admin/moderation/terms/{id}
+    Enable or disable a term
+    """
+    supabase = get_supabase()
+    admin_id = extract_user_id(current_user)
+
+    try:
+        response = supabase.table("moderation_terms")\
+            .update({
+                "is_active": payload.is_active,
+                "updated_at": datetime.utcnow().isoformat()
+            })\
+            .eq("id", term_id)\
+            .execute()
+
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Term not found"
+            )
+        content_screen.request_rebuild()
+
+        log_admin_action(
+            admin_id,
+            "update_moderation_term",
+            "moderation_term",
+            str(term_id),
+            f"Set is_active={payload.is_active}"
+        )
+
+        return response.data[0]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: Update moderation term error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to update moderation term: {str(e)}"
+        )
+
+
+@router.delete("/moderation/terms/{term_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_moderation_term(
+    term_id: int,
+    current_user = Depends(require_admin)
+):
+    """
+    DELETE /admin/moderation/terms/{id}
+    Remove a term from the list
+    """
+    supabase = get_supabase()
+    admin_id = extract_user_id(current_user)
+
+    try:
+        response = supabase.table("moderation_terms")\
+            .delete()\
+            .eq("id", term_id)\
+            .execute()
+
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Term not found"
+            )
+        content_screen.request_rebuild()
+
+        log_admin_action(
+            admin_id,
+            "delete_moderation_term",
+            "moderation_term",
+            str(term_id),
+            f"Deleted term: {response.data[0]['term']}"
+        )
+
+        return None
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: Delete moderation term error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to delete moderation term: {str(e)}"
+        )
+
+
+@router.get("/moderation/status")
+def get_moderation_status(current_user = Depends(require_admin)):
+    """
+    GET /admin/moderation/status
+    Size and age of the matcher loaded in this worker
+    """
+    return content_screen.status()
+
+
+@router.post("/moderation/check")
+def check_moderation_text(
+    payload: ModerationCheckRequest,
+    current_user = Depends(require_admin)
+):
+    """
+    POST /admin/moderation/check
+    Run text through the screen without saving anything
+    """
+    matches = screen_content(payload.text)
+    return {
+        "flagged": bool(matches),
+        "matches": matches
+    }
+
+
 # ============================================
 # DONATIONS VIEW
 # ============================================
@@ -1780,3 +2123,325 @@ def list_donations(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to list donations: {str(e)}"
         )
+
+
+# ============================================
+# ANALYTICS
+# ============================================
+
+# Level metrics: the rollups hold daily changes and the series is their running total
+CUMULATIVE_METRICS = {AnalyticsMetricEnum.OPPORTUNITIES_BY_STATUS}
+MAX_TIMESERIES_BUCKETS = 400
+
+
+def _bucket_start(day: date, granularity: AnalyticsGranularityEnum) -> date:
+    """Same bucketing as date_trunc() in admin_timeseries (weeks start on Monday)"""
+    if granularity == AnalyticsGranularityEnum.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == AnalyticsGranularityEnum.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(bucket: date, granularity: AnalyticsGranularityEnum) -> date:
+    if granularity == AnalyticsGranularityEnum.WEEK:
+        return bucket + timedelta(days=7)
+    if granularity == AnalyticsGranularityEnum.MONTH:
+        return (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return bucket + timedelta(days=1)
+
+
+@router.get("/analytics/timeseries", response_model=TimeseriesResponse)
+def get_analytics_timeseries(
+    metric: AnalyticsMetricEnum,
+    start: Optional[date] = Query(None, description="First day (default: 30 days before end)"),
+    end: Optional[date] = Query(None, description="Last day (default: today, UTC)"),
+    granularity: AnalyticsGranularityEnum = AnalyticsGranularityEnum.DAY,
+    current_user = Depends(require_admin)
+):
+    """
+    GET /admin/analytics/timeseries?metric=signups&start=2026-01-01&end=2026-03-31&granularity=week
+    Time series read from the daily_rollups table only; every bucket in the range is
+    returned, empty ones included. For opportunities_by_status the values are the
+    number of opportunities in each status at the end of the bucket.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+
+    buckets = []
+    bucket = _bucket_start(start, granularity)
+    while bucket <= end:
+        buckets.append(bucket)
+        if len(buckets) > MAX_TIMESERIES_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Range too long: at most {MAX_TIMESERIES_BUCKETS} {granularity.value} buckets"
+            )
+        bucket = _next_bucket(bucket, granularity)
+
+    cumulative = metric in CUMULATIVE_METRICS
+    supabase = get_supabase()
+
+    try:
+        response = supabase.rpc("admin_timeseries", {
+            "p_metric": metric.value,
+            "p_from": start.isoformat(),
+            "p_to": end.isoformat(),
+            "p_granularity": granularity.value,
+            "p_cumulative": cumulative,
+        }).execute()
+    except Exception as e:
+        print(f"ERROR: Analytics timeseries error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to load time series: {str(e)}"
+        )
+
+    by_bucket = {}
+    level = {}  # cumulative: level per dimension before the range
+    for row in (response.data or []):
+        row_bucket = date.fromisoformat(str(row["bucket"])[:10])
+        value = float(row.get("value") or 0)
+        if row_bucket < buckets[0]:
+            level[row["dimension"]] = value
+        else:
+            by_bucket.setdefault(row_bucket, {})[row["dimension"]] = value
+
+    points = []
+    for bucket in buckets:
+        if cumulative:
+            # Buckets without changes carry the previous level forward
+            level.update(by_bucket.get(bucket, {}))
+            values = dict(level)
+        else:
+            values = by_bucket.get(bucket, {})
+        points.append(TimeseriesPoint(
+            bucket=bucket,
+            # Metrics without a breakdown use the empty dimension; report them as total only
+            values={k: v for k, v in values.items() if k},
+            total=sum(values.values())
+        ))
+
+    return TimeseriesResponse(
+        metric=metric,
+        granularity=granularity,
+        start=start,
+        end=end,
+        cumulative=cumulative,
+        points=points
+    )
+
+
+# ============================================
+# STORAGE MAINTENANCE
+# ============================================
+
+@router.post("/storage/reconcile", status_code=status.HTTP_202_ACCEPTED)
+def reconcile_storage(
+    dry_run: bool = Query(True),
+    current_user = Depends(require_admin)
+):
+    """
+    POST /admin/storage/reconcile
+    Find (and unless dry_run, remove) storage objects no row references.
+    Same job the background reconciler runs every STORAGE_GC_INTERVAL seconds.
+
+    Runs in the background; poll GET /admin/storage/reconcile for the result.
+    "started" is False if a run was already in progress in this worker.
+    """
+    admin_id = extract_user_id(current_user)
+
+    def on_done(results):
+        if not dry_run:
+            log_admin_action(
+                admin_id,
+                "reconcile_storage",
+                "storage",
+                "all",
+                f"Removed {sum(r.get('deleted', 0) for r in results)} orphaned objects"
+            )
+
+    started = reconcile_job.start(dry_run=dry_run, on_done=on_done)
+    return {"started": started, **reconcile_job.status()}
+
+
+@router.get("/storage/reconcile")
+def get_reconcile_status(current_user = Depends(require_admin)):
+    """
+    GET /admin/storage/reconcile
+    Status of the last admin-triggered reconcile in this worker
+    """
+    return reconcile_job.status()
+
+
+# ============================================
+# EXPORTS
+# ============================================
+
+# Columns an admin may export, per resource (also the default column order)
+EXPORT_SOURCES = {
+    ExportResourceEnum.USERS: ExportSource(
+        table="user_profiles",
+        columns=[
+            "user_id", "email", "first_name", "last_name", "phone", "role", "status",
+            "address_city", "points", "volunteer_level", "created_at"
+        ],
+    ),
+    ExportResourceEnum.DONATIONS: ExportSource(
+        table="donations",
+        columns=[
+            "id", "donor_name", "email", "amount", "currency", "payment_method",
+            "transaction_id", "status", "created_at"
+        ],
+    ),
+    ExportResourceEnum.ORGANIZERS: ExportSource(
+        table="organizer_applications",
+        columns=[
+            "id", "user_id", "organization_name", "organizer_type", "email", "phone",
+            "contact_person", "registration_number", "address", "website", "status",
+            "submitted_at", "reviewed_at", "reviewed_by", "rejection_reason"
+        ],
+        date_column="submitted_at",
+    ),
+    ExportResourceEnum.AUDIT_LOG: ExportSource(
+        table="admin_activity_log",
+        columns=["id", "admin_id", "action", "target_type", "target_id", "details", "created_at"],
+    ),
+}
+
+
+@router.get("/export/{resource}")
+def export_resource(
+    resource: ExportResourceEnum,
+    format: ExportFormatEnum = ExportFormatEnum.CSV,
+    columns: Optional[str] = Query(None, description="Comma-separated columns (default: all exportable columns)"),
+    start: Optional[date] = Query(None, description="First day, inclusive"),
+    end: Optional[date] = Query(None, description="Last day, inclusive"),
+    current_user = Depends(require_admin)
+):
+    """
+    GET /admin/export/{users|donations|organizers|audit_log}?format=csv|ndjson&columns=&start=&end=
+    Stream the whole table (optionally a date range) oldest first, read in keyset
+    batches. Dates filter on created_at (submitted_at for organizers).
+    """
+    admin_id = extract_user_id(current_user)
+    source = EXPORT_SOURCES[resource]
+    
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else list(source.columns)
+    unknown = [c for c in selected if c not in source.columns]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown columns: {', '.join(unknown) or '(none selected)'}. Allowed: {', '.join(source.columns)}"
+        )
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    
+    export = TableExport(source, list(dict.fromkeys(selected)), format.value, start, end)
+    try:
+        # Read the first batch now so a bad query is a 400, not a broken download
+        export.fetch_first()
+    except Exception as e:
+        print(f"ERROR: Export {resource.value} error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to export {resource.value}: {str(e)}"
+        )
+    
+    log_admin_action(
+        admin_id,
+        "export",
+        "export",
+        resource.value,
+        f"Exported {resource.value} as {format.value}" + (f" ({start} to {end})" if start or end else "")
+    )
+    
+    filename = f"{resource.value}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{format.value}"
+    return StreamingResponse(
+        export.chunks(),
+        media_type=EXPORT_FORMATS[format.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ============================================
+# AUDIT LOG
+# ============================================
+
+@router.get("/activity-logs")
+def list_activity_logs(
+    response: Response,
+    admin_id: Optional[str] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    start: Optional[date] = Query(None, description="First day, inclusive"),
+    end: Optional[date] = Query(None, description="Last day, inclusive"),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user = Depends(require_admin)
+):
+    """
+    GET /admin/activity-logs?admin_id=&action=&target_type=&target_id=&start=&end=&cursor=
+    Audit trail, newest first. The next page's cursor is in the X-Next-Cursor header.
+    A date range limits the scan to the matching monthly partitions.
+    """
+    supabase = get_supabase()
+    after = decode_cursor(cursor, 2)
+    
+    try:
+        query = supabase.table("admin_activity_log").select("*")
+        
+        if admin_id:
+            query = query.eq("admin_id", admin_id)
+        if action:
+            query = query.eq("action", action)
+        if target_type:
+            query = query.eq("target_type", target_type)
+        if target_id:
+            query = query.eq("target_id", target_id)
+        if start:
+            query = query.gte("created_at", start.isoformat())
+        if end:
+            query = query.lt("created_at", (end + timedelta(days=1)).isoformat())
+        if after:
+            query = query.or_(keyset_filter("created_at", "id", after[0], after[1]))
+        
+        result = query.order("created_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(limit + 1)\
+            .execute()
+        
+        logs = result.data or []
+        if len(logs) > limit:
+            logs = logs[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(logs[-1]["created_at"], logs[-1]["id"])
+        return logs
+        
+    except Exception as e:
+        print(f"ERROR: List activity logs error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to list activity logs: {str(e)}"
+        )
+
+
+@router.get("/audit/status")
+def get_audit_status(current_user = Depends(require_admin)):
+    """
+    GET /admin/audit/status
+    Queue depth and write counters of the audit log writer in this worker,
+    and the last partition maintenance run
+    """
+    return {
+        **audit_log.stats(),
+        "retention": audit_retention.stats()
+    }
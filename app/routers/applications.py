@@ -3,6 +3,7 @@ Applications router - Users apply to opportunities, organizers manage applicatio
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
 from typing import Optional
+from postgrest.exceptions import APIError
 
 from app.database import get_supabase
 from app.models.application import (
@@ -14,6 +15,9 @@ from app.models.application import (
 )
 from app.utils.security import get_current_user, extract_user_id
 from app.utils.image_upload import upload_user_cv
+from app.utils.realtime import publish, user_channel, opportunity_applications_channel
+from app.utils.cache import home_cache, invalidate_organizer_dashboard
+from app.utils.concurrency import run_concurrently
 from app.utils.security import hash_secret
 from typing import Optional
 from app.utils.security import hash_secret
@@ -57,7 +61,7 @@ def create_application(
     try:
         # Check if opportunity exists
         opp_check = supabase.table("opportunities") \
-            .select("id, title") \
+            .select("id, title, organizer_id") \
             .eq("id", payload.opportunity_id) \
             .execute()
 
@@ -121,6 +125,8 @@ def create_application(
                 detail="Failed to create application"
             )
 
+        home_cache.invalidate(user_id)
+        invalidate_organizer_dashboard(opp_row.get("organizer_id"))
         return result.data[0]
 
     except HTTPException:
@@ -149,7 +155,7 @@ def _create_application_core(supabase, payload: dict, user_id: str):
 
     # Check if opportunity exists
     opp_check = supabase.table("opportunities") \
-        .select("id, title, is_private, access_key_hash") \
+        .select("id, title, is_private, access_key_hash, organizer_id") \
         .eq("id", payload.get("opportunity_id")) \
         .execute()
 
@@ -216,6 +222,7 @@ def _create_application_core(supabase, payload: dict, user_id: str):
             detail="Failed to create application"
         )
 
+    invalidate_organizer_dashboard(opp_row.get("organizer_id"))
     return result.data[0]
 
 
@@ -263,6 +270,7 @@ def create_application_multipart(
         }
 
         created = _create_application_core(supabase, payload, user_id)
+        home_cache.invalidate(user_id)
         return created
 
     except HTTPException:
@@ -371,10 +379,19 @@ def get_application(
     user_id = extract_user_id(current_user)
 
     try:
-        result = supabase.table("applications") \
-            .select("*") \
-            .eq("id", application_id) \
-            .execute()
+        # The organizer profiles of the caller are only needed when they are not
+        # the applicant, but are cheap to fetch alongside the application
+        fanout = run_concurrently({
+            "application": lambda: supabase.table("applications") \
+                .select("*, opportunities(organizer_id)") \
+                .eq("id", application_id) \
+                .execute(),
+            "organizer_profiles": lambda: supabase.table("organizer_profiles") \
+                .select("id") \
+                .eq("user_id", user_id) \
+                .execute(),
+        })
+        result = fanout.value("application")
 
         if not result.data:
             raise HTTPException(
@@ -383,30 +400,13 @@ def get_application(
             )
 
         application = result.data[0]
+        opportunity = application.pop("opportunities", None)
 
         # Check ownership (user can view own, organizer can view for their opportunities)
         if application["user_id"] != user_id:
-            # Check if user is the organizer of this opportunity
-            opp_check = supabase.table("opportunities") \
-                .select("organizer_id") \
-                .eq("id", application["opportunity_id"]) \
-                .execute()
-
-            if opp_check.data:
-                organizer_id = opp_check.data[0]["organizer_id"]
-                # Check if current user owns this organizer profile
-                org_check = supabase.table("organizer_profiles") \
-                    .select("id") \
-                    .eq("id", organizer_id) \
-                    .eq("user_id", user_id) \
-                    .execute()
-
-                if not org_check.data:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="You can only view your own applications"
-                    )
-            else:
+            organizer_id = opportunity.get("organizer_id") if isinstance(opportunity, dict) else None
+            own_profiles = fanout.value("organizer_profiles").data or []
+            if organizer_id is None or organizer_id not in {p["id"] for p in own_profiles}:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You can only view your own applications"
@@ -441,7 +441,7 @@ def withdraw_application(
     try:
         # Check application exists and belongs to user
         existing = supabase.table("applications") \
-            .select("id, user_id, status") \
+            .select("id, user_id, opportunity_id, status, opportunities(organizer_id)") \
             .eq("id", application_id) \
             .execute()
 
@@ -471,6 +471,19 @@ def withdraw_application(
             .eq("id", application_id) \
             .execute()
 
+        publish(
+            [user_channel(user_id), opportunity_applications_channel(application["opportunity_id"])],
+            "application.withdrawn",
+            {
+                "application_id": application_id,
+                "opportunity_id": application["opportunity_id"],
+                "status": "withdrawn",
+                "previous_status": application["status"],
+            }
+        )
+
+        home_cache.invalidate(user_id)
+        invalidate_organizer_dashboard((application.get("opportunities") or {}).get("organizer_id"))
         return {"message": "Application withdrawn successfully"}
 
     except HTTPException:
@@ -637,11 +650,19 @@ def update_application_status(
                 detail="No fields to update"
             )
 
-        # Update
-        result = supabase.table("applications") \
-            .update(update_data) \
-            .eq("id", application_id) \
-            .execute()
+        # Update; approving checks capacity in the same statement (migration 025)
+        try:
+            result = supabase.table("applications") \
+                .update(update_data) \
+                .eq("id", application_id) \
+                .execute()
+        except APIError as e:
+            if e.code == "PT409":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=e.message or "This opportunity has no spots left"
+                )
+            raise
 
         if not result.data:
             raise HTTPException(
@@ -649,7 +670,22 @@ def update_application_status(
                 detail="Failed to update application"
             )
 
-        return result.data[0]
+        updated = result.data[0]
+        home_cache.invalidate(updated["user_id"])
+        invalidate_organizer_dashboard(organizer_id)
+        if "status" in update_data and update_data["status"] != application["status"]:
+            publish(
+                [user_channel(updated["user_id"]), opportunity_applications_channel(opportunity_id)],
+                "application.status_changed",
+                {
+                    "application_id": application_id,
+                    "opportunity_id": opportunity_id,
+                    "status": updated["status"],
+                    "previous_status": application["status"],
+                }
+            )
+
+        return updated
 
     except HTTPException:
         raise
@@ -681,7 +717,7 @@ def get_application_stats(
     try:
         # Verify organizer ownership
         opp_check = supabase.table("opportunities") \
-            .select("organizer_id") \
+            .select("organizer_id, capacity, spots_left") \
             .eq("id", opportunity_id) \
             .execute()
 
@@ -692,6 +728,10 @@ def get_application_stats(
             )
 
         organizer_id = opp_check.data[0]["organizer_id"]
+        capacity = {
+            "capacity": opp_check.data[0].get("capacity"),
+            "spots_left": opp_check.data[0].get("spots_left"),
+        }
 
         org_check = supabase.table("organizer_profiles") \
             .select("id") \
@@ -714,7 +754,7 @@ def get_application_stats(
                 .execute()
 
             if stats.data:
-                return stats.data[0]
+                return {**stats.data[0], **capacity}
         except Exception:
             pass  # View might not exist, calculate manually
 
@@ -732,6 +772,7 @@ def get_application_stats(
             "approved_count": sum(1 for a in apps if a["status"] == "approved"),
             "rejected_count": sum(1 for a in apps if a["status"] == "rejected"),
             "withdrawn_count": sum(1 for a in apps if a["status"] == "withdrawn"),
+            **capacity,
         }
 
     except HTTPException:
@@ -9,6 +9,7 @@ from datetime import datetime
 from app.models.user import UserRegister, UserLogin
 from app.database import get_supabase
 from app.utils.security import get_current_user, extract_user_id
+from app.utils.concurrency import run_concurrently
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -277,12 +278,21 @@ def get_current_user_info(current_user = Depends(get_current_user)):
     user_id = extract_user_id(current_user)
     
     try:
-        # Get full user profile
-        profile = supabase.table("user_profiles")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .single()\
-            .execute()
+        # The organizer application is fetched alongside the profile and
+        # only used if the profile turns out to be an organizer's
+        fanout = run_concurrently({
+            "profile": lambda: supabase.table("user_profiles")\
+                .select("*")\
+                .eq("user_id", user_id)\
+                .single()\
+                .execute(),
+            "organizer_application": lambda: supabase.table("organizer_applications")\
+                .select("status, organization_name")\
+                .eq("user_id", user_id)\
+                .single()\
+                .execute(),
+        })
+        profile = fanout.value("profile")
         
         if profile.data:
             user_data = profile.data
@@ -298,18 +308,10 @@ def get_current_user_info(current_user = Depends(get_current_user)):
             
             # If organizer, include application status
             if user_data.get('role') == 'organizer':
-                try:
-                    app = supabase.table("organizer_applications")\
-                        .select("status, organization_name")\
-                        .eq("user_id", user_id)\
-                        .single()\
-                        .execute()
-                    
-                    if app.data:
-                        response['organizer_status'] = app.data['status']
-                        response['organization_name'] = app.data['organization_name']
-                except:
-                    pass
+                app = fanout.get("organizer_application")
+                if app is not None and app.data:
+                    response['organizer_status'] = app.data['status']
+                    response['organization_name'] = app.data['organization_name']
             
             return response
         else:
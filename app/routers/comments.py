@@ -1,9 +1,10 @@
 """
 Comments Router - Allow all authenticated users to comment on opportunities, blogs, and community posts
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
 from pydantic import BaseModel
 
 from app.database import get_supabase
@@ -11,13 +12,112 @@ from app.models.comment import (
     CommentCreate, 
     CommentUpdate, 
     CommentResponse, 
-    CommentsListResponse
+    CommentsListResponse,
+    CommentCountsRequest,
+    CommentCountsResponse
 )
 from app.utils.security import get_current_user, get_current_user_optional, extract_user_id
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+from app.utils.realtime import publish, entity_channel
+from app.utils.moderation import screen_content, moderation_reason
+from app.utils.spam import check_spam, client_ip, QUEUE, REJECT, SPAM_QUEUE_REASON
 
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
+# Comment columns plus the author's name and avatar in a single request
+COMMENT_WITH_AUTHOR = "*, author:user_profiles(first_name, last_name, avatar_url)"
+
+# Commentable entity type -> table holding it (and its comments_count)
+ENTITY_TABLES = {
+    'opportunity': 'opportunities',
+    'community_post': 'community_posts',
+    'blog': 'blogs'
+}
+
+
+def _is_valid_entity_id(entity_type: str, entity_id: str) -> bool:
+    """Whether entity_id has the right shape for the entity table's primary key"""
+    if entity_type == 'opportunity':
+        return entity_id.isdigit()
+    try:
+        UUID(entity_id)
+        return True
+    except ValueError:
+        return False
+
+
+def _author_info(author: Optional[dict]) -> dict:
+    """Display name and avatar from an embedded user_profiles row"""
+    if not author:
+        return {"user_name": "Anonymous", "user_avatar": None}
+    first_name = author.get("first_name") or ""
+    last_name = author.get("last_name") or ""
+    full_name = f"{first_name} {last_name}".strip()
+    return {
+        "user_name": full_name or "Anonymous",
+        "user_avatar": author.get("avatar_url")
+    }
+
+
+def _comment_response(
+    comment: dict,
+    current_user_id: Optional[str],
+    user_info: Optional[dict] = None
+) -> CommentResponse:
+    """Build a CommentResponse from a row selected with COMMENT_WITH_AUTHOR"""
+    user_info = user_info or _author_info(comment.get("author"))
+    # Check if current user can edit/delete
+    can_modify = current_user_id == comment["user_id"]
+    return CommentResponse(
+        id=comment["id"],
+        user_id=comment["user_id"],
+        user_name=user_info["user_name"],
+        user_avatar=user_info["user_avatar"],
+        entity_type=comment["entity_type"],
+        entity_id=comment["entity_id"],
+        content=comment["content"],
+        status=comment["status"],
+        created_at=comment["created_at"],
+        updated_at=comment.get("updated_at"),
+        parent_id=comment.get("parent_id"),
+        root_id=comment.get("root_id"),
+        depth=comment.get("depth") or 0,
+        reply_count=comment.get("reply_count") or 0,
+        can_edit=can_modify,
+        can_delete=can_modify
+    )
+
+
+def _publish_comment_event(event: str, comment: dict, response: CommentResponse):
+    """Push a comment change to subscribers of its entity (viewer-neutral permissions)"""
+    data = response.model_dump(mode="json")
+    data["can_edit"] = data["can_delete"] = False
+    publish(entity_channel(comment["entity_type"], comment["entity_id"]), event, data)
+
+
+def _visible_comment_count(entity_type: str, entity_id: str) -> int:
+    """Trigger-maintained comments_count of the entity (0 if it doesn't exist)"""
+    if not _is_valid_entity_id(entity_type, entity_id):
+        return 0
+    result = get_supabase().table(ENTITY_TABLES[entity_type])\
+        .select("comments_count")\
+        .eq("id", entity_id)\
+        .execute()
+    return (result.data[0].get("comments_count") or 0) if result.data else 0
+
+
+def _top_level_comment_count(entity_type: str, entity_id: str, visible_only: bool) -> int:
+    """Top-level comments of the entity, with the same filters as the thread list"""
+    query = get_supabase().table("comments")\
+        .select("id", count="exact", head=True)\
+        .eq("entity_type", entity_type)\
+        .eq("entity_id", entity_id)\
+        .is_("parent_id", "null")
+    if visible_only:
+        query = query.eq("status", "visible")
+    return query.execute().count or 0
+
 
 def get_user_info(user_id: str) -> dict:
     """Get user name and avatar from user_profiles"""
@@ -44,7 +144,9 @@ def get_comments_for_entity(
     entity_type: str,
     entity_id: str,  # Changed from UUID4 to str to support both int and UUID
     limit: int = Query(20, ge=1, le=100, description="Number of comments per page"),
-    offset: int = Query(0, ge=0, description="Number of comments to skip"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor. Ignored when cursor is given"),
+    replies: int = Query(3, ge=0, le=10, description="Replies to include per top-level comment"),
     current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
     """
@@ -53,6 +155,13 @@ def get_comments_for_entity(
     - **Public access**: Anyone can view visible comments
     - **entity_type**: 'opportunity', 'blog', or 'community_post'
     - **entity_id**: ID of the entity (int for opportunities, UUID for others)
+    - Top-level comments, newest first; pass `next_cursor` back as `cursor` for the next page
+    - `total` counts top-level comments (what can be paged through) and is only
+      returned without `cursor` (null on later pages, counting is O(thread));
+      `total_with_replies` is the entity's comment count including replies
+    - Each includes its first `replies` replies (oldest first) and, if there are more,
+      a `replies_cursor` for GET /comments/{id}/replies
+    - The page is fetched in a fixed number of queries regardless of thread depth
     - Returns comments with user information
     """
     supabase = get_supabase()
@@ -61,57 +170,53 @@ def get_comments_for_entity(
         if entity_type not in ['opportunity', 'community_post', 'blog']:
             raise HTTPException(status_code=400, detail="Invalid entity_type. Must be 'opportunity', 'blog', or 'community_post'")
         
-        # Build query - only show visible comments to non-admin users
-        query = supabase.table("comments").select("*", count="exact")
+        # Author name/avatar are embedded by PostgREST (comments.user_id -> user_profiles)
+        query = supabase.table("comments").select(COMMENT_WITH_AUTHOR)
         # Convert entity_id to string to match database storage format
         query = query.eq("entity_type", entity_type).eq("entity_id", str(entity_id))
+        query = query.is_("parent_id", "null")
         
         # Non-admin users only see visible comments
         user_role = getattr(current_user, 'role', None) if current_user else None
-        if not current_user or user_role != "admin":
+        visible_only = not current_user or user_role != "admin"
+        if visible_only:
             query = query.eq("status", "visible")
         
-        # Order by newest first
-        query = query.order("created_at", desc=True)
+        # Newest first; id breaks ties so the order (and the cursor) is total
+        query = query.order("created_at", desc=True).order("id", desc=True)
         
-        # Apply pagination
-        query = query.range(offset, offset + limit - 1)
+        after = decode_cursor(cursor, 2)
+        if after:
+            query = query.or_(keyset_filter("created_at", "id", after[0], after[1]))
+            query = query.limit(limit + 1)
+        else:
+            query = query.range(offset, offset + limit)
         
         result = query.execute()
+        rows = result.data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        comments = []
         current_user_id = extract_user_id(current_user) if current_user else None
+        comments = [_comment_response(comment, current_user_id) for comment in rows]
+        if replies:
+            _attach_reply_previews(comments, replies, visible_only, current_user_id)
         
-        for comment in result.data:
-            # Get user info
-            user_info = get_user_info(comment["user_id"])
-            
-            # Check if current user can edit/delete
-            can_modify = current_user_id == comment["user_id"]
-            
-            comments.append(CommentResponse(
-                id=comment["id"],
-                user_id=comment["user_id"],
-                user_name=user_info["user_name"],
-                user_avatar=user_info["user_avatar"],
-                entity_type=comment["entity_type"],
-                entity_id=comment["entity_id"],
-                content=comment["content"],
-                status=comment["status"],
-                created_at=comment["created_at"],
-                updated_at=comment.get("updated_at"),
-                can_edit=can_modify,
-                can_delete=can_modify
-            ))
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
         
-        total = result.count if result.count else 0
+        # Counted once per listing, not again for every cursor page
+        total = None if after else _top_level_comment_count(entity_type, str(entity_id), visible_only)
         
         return CommentsListResponse(
             comments=comments,
             total=total,
             limit=limit,
-            offset=offset,
-            has_more=(offset + limit) < total
+            offset=0 if after else offset,
+            has_more=has_more,
+            next_cursor=next_cursor,
+            total_with_replies=_visible_comment_count(entity_type, str(entity_id))
         )
         
     except HTTPException:
@@ -123,9 +228,143 @@ def get_comments_for_entity(
         raise HTTPException(status_code=500, detail=f"Failed to fetch comments: {str(e)}")
 
 
+def _attach_reply_previews(
+    comments: list,
+    per_thread: int,
+    visible_only: bool,
+    current_user_id: Optional[str]
+):
+    """Fill in the first replies of every thread on the page with a single RPC"""
+    # reply_count only counts visible replies; admins may also see hidden ones
+    root_ids = [c.id for c in comments if c.reply_count > 0 or not visible_only]
+    if not root_ids:
+        return
+    result = get_supabase().rpc("get_comment_reply_previews", {
+        "p_root_ids": root_ids,
+        "p_limit": per_thread,
+        "p_visible_only": visible_only
+    }).select(COMMENT_WITH_AUTHOR).execute()
+    
+    by_root: dict = {}
+    for row in result.data or []:
+        by_root.setdefault(row["root_id"], []).append(row)
+    for comment in comments:
+        previews = by_root.get(comment.id, [])
+        comment.replies = [_comment_response(row, current_user_id) for row in previews]
+        more = comment.reply_count > len(previews) if visible_only else len(previews) == per_thread
+        if previews and more:
+            last = previews[-1]
+            comment.replies_cursor = encode_cursor(last["created_at"], last["id"])
+
+
+@router.get("/{comment_id}/replies", response_model=CommentsListResponse)
+def get_comment_replies(
+    comment_id: str,
+    limit: int = Query(20, ge=1, le=100, description="Number of replies per page"),
+    cursor: Optional[str] = Query(None, description="replies_cursor or next_cursor from the previous page"),
+    current_user: Optional[dict] = Depends(get_current_user_optional)
+):
+    """
+    Load more replies below a comment
+    
+    - **Public access**: Anyone can view visible replies
+    - Returns every reply at any depth below the comment, oldest first, flat;
+      use parent_id/depth to nest them
+    - Cursor-based: pass `next_cursor` back as `cursor`
+    """
+    supabase = get_supabase()
+    try:
+        try:
+            UUID(comment_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Comment not found")
+        
+        parent = supabase.table("comments")\
+            .select("id, path, depth, reply_count")\
+            .eq("id", comment_id)\
+            .execute()
+        if not parent.data:
+            raise HTTPException(status_code=404, detail="Comment not found")
+        parent = parent.data[0]
+        
+        query = supabase.table("comments").select(COMMENT_WITH_AUTHOR)
+        if parent["depth"] == 0:
+            # Whole thread: index range on root_id
+            query = query.eq("root_id", comment_id).not_.is_("parent_id", "null")
+        else:
+            # Subtree of a nested reply: path prefix range
+            query = query.like("path", f"{parent['path']}/%")
+        
+        user_role = getattr(current_user, 'role', None) if current_user else None
+        if not current_user or user_role != "admin":
+            query = query.eq("status", "visible")
+        
+        query = query.order("created_at").order("id")
+        after = decode_cursor(cursor, 2)
+        if after:
+            query = query.or_(keyset_filter("created_at", "id", after[0], after[1], desc=False))
+        result = query.limit(limit + 1).execute()
+        
+        rows = result.data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        current_user_id = extract_user_id(current_user) if current_user else None
+        return CommentsListResponse(
+            comments=[_comment_response(row, current_user_id) for row in rows],
+            total=parent.get("reply_count") or 0,
+            limit=limit,
+            offset=0,
+            has_more=has_more,
+            next_cursor=encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR in get_comment_replies: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch replies: {str(e)}")
+
+
+@router.post("/counts", response_model=CommentCountsResponse)
+def get_comment_counts(payload: CommentCountsRequest):
+    """
+    Get visible comment counts for many entities in one call
+    
+    - **Public access**
+    - Reads the trigger-maintained comments_count columns: one query per entity type
+    - Unknown entities are reported with a count of 0
+    """
+    supabase = get_supabase()
+    try:
+        ids_by_type: dict = {}
+        for item in payload.items:
+            ids_by_type.setdefault(item.entity_type, set()).add(str(item.entity_id))
+        
+        counts = {entity_type: {entity_id: 0 for entity_id in ids} for entity_type, ids in ids_by_type.items()}
+        for entity_type, ids in ids_by_type.items():
+            # Opportunity ids are integers, the others UUIDs; anything else can't match
+            ids = {entity_id for entity_id in ids if _is_valid_entity_id(entity_type, entity_id)}
+            if not ids:
+                continue
+            result = supabase.table(ENTITY_TABLES[entity_type])\
+                .select("id, comments_count")\
+                .in_("id", list(ids))\
+                .execute()
+            for row in result.data or []:
+                counts[entity_type][str(row["id"])] = row.get("comments_count") or 0
+        
+        return CommentCountsResponse(counts=counts)
+        
+    except Exception as e:
+        print(f"ERROR in get_comment_counts: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch comment counts: {str(e)}")
+
+
 @router.post("", response_model=CommentResponse, status_code=201)
 def create_comment(
     comment: CommentCreate,
+    request: Request,
     current_user = Depends(get_current_user)
 ):
     """
@@ -135,17 +374,14 @@ def create_comment(
     - **entity_type**: 'opportunity', 'blog', or 'community_post'
     - **entity_id**: ID of the entity to comment on
     - **content**: Comment text (1-2000 characters)
+    - **parent_id**: Optional comment to reply to (must be on the same entity)
+    - Comments matching a moderation term are saved as 'pending' until an admin approves them
+    - Near-copies of your recent comments are held as 'pending'; repeated ones are rejected (429)
     """
     supabase = get_supabase()
     try:
         # Verify the entity exists
-        entity_table_map = {
-            'opportunity': 'opportunities',
-            'community_post': 'community_posts',
-            'blog': 'blogs'
-        }
-        
-        entity_table = entity_table_map.get(comment.entity_type)
+        entity_table = ENTITY_TABLES.get(comment.entity_type)
         if not entity_table:
             raise HTTPException(status_code=400, detail="Invalid entity_type")
         
@@ -154,7 +390,24 @@ def create_comment(
         if not entity_check.data:
             raise HTTPException(status_code=404, detail=f"{comment.entity_type} not found")
         
-        # Create comment
+        # Replies must target a visible comment on the same entity
+        if comment.parent_id:
+            parent_check = None
+            try:
+                UUID(comment.parent_id)
+                parent_check = supabase.table("comments")\
+                    .select("entity_type, entity_id, status")\
+                    .eq("id", comment.parent_id)\
+                    .execute()
+            except ValueError:
+                pass
+            if not parent_check or not parent_check.data or parent_check.data[0]["status"] != "visible":
+                raise HTTPException(status_code=404, detail="Parent comment not found")
+            parent = parent_check.data[0]
+            if parent["entity_type"] != comment.entity_type or parent["entity_id"] != str(comment.entity_id):
+                raise HTTPException(status_code=400, detail="Reply must be on the same entity as its parent comment")
+        
+        # Create comment (root_id/depth/path are filled in by a trigger)
         user_id = extract_user_id(current_user)
         new_comment = {
             "user_id": user_id,
@@ -164,6 +417,20 @@ def create_comment(
             "status": "visible",
             "created_at": datetime.utcnow().isoformat()
         }
+        if comment.parent_id:
+            new_comment["parent_id"] = comment.parent_id
+        
+        matches = screen_content(comment.content)
+        if matches:
+            new_comment["status"] = "pending"
+            new_comment["moderation_reason"] = moderation_reason(matches)
+        
+        verdict = check_spam("comment", comment.content, user_id, client_ip(request))
+        if verdict == REJECT:
+            raise HTTPException(status_code=429, detail="You have already posted this comment. Please slow down.")
+        if verdict == QUEUE and not matches:
+            new_comment["status"] = "pending"
+            new_comment["moderation_reason"] = SPAM_QUEUE_REASON
         
         result = supabase.table("comments").insert(new_comment).execute()
         
@@ -175,20 +442,10 @@ def create_comment(
         # Get user info
         user_info = get_user_info(user_id)
         
-        return CommentResponse(
-            id=created_comment["id"],
-            user_id=created_comment["user_id"],
-            user_name=user_info["user_name"],
-            user_avatar=user_info["user_avatar"],
-            entity_type=created_comment["entity_type"],
-            entity_id=created_comment["entity_id"],
-            content=created_comment["content"],
-            status=created_comment["status"],
-            created_at=created_comment["created_at"],
-            updated_at=created_comment.get("updated_at"),
-            can_edit=True,
-            can_delete=True
-        )
+        response = _comment_response(created_comment, user_id, user_info)
+        if created_comment["status"] == "visible":
+            _publish_comment_event("comment.created", created_comment, response)
+        return response
         
     except HTTPException:
         raise
@@ -208,6 +465,7 @@ def update_comment(
     - **Authentication required**: Only the comment author can update
     - Users can only update their own comments
     - Admins can update any comment
+    - Edits matching a moderation term put the comment back to 'pending'
     """
     supabase = get_supabase()
     try:
@@ -231,6 +489,13 @@ def update_comment(
             "updated_at": datetime.utcnow().isoformat()
         }
         
+        # Edits are screened too; admin edits are trusted
+        if user_role != "admin":
+            matches = screen_content(comment_update.content)
+            if matches:
+                update_data["status"] = "pending"
+                update_data["moderation_reason"] = moderation_reason(matches)
+        
         update_result = supabase.table("comments").update(update_data).eq("id", str(comment_id)).execute()
         
         if not update_result.data:
@@ -241,20 +506,23 @@ def update_comment(
         # Get user info
         user_info = get_user_info(updated_comment["user_id"])
         
-        return CommentResponse(
-            id=updated_comment["id"],
-            user_id=updated_comment["user_id"],
-            user_name=user_info["user_name"],
-            user_avatar=user_info["user_avatar"],
-            entity_type=updated_comment["entity_type"],
-            entity_id=updated_comment["entity_id"],
-            content=updated_comment["content"],
-            status=updated_comment["status"],
-            created_at=updated_comment["created_at"],
-            updated_at=updated_comment.get("updated_at"),
-            can_edit=True,
-            can_delete=True
-        )
+        response = _comment_response(updated_comment, user_id, user_info)
+        if updated_comment.get("status") == "visible":
+            _publish_comment_event("comment.updated", updated_comment, response)
+        elif existing_comment["status"] == "visible":
+            # Held for review: take it off open streams
+            publish(
+                entity_channel(updated_comment["entity_type"], updated_comment["entity_id"]),
+                "comment.deleted",
+                {
+                    "id": updated_comment["id"],
+                    "parent_id": updated_comment.get("parent_id"),
+                    "root_id": updated_comment.get("root_id"),
+                }
+            )
+        # Admins editing someone else's comment can also edit/delete it
+        response.can_edit = response.can_delete = True
+        return response
         
     except HTTPException:
         raise
@@ -296,6 +564,15 @@ def delete_comment(
         if not delete_result.data:
             raise HTTPException(status_code=500, detail="Failed to delete comment")
         
+        publish(
+            entity_channel(existing_comment["entity_type"], existing_comment["entity_id"]),
+            "comment.deleted",
+            {
+                "id": existing_comment["id"],
+                "parent_id": existing_comment.get("parent_id"),
+                "root_id": existing_comment.get("root_id"),
+            }
+        )
         return None
         
     except HTTPException:
@@ -1,5 +1,5 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional
 from app.database import get_supabase
 from app.utils.security import get_current_user, extract_user_id
@@ -7,9 +7,16 @@ from app.models.community import (
     CommunityPostCreate, 
     CommunityPostUpdate, 
     CommunityPostResponse,
-    CommunityStatusEnum
+    CommunityStatusEnum,
+    PostLikeResponse,
+    LikedByMeRequest
 )
+from app.utils.counters import post_likes_counter
+from app.utils.community_feed import community_feed, to_feed_item
+from app.utils.moderation import screen_content, moderation_reason
+from app.utils.spam import check_spam, client_ip, QUEUE, REJECT, SPAM_QUEUE_REASON
 from datetime import datetime
+from postgrest.exceptions import APIError
 
 router = APIRouter(prefix="/api/community", tags=["Community"])
 
@@ -112,65 +119,36 @@ def get_organizer_or_admin_profile(current_user = Depends(get_current_user)):
 
 @router.get("", response_model=List[CommunityPostResponse])
 def list_community_posts(
+    response: Response,
     category: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page")
 ):
     """
-    List approved community posts
+    List approved community posts, newest first.
+    Served from the cached feed; pass the X-Next-Cursor response header back as
+    `cursor` for the next page (the header is absent on the last page).
     """
-    supabase = get_supabase()
     try:
-        # Attempt to join with organizer_profiles to get organization name
-        # If this fails (e.g. relationship not defined in Supabase), we fallback to simple select
-        try:
-            query = supabase.table("community_posts")\
-                .select("*, organizer:user_profiles(first_name, last_name)")\
-                .eq("status", "approved")\
-                .order("created_at", desc=True)
-            
-            if category and category != "all":
-                query = query.eq("category", category)
-                
-            query = query.range(offset, offset + limit - 1)
-            response = query.execute()
-            data = response.data or []
-        except Exception as join_err:
-            print(f"Join query failed, falling back to simple select: {join_err}")
-            query = supabase.table("community_posts")\
+        if offset:
+            # Legacy offset paging, straight from the database
+            query = get_supabase().table("community_posts")\
                 .select("*")\
                 .eq("status", "approved")\
-                .order("created_at", desc=True)
-            
+                .order("created_at", desc=True)\
+                .order("id", desc=True)
             if category and category != "all":
                 query = query.eq("category", category)
-                
-            query = query.range(offset, offset + limit - 1)
-            response = query.execute()
-            data = response.data or []
+            rows = query.range(offset, offset + limit - 1).execute()
+            return [to_feed_item(row) for row in rows.data or []]
 
-        # Process and flatten data
-        for item in data:
-            # Flatten organizer name
-            # Flatten organizer name from user_profiles if that worked
-            if item.get("organizer") and isinstance(item["organizer"], dict):
-                org = item["organizer"]
-                first = org.get('first_name') or ""
-                last = org.get('last_name') or ""
-                name = f"{first} {last}".strip()
-                item["organizer_name"] = name if name else "Verified Volunteer"
-            
-            # Ensure organizer_name exists even if join failed
-            if not item.get("organizer_name"):
-                item["organizer_name"] = "Verified Volunteer"
-            
-            # Map comments_count to comments to match CommunityPostResponse model
-            if "comments_count" in item:
-                item["comments"] = item["comments_count"]
-            elif "comments" not in item:
-                item["comments"] = 0
-        
-        return data
+        posts, next_cursor = community_feed.page(category, cursor, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return posts
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"List community posts error: {e}")
         raise HTTPException(
@@ -224,11 +202,14 @@ def list_my_posts(
 @router.post("", response_model=CommunityPostResponse, status_code=status.HTTP_201_CREATED)
 def create_community_post(
     post: CommunityPostCreate,
+    request: Request,
     organizer_profile: dict = Depends(get_organizer_or_admin_profile)
 ):
     """
     Create a new community post.
     Organizers can create posts which are Auto-Approved by default (as per requirement).
+    Posts matching a moderation term, or near-copies of your recent posts, are held
+    as pending for admin review; repeated copies are rejected (429).
     """
     supabase = get_supabase()
     organizer_id = organizer_profile["user_id"]
@@ -238,6 +219,23 @@ def create_community_post(
         post_data["organizer_id"] = organizer_id
         # Default to APPROVED since organizers are verified
         post_data["status"] = CommunityStatusEnum.APPROVED.value
+        if not organizer_profile.get("is_admin", False):
+            matches = screen_content(post.title, post.title_kh, post.content, post.content_kh)
+            if matches:
+                post_data["status"] = CommunityStatusEnum.PENDING.value
+                post_data["moderation_reason"] = moderation_reason(matches)
+            
+            verdict = check_spam(
+                "community_post", f"{post.title}\n{post.content}", organizer_id, client_ip(request)
+            )
+            if verdict == REJECT:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="You have already posted this. Please slow down."
+                )
+            if verdict == QUEUE and not matches:
+                post_data["status"] = CommunityStatusEnum.PENDING.value
+                post_data["moderation_reason"] = SPAM_QUEUE_REASON
         post_data["created_at"] = datetime.utcnow().isoformat()
         post_data["likes"] = 0
         post_data["comments_count"] = 0  # Initialize count
@@ -248,12 +246,11 @@ def create_community_post(
             raise Exception("Failed to create post")
             
         data = response.data[0]
-        # Map for response model
-        data["comments"] = data.get("comments_count", 0)
-        data["organizer_name"] = organizer_profile.get("organization_name")
-            
-        return data
+        community_feed.upsert(data)
+        return to_feed_item(data)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Create post error: {e}")
         raise HTTPException(
@@ -297,6 +294,15 @@ def update_community_post(
         
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
+        
+        if not is_admin:
+            matches = screen_content(
+                update_data.get("title"), update_data.get("title_kh"),
+                update_data.get("content"), update_data.get("content_kh")
+            )
+            if matches:
+                update_data["status"] = CommunityStatusEnum.PENDING.value
+                update_data["moderation_reason"] = moderation_reason(matches)
             
         response = supabase.table("community_posts")\
             .update(update_data)\
@@ -304,10 +310,8 @@ def update_community_post(
             .execute()
             
         data = response.data[0]
-        data["comments"] = data.get("comments_count", 0)
-        data["organizer_name"] = organizer_profile.get("organization_name")
-
-        return data
+        community_feed.upsert(data)
+        return to_feed_item(data)
         
     except HTTPException:
         raise
@@ -349,6 +353,7 @@ def delete_community_post(
             
         # Delete
         supabase.table("community_posts").delete().eq("id", post_id).execute()
+        community_feed.remove(post_id)
         
         return None
         
@@ -362,23 +367,85 @@ def delete_community_post(
         )
 
 
-@router.post("/{post_id}/like")
-def like_post(post_id: str):
+@router.post("/{post_id}/like", response_model=PostLikeResponse)
+def like_post(post_id: str, current_user = Depends(get_current_user)):
     """
-    Like a community post
+    Like a community post (once per user).
+    The like is recorded immediately; the post's likes counter is updated in
+    batches shortly after.
     """
     supabase = get_supabase()
+    user_id = extract_user_id(current_user)
     try:
-        # Get current likes
-        res = supabase.table("community_posts").select("likes").eq("id", post_id).single().execute()
-        if not res.data:
+        res = supabase.rpc("add_post_like", {"p_user_id": user_id, "p_post_id": post_id}).execute()
+    except APIError as e:
+        # 23503: foreign key violation (post doesn't exist), 22P02: malformed id
+        if e.code in ("23503", "22P02"):
             raise HTTPException(status_code=404, detail="Post not found")
-            
-        new_likes = (res.data.get("likes") or 0) + 1
-        
-        # Update likes
-        update_res = supabase.table("community_posts").update({"likes": new_likes}).eq("id", post_id).execute()
-        return update_res.data[0]
+        print(f"Like post error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         print(f"Like post error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+    if not res.data:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if res.data[0]["liked"]:
+        post_likes_counter.add(post_id, 1)
+    return {
+        "post_id": post_id,
+        "liked": True,
+        "likes": max(0, res.data[0]["likes"] + post_likes_counter.pending(post_id))
+    }
+
+
+@router.delete("/{post_id}/like", response_model=PostLikeResponse)
+def unlike_post(post_id: str, current_user = Depends(get_current_user)):
+    """
+    Remove the current user's like from a community post
+    """
+    supabase = get_supabase()
+    user_id = extract_user_id(current_user)
+    try:
+        res = supabase.rpc("remove_post_like", {"p_user_id": user_id, "p_post_id": post_id}).execute()
+    except APIError as e:
+        if e.code == "22P02":
+            raise HTTPException(status_code=404, detail="Post not found")
+        print(f"Unlike post error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        print(f"Unlike post error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not res.data:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if res.data[0]["unliked"]:
+        post_likes_counter.add(post_id, -1)
+    return {
+        "post_id": post_id,
+        "liked": False,
+        "likes": max(0, res.data[0]["likes"] + post_likes_counter.pending(post_id))
+    }
+
+
+@router.post("/liked-by-me")
+def liked_by_me(payload: LikedByMeRequest, current_user = Depends(get_current_user)):
+    """
+    Which of the given posts the current user has liked.
+    Returns {post_id: bool} for every requested ID (one query for the whole page).
+    """
+    supabase = get_supabase()
+    user_id = extract_user_id(current_user)
+    try:
+        res = supabase.table("post_likes")\
+            .select("post_id")\
+            .eq("user_id", user_id)\
+            .in_("post_id", payload.post_ids)\
+            .execute()
+        liked = {str(row["post_id"]) for row in (res.data or [])}
+        return {post_id: post_id in liked for post_id in payload.post_ids}
+    except Exception as e:
+        print(f"Liked-by-me error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,28 @@
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from app.models.contact import ContactMessageCreate, ContactMessageResponse
 from app.database import get_supabase
+from app.utils.spam import check_spam, client_ip, ALLOW
 from datetime import datetime
 
 router = APIRouter(prefix="/api/contact", tags=["Contact"])
 
 @router.post("", response_model=ContactMessageResponse, status_code=status.HTTP_201_CREATED)
-def submit_contact_message(message: ContactMessageCreate):
+def submit_contact_message(message: ContactMessageCreate, request: Request):
     """
     Submit a contact message
+    Near-copies of a recent message from the same email or IP are rejected (429);
+    contact messages have no moderation queue.
     """
     supabase = get_supabase()
     try:
+        # The sender's email stands in for a user id on this public endpoint
+        if check_spam("contact", message.message, message.email.lower(), client_ip(request)) != ALLOW:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="This message was already sent. We'll get back to you soon."
+            )
+        
         data = message.model_dump()
         data['created_at'] = datetime.utcnow().isoformat()
         
@@ -25,6 +35,8 @@ def submit_contact_message(message: ContactMessageCreate):
             )
             
         return result.data[0]
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Contact submit error: {e}")
         raise HTTPException(
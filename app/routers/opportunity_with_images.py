@@ -4,13 +4,14 @@ from typing import Optional, List
 from datetime import date, time
 
 from app.database import get_supabase
+from app.utils.cache import invalidate_organizer_dashboard
 from app.models.opportunity import OpportunityUpdate, OpportunityResponse, OpportunityListResponse
 from app.utils.security import get_current_user, extract_user_id
 from app.utils.image_upload import (
     upload_multiple_opportunity_images,
-    delete_opportunity_image,
-    get_image_urls_from_string,
-    image_urls_to_string
+    delete_image_assets,
+    get_image_assets,
+    asset_urls_to_string
 )
 
 router = APIRouter(prefix="/api/opportunities", tags=["Opportunities"])
@@ -26,9 +27,15 @@ def list_opportunities(
     category: Optional[str] = None,
     page: int = 1,
     pageSize: int = 20,
-    sort: str = "newest"
+    sort: str = "newest",
+    available: bool = False
 ):
-    """List public opportunities with filters."""
+    """
+    List public opportunities with filters.
+
+    available=true keeps only opportunities with spots left (or no capacity
+    set); sort=most_spots orders by spots_left, unlimited ones last.
+    """
     supabase = get_supabase()
     
     try:
@@ -44,12 +51,18 @@ def list_opportunities(
         
         if category and category != "all":
             query = query.eq("category_label", category)
+
+        if available:
+            query = query.or_("spots_left.is.null,spots_left.gt.0")
             
         # Sorting
         if sort == "newest":
             query = query.order("created_at", desc=True)
         elif sort == "oldest":
             query = query.order("created_at", desc=False)
+        elif sort == "most_spots":
+            query = query.order("spots_left", desc=True, nullsfirst=False)\
+                .order("created_at", desc=True)
             
         # Pagination
         limit = pageSize
@@ -232,17 +245,18 @@ def create_opportunity(
             from app.utils.security import hash_secret
             access_key_hash = hash_secret(access_key)
 
-        image_urls = []
+        image_assets = []
         # Check if any images provided (images list is not empty and first item has filename)
         if images and len(images) > 0 and images[0].filename:
-            image_urls = upload_multiple_opportunity_images(images, organizer_id, max_files=5)
+            image_assets = upload_multiple_opportunity_images(images, organizer_id, max_files=5)
 
         data = {
             "organizer_id": organizer_id,
             "title": title,
             "category_label": category_label,
             "location_label": location_label,
-            "images": image_urls_to_string(image_urls) if image_urls else None,
+            "images": asset_urls_to_string(image_assets) if image_assets else None,
+            "image_assets": image_assets,
             "description": description,
             "organization": organization,
             "date_range": parsed_date.isoformat() if parsed_date else None,
@@ -262,15 +276,24 @@ def create_opportunity(
         # The Supabase python client sometimes returns only a subset of columns on insert
         # (depending on PostgREST configuration / return representation). Our
         # OpportunityResponse requires `id`, so we fetch the inserted row explicitly.
-        insert_result = supabase.table("opportunities").insert(data).execute()
+        try:
+            insert_result = supabase.table("opportunities").insert(data).execute()
+        except Exception:
+            # Don't leave uploaded images orphaned in storage if the row never lands
+            if image_assets:
+                delete_image_assets(image_assets)
+            raise
 
         if not insert_result.data:
+            if image_assets:
+                delete_image_assets(image_assets)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create opportunity"
             )
 
         inserted = insert_result.data[0]
+        invalidate_organizer_dashboard(organizer_id)
         # ... rest of retrieval logic ...
         inserted_id = inserted.get("id")
         if not inserted_id:
@@ -438,6 +461,7 @@ def update_opportunity(
                 detail="Failed to update opportunity"
             )
 
+        invalidate_organizer_dashboard(organizer_id)
         return result.data[0]
 
     except HTTPException:
@@ -481,13 +505,12 @@ def delete_opportunity(
                 detail="You can only delete opportunities you created"
             )
 
-        # Delete images from storage
-        image_urls = get_image_urls_from_string(existing.data[0].get("images"))
-        for url in image_urls:
-            delete_opportunity_image(url)
-
         # Delete opportunity
         supabase.table("opportunities").delete().eq("id", opportunity_id).execute()
+        invalidate_organizer_dashboard(organizer_id)
+
+        # Queue its images for deletion (removed in the background)
+        delete_image_assets(get_image_assets(existing.data[0]))
 
         return None
 
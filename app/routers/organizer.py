@@ -11,10 +11,23 @@ from gotrue.errors import AuthApiError
 from app.models.organizer import OrganizerRegister
 from app.models.user import UserLogin
 from app.utils.security import get_current_user, extract_user_id
+from app.utils.storage_refs import (
+    acquire_objects,
+    content_hash,
+    content_path,
+    hash_from_path,
+    register_objects,
+)
+from app.utils.storage_gc import enqueue_release, enqueue_removal
 from app.database import get_supabase
+from app.config import settings
+from app.utils.cache import organizer_dashboard_cache
 
 router = APIRouter(prefix="/api/organizer", tags=["Organizer"])
 
+CARD_BUCKET = settings.STORAGE_CARD_BUCKET
+ORGANIZER_ACTIVITY_DAYS = 7  # days of activity shown on the dashboard
+
 
 class OrganizerType(str, Enum):
     NGO = "ngo"
@@ -348,7 +361,7 @@ def upload_organization_card(
     try:
         # Verify application exists and belongs to user
         app_check = supabase.table("organizer_applications")\
-            .select("id")\
+            .select("id, status, card_image_url")\
             .match({"id": application_id, "user_id": user_id})\
             .execute()
         
@@ -366,39 +379,73 @@ def upload_organization_card(
             )
         
         # Read and validate size
-        file_content = await file.read()
+        file_content = file.file.read()
         if len(file_content) > 5 * 1024 * 1024:  # 5MB
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File must be less than 5MB"
             )
         
-        # Upload to storage
-        file_ext = file.filename.split(".")[-1] if file.filename else "jpg"
-        file_name = f"{user_id}/org_card.{file_ext}"
-        
-        # Try to upload
+        # Content-addressed: the same card uploaded again reuses the stored copy
+        sha256 = content_hash(file_content)
         try:
-            supabase.storage.from_("organization-cards").upload(
-                file_name,
-                file_content,
-                {"content-type": file.content_type, "upsert": "true"}
-            )
-        except Exception as storage_error:
-            print(f"Storage error: {storage_error}")
+            existing = acquire_objects(CARD_BUCKET, [sha256])
+        except Exception as lookup_error:
+            print(f"Storage lookup error: {lookup_error}")
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to upload. Ensure 'organization-cards' bucket exists."
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to look up stored cards"
             )
         
+        if sha256 in existing:
+            file_name = existing[sha256]["path"]
+        else:
+            file_ext = file.filename.split(".")[-1].lower() if file.filename and "." in file.filename else "jpg"
+            file_name = content_path(sha256, f".{file_ext}")
+            try:
+                supabase.storage.from_(CARD_BUCKET).upload(
+                    file_name,
+                    file_content,
+                    {"content-type": file.content_type, "cache-control": "31536000", "upsert": "true"}
+                )
+                register_objects(CARD_BUCKET, [{
+                    "sha256": sha256,
+                    "path": file_name,
+                    "content_type": file.content_type,
+                    "size": len(file_content),
+                    "refs": 1
+                }])
+            except Exception as storage_error:
+                print(f"Storage error: {storage_error}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Failed to upload. Ensure 'organization-cards' bucket exists."
+                )
+        
         # Get public URL
-        card_url = supabase.storage.from_("organization-cards").get_public_url(file_name)
+        card_url = supabase.storage.from_(CARD_BUCKET).get_public_url(file_name)
         
-        # Update application
-        supabase.table("organizer_applications")\
-            .update({"card_image_url": card_url})\
-            .eq("id", application_id)\
-            .execute()
+        # Update application; drop the reference taken above if that fails
+        try:
+            supabase.table("organizer_applications")\
+                .update({"card_image_url": card_url})\
+                .eq("id", application_id)\
+                .execute()
+        except Exception:
+            enqueue_release(CARD_BUCKET, [sha256])
+            raise
+
+        # Release the card this one replaces. Once approved, the URL has been
+        # copied to organizer_profiles, so keep the old object in that case.
+        application = app_check.data[0]
+        previous_url = application.get("card_image_url")
+        if previous_url and previous_url != card_url and application.get("status") == "pending":
+            previous_hash = hash_from_path(previous_url)
+            if previous_hash:
+                enqueue_release(CARD_BUCKET, [previous_hash])
+            elif f"/{CARD_BUCKET}/" in previous_url:
+                # Cards uploaded before content addressing lived at {user_id}/org_card.{ext}
+                enqueue_removal(CARD_BUCKET, [previous_url.split(f"/{CARD_BUCKET}/")[1]])
         
         return {
             "message": "Card uploaded successfully",
@@ -492,9 +539,36 @@ def get_organizer_profile_endpoint(current_user = Depends(get_current_user)):
     except Exception as e:
         print(f"Get profile error: {e}")
 
+def _dashboard_payload(stats: dict) -> dict:
+    """Shape the organizer_dashboard() RPC result into the dashboard response"""
+    opportunities = stats.get("opportunities_by_status") or {}
+    applications = stats.get("applications_by_status") or {}
+    capacity = stats.get("capacity_total") or 0
+    approved = applications.get("approved", 0)
+    return {
+        "opportunities_count": sum(opportunities.values()),
+        "applications_total": sum(applications.values()),
+        "applications_pending": applications.get("pending", 0),
+        "applications_approved": approved,
+        "opportunities_by_status": opportunities,
+        "applications_by_status": applications,
+        "capacity_total": capacity,
+        "capacity_filled": round(approved / capacity, 4) if capacity else None,
+        "recent_activity": stats.get("recent_activity") or [],
+        "updated_at": stats.get("updated_at"),
+    }
+
+
 @router.get("/dashboard")
 def get_organizer_dashboard(current_user = Depends(get_current_user)):
-    """Get organizer dashboard statistics"""
+    """
+    Get organizer dashboard statistics
+
+    Counters come from the organizer_stats row kept current by triggers
+    (migration 024) and are cached per organizer for
+    ORGANIZER_DASHBOARD_CACHE_TTL seconds; opportunity and application
+    writes invalidate the entry.
+    """
     supabase = get_supabase()
     user_id = extract_user_id(current_user)
     
@@ -506,56 +580,22 @@ def get_organizer_dashboard(current_user = Depends(get_current_user)):
             .execute()
             
         if not org_check.data:
-            # If not verified organizer, return empty stats or forbidden
-            # For dashboard, maybe just return empty / pending msg
-            return {
-                "opportunities_count": 0,
-                "applications_total": 0,
-                "applications_pending": 0,
-                "applications_approved": 0
-            }
-        
-        organizer_id = org_check.data[0]['id']
-        
-        # Get opportunities count
-        opps = supabase.table("opportunities")\
-            .select("id", count="exact")\
-            .eq("organizer_id", organizer_id)\
-            .execute()
-        
-        opp_count = opps.count or 0
-        opp_ids = [o['id'] for o in (opps.data or [])]
-        
-        # Get applications stats
-        # If no opportunities, no applications
-        if not opp_ids:
-            return {
-                "opportunities_count": 0,
-                "applications_total": 0,
-                "applications_pending": 0,
-                "applications_approved": 0
-            }
-            
-        # We can't easily do IN query for count breakdown in one go with simple Postgrest client 
-        # without writing raw SQL or multiple queries. 
-        # Using a view would be better, but for now we'll do a simple fetch.
-        
-        apps = supabase.table("applications")\
-            .select("status")\
-            .in_("opportunity_id", opp_ids)\
-            .execute()
-            
-        app_list = apps.data or []
-        total = len(app_list)
-        pending = sum(1 for a in app_list if a['status'] == 'pending')
-        approved = sum(1 for a in app_list if a['status'] == 'approved')
-        
-        return {
-            "opportunities_count": opp_count,
-            "applications_total": total,
-            "applications_pending": pending,
-            "applications_approved": approved
-        }
+            # Not a verified organizer yet: nothing to count
+            return _dashboard_payload({})
+        
+        organizer_id = str(org_check.data[0]['id'])
+        cached = organizer_dashboard_cache.get(organizer_id)
+        if cached is not None:
+            return cached
+
+        stats = supabase.rpc("organizer_dashboard", {
+            "p_organizer_id": organizer_id,
+            "p_days": ORGANIZER_ACTIVITY_DAYS,
+        }).execute()
+
+        payload = _dashboard_payload(stats.data or {})
+        organizer_dashboard_cache.set(organizer_id, payload)
+        return payload
         
     except Exception as e:
         print(f"Dashboard error: {e}")
@@ -0,0 +1,228 @@
+"""
+Realtime routes - push comment and application changes instead of polling
+
+Server-Sent Events (one stream per scope):
+    GET /api/realtime/entity/{entity_type}/{entity_id}              comments (public)
+    GET /api/realtime/me?token=...                                  your applications
+    GET /api/realtime/opportunity/{id}/applications?token=...       organizer view
+
+WebSocket (several scopes on one connection):
+    WS /api/realtime/ws?token=...&entities=blog:<id>,opportunity:1&opportunities=1
+
+Authorization is checked once when the stream opens. EventSource can't set
+headers, so the JWT may be passed as ?token=. Idle streams get a heartbeat
+every REALTIME_HEARTBEAT_SECONDS. A "reset" event means events were
+dropped (slow client) or the server is restarting: refetch and reconnect.
+"""
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.database import get_supabase
+from app.utils.security import get_user_from_token, extract_user_id
+from app.utils.realtime import (
+    CLOSE,
+    broker,
+    entity_channel,
+    format_sse,
+    opportunity_applications_channel,
+    user_channel,
+)
+
+router = APIRouter(prefix="/api/realtime", tags=["Realtime"])
+
+COMMENT_ENTITY_TYPES = ('opportunity', 'community_post', 'blog')
+
+
+def _bearer_token(request_headers, token: Optional[str]) -> Optional[str]:
+    if token:
+        return token
+    auth = request_headers.get("authorization") or ""
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return None
+
+
+async def _authenticate(raw_token: Optional[str]):
+    """Resolve the user once per connection"""
+    if not raw_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing token"
+        )
+    return await run_in_threadpool(get_user_from_token, raw_token)
+
+
+def _check_opportunity_owner(opportunity_id: int, user_id: str):
+    """Only the organizer who owns an opportunity may watch its applications"""
+    supabase = get_supabase()
+    opp_check = supabase.table("opportunities") \
+        .select("organizer_id") \
+        .eq("id", opportunity_id) \
+        .execute()
+    if not opp_check.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Opportunity not found"
+        )
+    org_check = supabase.table("organizer_profiles") \
+        .select("id") \
+        .eq("id", opp_check.data[0]["organizer_id"]) \
+        .eq("user_id", user_id) \
+        .execute()
+    if not org_check.data:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only watch applications for your own opportunities"
+        )
+
+
+def _check_capacity():
+    if broker.connections >= settings.REALTIME_MAX_CONNECTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many realtime connections, retry later"
+        )
+
+
+def _sse_response(request: Request, channels: List[str]) -> StreamingResponse:
+    _check_capacity()
+
+    async def stream():
+        try:
+            subscription = broker.subscribe(channels)
+        except OverflowError:
+            yield "event: reset\ndata: {}\n\n"
+            return
+        try:
+            yield "retry: 5000\n: connected\n\n"
+            while True:
+                try:
+                    message = await subscription.get(settings.REALTIME_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if message is CLOSE:
+                    yield "event: reset\ndata: {}\n\n"
+                    break
+                yield format_sse(message)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.get("/entity/{entity_type}/{entity_id}", summary="Stream comment changes (SSE)")
+async def stream_entity(entity_type: str, entity_id: str, request: Request):
+    """
+    Comment events for one opportunity, blog or community post:
+    comment.created, comment.updated, comment.deleted. Public, like the comments themselves.
+    """
+    if entity_type not in COMMENT_ENTITY_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid entity_type. Must be 'opportunity', 'blog', or 'community_post'")
+    return _sse_response(request, [entity_channel(entity_type, entity_id)])
+
+
+@router.get("/me", summary="Stream your application changes (SSE)")
+async def stream_me(request: Request, token: Optional[str] = Query(None)):
+    """
+    Events for the current user: application.status_changed, application.withdrawn
+    """
+    user = await _authenticate(_bearer_token(request.headers, token))
+    return _sse_response(request, [user_channel(extract_user_id(user))])
+
+
+@router.get("/opportunity/{opportunity_id}/applications", summary="Stream application changes (SSE, organizer)")
+async def stream_opportunity_applications(
+    opportunity_id: int,
+    request: Request,
+    token: Optional[str] = Query(None)
+):
+    """
+    Application events for an opportunity you organize
+    """
+    user = await _authenticate(_bearer_token(request.headers, token))
+    await run_in_threadpool(_check_opportunity_owner, opportunity_id, extract_user_id(user))
+    return _sse_response(request, [opportunity_applications_channel(opportunity_id)])
+
+
+@router.websocket("/ws")
+async def realtime_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    entities: Optional[str] = Query(None, description="Comma-separated entity_type:entity_id"),
+    opportunities: Optional[str] = Query(None, description="Comma-separated opportunity ids (organizer)")
+):
+    """
+    All scopes on one socket. With a token you also get your own user channel.
+    Messages are JSON objects {event, data, sent_at}; {"event": "ping"} is a heartbeat.
+    """
+    channels = []
+    try:
+        for item in filter(None, (entities or "").split(",")):
+            entity_type, _, entity_id = item.partition(":")
+            if entity_type not in COMMENT_ENTITY_TYPES or not entity_id:
+                raise HTTPException(status_code=400, detail=f"Invalid entity: {item}")
+            channels.append(entity_channel(entity_type, entity_id))
+
+        raw_token = _bearer_token(websocket.headers, token)
+        opportunity_ids = [int(o) for o in filter(None, (opportunities or "").split(","))]
+        if raw_token or opportunity_ids:
+            user = await _authenticate(raw_token)
+            user_id = extract_user_id(user)
+            channels.append(user_channel(user_id))
+            for opportunity_id in opportunity_ids:
+                await run_in_threadpool(_check_opportunity_owner, opportunity_id, user_id)
+                channels.append(opportunity_applications_channel(opportunity_id))
+
+        if not channels:
+            raise HTTPException(status_code=400, detail="Nothing to subscribe to")
+        _check_capacity()
+        subscription = broker.subscribe(channels)
+    except (HTTPException, ValueError, OverflowError) as e:
+        await websocket.close(code=1008, reason=str(getattr(e, "detail", e))[:120])
+        return
+
+    await websocket.accept()
+
+    # Clients don't send anything; reading only tells us when they go away
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    receiver = asyncio.create_task(wait_for_disconnect())
+    try:
+        while not receiver.done():
+            try:
+                message = await subscription.get(settings.REALTIME_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_text(json.dumps({"event": "ping"}))
+                continue
+            if message is CLOSE:
+                await websocket.send_text(json.dumps({"event": "reset"}))
+                await websocket.close()
+                break
+            await websocket.send_text(json.dumps(message, default=str))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+        broker.unsubscribe(subscription)
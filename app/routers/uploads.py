@@ -0,0 +1,451 @@
+"""
+Direct upload routes - clients upload files straight to Supabase Storage
+
+Two-phase flow so file bytes never pass through the API workers:
+1. POST /api/uploads/sign issues a short-lived signed upload URL for one
+   path under organizer_{id}/... (opportunity images) or {user_id}/...
+   (avatars, CVs)
+2. The client uploads the file to that URL, then calls
+   POST /api/uploads/{upload_id}/finalize, which checks the stored
+   object's size and content type, then its first bytes (a ranged read,
+   which must start with the format's signature)
+
+CVs are attached on finalize as uploaded. Images are queued for the
+rendition worker (app/utils/upload_renditions.py), which runs them through
+the same pipeline as the multipart endpoints and attaches them; the client
+can follow that with GET /api/uploads/{upload_id}.
+"""
+import codecs
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.config import settings
+from app.database import get_supabase
+from app.models.upload import (
+    UploadPurpose,
+    SignedUploadRequest,
+    SignedUploadResponse,
+    FinalizeUploadRequest,
+)
+from app.utils.security import get_current_user, extract_user_id
+from app.utils.image_upload import (
+    ALLOWED_EXTENSIONS,
+    MAX_FILE_SIZE,
+    generate_unique_filename,
+    get_file_extension,
+)
+from app.utils.storage_gc import enqueue_removal
+from app.utils.upload_renditions import MAX_OPPORTUNITY_IMAGES, enqueue_rendition
+
+router = APIRouter(prefix="/api/uploads", tags=["Uploads"])
+
+IMAGE_CONTENT_TYPES = set(settings.ALLOWED_IMAGE_TYPES)
+CV_EXTENSIONS = {".pdf", ".doc", ".docx", ".txt"}
+CV_CONTENT_TYPES = {
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "text/plain",
+}
+# Leading bytes of each binary format. Images are fully decoded later by the
+# rendition worker; WebP also has "WEBP" at offset 8 (checked separately).
+FILE_SIGNATURES = {
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+    "image/webp": (b"RIFF",),
+    "application/pdf": (b"%PDF-",),
+    "application/msword": (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",),  # OLE compound file
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (b"PK\x03\x04",),  # zip
+}
+# Uploads are checked on their first bytes only
+HEAD_BYTES = 4096
+HEAD_URL_TTL = 60  # seconds
+
+# purpose -> (bucket, allowed extensions, allowed content types, max size)
+UPLOAD_RULES = {
+    UploadPurpose.OPPORTUNITY_IMAGE: (settings.STORAGE_OPPORTUNITY_BUCKET, ALLOWED_EXTENSIONS, IMAGE_CONTENT_TYPES, MAX_FILE_SIZE),
+    UploadPurpose.AVATAR: (settings.STORAGE_AVATAR_BUCKET, ALLOWED_EXTENSIONS, IMAGE_CONTENT_TYPES, MAX_FILE_SIZE),
+    UploadPurpose.CV: (settings.STORAGE_CV_BUCKET, CV_EXTENSIONS, CV_CONTENT_TYPES, settings.MAX_CV_SIZE),
+}
+
+
+def _get_organizer_id(supabase, user_id: str) -> int:
+    """Organizer profile id of an active, verified organizer"""
+    organizer = supabase.table("organizer_profiles")\
+        .select("id, is_active, verified_at")\
+        .eq("user_id", user_id)\
+        .execute()
+
+    if not organizer.data:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only verified organizers can upload opportunity images"
+        )
+    profile = organizer.data[0]
+    if not profile.get("is_active", True) or profile.get("verified_at") is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your organizer account is not active or pending verification"
+        )
+    return profile["id"]
+
+
+def _object_info(bucket: str, path: str) -> Optional[dict]:
+    """Size and content type of a stored object (None if it doesn't exist)"""
+    try:
+        info = get_supabase().storage.from_(bucket).info(path)
+    except Exception as e:
+        print(f"Upload info error: {e}")
+        return None
+    metadata = info.get("metadata") or {}
+    return {
+        "size": info.get("size") or metadata.get("size") or metadata.get("contentLength"),
+        "content_type": info.get("content_type") or info.get("contentType") or metadata.get("mimetype"),
+    }
+
+
+def _read_head(bucket: str, path: str, length: int) -> bytes:
+    """First length bytes of a stored object, without downloading the rest"""
+    signed = get_supabase().storage.from_(bucket).create_signed_url(path, HEAD_URL_TTL)
+    head = b""
+    with httpx.stream("GET", signed["signedURL"], headers={"Range": f"bytes=0-{length - 1}"}, timeout=10) as response:
+        response.raise_for_status()
+        # Stop reading even if the server ignores the Range header
+        for chunk in response.iter_bytes():
+            head += chunk
+            if len(head) >= length:
+                break
+    return head[:length]
+
+
+def _content_matches(content_type: str, content: bytes) -> bool:
+    """Whether the first bytes really are of the declared content type"""
+    if content_type == "text/plain":
+        if b"\x00" in content:
+            return False
+        try:
+            # The head may end mid-character
+            codecs.getincrementaldecoder("utf-8")().decode(content, final=False)
+        except UnicodeDecodeError:
+            return False
+        return True
+    if content_type == "image/webp" and content[8:12] != b"WEBP":
+        return False
+    return content.startswith(FILE_SIGNATURES.get(content_type, ()))
+
+
+def _check_opportunity(supabase, user_id: str, opportunity_id: Optional[int]):
+    """An image may only be added to your own opportunity, up to the limit"""
+    if opportunity_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="opportunity_id is required"
+        )
+    organizer_id = _get_organizer_id(supabase, user_id)
+    opportunity = supabase.table("opportunities")\
+        .select("id, organizer_id, image_assets")\
+        .eq("id", opportunity_id)\
+        .execute()
+    if not opportunity.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Opportunity not found"
+        )
+    if opportunity.data[0]["organizer_id"] != organizer_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only add images to opportunities you created"
+        )
+    # Checked again atomically when the processed image is appended
+    if len(opportunity.data[0].get("image_assets") or []) >= MAX_OPPORTUNITY_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many images. Maximum: {MAX_OPPORTUNITY_IMAGES}"
+        )
+
+
+def _attach_cv(supabase, user_id: str, bucket: str, path: str, payload: FinalizeUploadRequest) -> str:
+    """Public URL of a verified CV, set on the application if one is given"""
+    url = supabase.storage.from_(bucket).get_public_url(path)
+    if payload.application_id is not None:
+        updated = supabase.table("applications")\
+            .update({"cv_url": url})\
+            .eq("id", payload.application_id)\
+            .eq("user_id", user_id)\
+            .execute()
+        if not updated.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Application not found"
+            )
+    return url
+
+
+def _upload_status(upload: dict) -> str:
+    if upload.get("processed_at"):
+        return "failed" if upload.get("last_error") else "attached"
+    if upload.get("finalized_at"):
+        return "processing"
+    return "pending"
+
+
+@router.post(
+    "/sign",
+    response_model=SignedUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Get a signed upload URL",
+    description="Issue a short-lived URL to upload one file directly to storage."
+)
+def sign_upload(
+    payload: SignedUploadRequest,
+    current_user=Depends(get_current_user)
+):
+    """
+    Issue a signed upload URL.
+
+    - Opportunity images go under organizer_{id}/uploads/ (verified organizers only)
+    - Avatars go under {user_id}/uploads/, CVs under {user_id}/
+    - The file must then be finalized before expires_at
+    """
+    supabase = get_supabase()
+    user_id = extract_user_id(current_user)
+    bucket, extensions, content_types, max_size = UPLOAD_RULES[payload.purpose]
+
+    if get_file_extension(payload.filename) not in extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(sorted(extensions))}"
+        )
+    if payload.content_type not in content_types:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content type not allowed: {payload.content_type}"
+        )
+    if payload.size > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size: {max_size / (1024*1024)}MB"
+        )
+
+    try:
+        filename = generate_unique_filename(payload.filename)
+        if payload.purpose == UploadPurpose.OPPORTUNITY_IMAGE:
+            path = f"organizer_{_get_organizer_id(supabase, user_id)}/uploads/{filename}"
+        elif payload.purpose == UploadPurpose.AVATAR:
+            path = f"{user_id}/uploads/{filename}"
+        else:
+            path = f"{user_id}/{filename}"
+
+        signed = supabase.storage.from_(bucket).create_signed_upload_url(path)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.SIGNED_UPLOAD_TTL)
+
+        result = supabase.table("pending_uploads").insert({
+            "user_id": user_id,
+            "purpose": payload.purpose.value,
+            "bucket": bucket,
+            "path": path,
+            "content_type": payload.content_type,
+            "max_size": max_size,
+            "expires_at": expires_at.isoformat(),
+        }).execute()
+
+        if not result.data:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to record upload"
+            )
+
+        return {
+            "upload_id": result.data[0]["id"],
+            "bucket": bucket,
+            "path": path,
+            "signed_url": signed["signed_url"],
+            "token": signed["token"],
+            "expires_at": expires_at,
+            "max_size": max_size,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Sign upload error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create upload URL: {str(e)}"
+        )
+
+
+@router.post(
+    "/{upload_id}/finalize",
+    summary="Finalize a direct upload",
+    description="Verify an uploaded file and attach it to an opportunity, application or profile."
+)
+def finalize_upload(
+    upload_id: str,
+    payload: FinalizeUploadRequest,
+    current_user=Depends(get_current_user)
+):
+    """
+    Verify and attach a direct upload.
+
+    - opportunity_image: queued to be processed into renditions and appended
+      to the opportunity (must be yours, max 5 images)
+    - avatar: queued to be processed into renditions; replaces your avatar
+      once done
+    - cv: set on the application if application_id is given, otherwise only the URL is returned
+
+    Images come back with status "processing"; follow them with
+    GET /api/uploads/{upload_id}. A file that fails verification is deleted.
+    """
+    supabase = get_supabase()
+    user_id = extract_user_id(current_user)
+
+    try:
+        pending = supabase.table("pending_uploads")\
+            .select("*")\
+            .eq("id", upload_id)\
+            .execute()
+
+        if not pending.data or pending.data[0]["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        upload = pending.data[0]
+
+        if upload.get("finalized_at"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload already finalized"
+            )
+        expires_at = datetime.fromisoformat(upload["expires_at"].replace("Z", "+00:00"))
+        if datetime.now(timezone.utc) > expires_at:
+            enqueue_removal(upload["bucket"], [upload["path"]])
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload expired, request a new upload URL"
+            )
+
+        purpose = UploadPurpose(upload["purpose"])
+        bucket, path = upload["bucket"], upload["path"]
+
+        # Check the stored object against what was signed
+        info = _object_info(bucket, path)
+        if info is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File has not been uploaded yet"
+            )
+        size = int(info["size"] or 0)
+        if size <= 0 or size > upload["max_size"] or info["content_type"] != upload["content_type"]:
+            enqueue_removal(bucket, [path])
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file does not match the requested size or type"
+            )
+
+        # The stored content type is whatever the client sent; check the bytes
+        if not _content_matches(upload["content_type"], _read_head(bucket, path, HEAD_BYTES)):
+            enqueue_removal(bucket, [path])
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Uploaded file is not a valid {upload['content_type']} file"
+            )
+
+        claim = {"finalized_at": datetime.now(timezone.utc).isoformat()}
+        if purpose == UploadPurpose.OPPORTUNITY_IMAGE:
+            _check_opportunity(supabase, user_id, payload.opportunity_id)
+            claim["target_id"] = payload.opportunity_id
+        elif purpose == UploadPurpose.CV:
+            # Nothing to process
+            claim["processed_at"] = claim["finalized_at"]
+
+        # Claim the upload so a concurrent finalize can't attach it twice
+        claimed = supabase.table("pending_uploads")\
+            .update(claim)\
+            .eq("id", upload_id)\
+            .is_("finalized_at", "null")\
+            .execute()
+        if not claimed.data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload already finalized"
+            )
+
+        result = {"upload_id": upload_id, "purpose": purpose.value}
+        if purpose != UploadPurpose.CV:
+            enqueue_rendition(upload_id)
+            result["status"] = "processing"
+            return result
+
+        try:
+            url = _attach_cv(supabase, user_id, bucket, path, payload)
+        except Exception:
+            # Release the claim so the client can retry
+            supabase.table("pending_uploads")\
+                .update({"finalized_at": None, "processed_at": None})\
+                .eq("id", upload_id)\
+                .execute()
+            raise
+
+        result.update({"status": "attached", "url": url, "cv_url": url})
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Finalize upload error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to finalize upload: {str(e)}"
+        )
+
+
+@router.get(
+    "/{upload_id}",
+    summary="Get a direct upload's status",
+    description="Whether a finalized upload has been processed and attached yet."
+)
+def get_upload_status(
+    upload_id: str,
+    current_user=Depends(get_current_user)
+):
+    """
+    Status of one of your uploads: pending (not finalized), processing,
+    attached or failed (error says why)
+    """
+    supabase = get_supabase()
+    user_id = extract_user_id(current_user)
+
+    try:
+        pending = supabase.table("pending_uploads")\
+            .select("id, user_id, purpose, finalized_at, processed_at, last_error")\
+            .eq("id", upload_id)\
+            .execute()
+
+        if not pending.data or pending.data[0]["user_id"] != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        upload = pending.data[0]
+        state = _upload_status(upload)
+        return {
+            "upload_id": upload["id"],
+            "purpose": upload["purpose"],
+            "status": state,
+            "error": upload.get("last_error") if state == "failed" else None,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Upload status error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get upload status: {str(e)}"
+        )
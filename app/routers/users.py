@@ -2,20 +2,25 @@
 User profile routes - FIXED VERSION
 Properly handles UUID in Supabase queries
 """
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, File, UploadFile
+from typing import List, Optional
 from datetime import datetime
 
 from app.models.user import (
     UserProfileUpdate, 
     UserProfileResponse, 
     UserStats,
-    ProfileCompleteness
+    ProfileCompleteness,
+    UserHome
 )
 from app.models.opportunity import OpportunityResponse
 from app.utils.security import get_current_user, extract_user_id
 from app.database import get_supabase
 from app.config import settings
+from app.utils.image_upload import upload_image_assets, delete_image_assets, get_asset_url
+from app.utils.storage_gc import enqueue_removal
+from app.utils.cache import home_cache
+from app.utils.concurrency import run_concurrently
 
 router = APIRouter(prefix="/api/user", tags=["User Profile"])
 
@@ -189,6 +194,7 @@ def update_profile(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Profile not found"
             )
+        home_cache.invalidate(user_id)
         
         return {
             "message": "Profile updated successfully! ✅",
@@ -242,53 +248,53 @@ def upload_avatar(
                 detail="File size must be less than 5MB"
             )
         
-        # Generate filename
-        file_ext = file.filename.split(".")[-1] if file.filename else "jpg"
-        file_name = f"{user_id}/avatar.{file_ext}"
-        
-        # Upload to storage (call storage() then from_(bucket))
+        # Build renditions (thumb/card/full); identical images share stored files
         bucket = getattr(settings, 'STORAGE_AVATAR_BUCKET', 'avatars')
-        # Upload file and capture response for debugging
-        try:
-            upload_resp = supabase.storage().from_(bucket).upload(
-                file_name,
-                file_content,
-                {"content-type": file.content_type, "upsert": "true"}
+        assets, errors = upload_image_assets(
+            [(file.filename or "avatar.jpg", file_content)],
+            bucket
+        )
+        avatar_image = assets[0]
+        if avatar_image is None:
+            print(f"Avatar upload error (storage): {errors}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to upload avatar: {errors[0] if errors else 'unknown error'}"
             )
-            print(f"DEBUG: storage.upload response: {getattr(upload_resp, '__dict__', str(upload_resp))}")
-        except Exception as e:
-            print(f"Avatar upload error (storage): {e}")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to upload avatar: {e}")
+        # Avatars are only ever shown small
+        avatar_url = get_asset_url(avatar_image, "card")
         
-        # Get public URL (handle different return shapes)
+        # Remember the previous avatar so its files can be removed once replaced
+        previous = None
         try:
-            pub = supabase.storage().from_(bucket).get_public_url(file_name)
+            previous_resp = supabase.table("user_profiles")\
+                .select("avatar_image")\
+                .filter("user_id", "eq", user_id)\
+                .execute()
+            if previous_resp.data:
+                previous = previous_resp.data[0].get("avatar_image")
         except Exception as e:
-            print(f"Get public url error: {e}")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to get public URL: {e}")
-        avatar_url = None
-        if isinstance(pub, dict):
-            avatar_url = pub.get('publicUrl') or pub.get('public_url') or pub.get('publicURL') or pub.get('url')
-            if not avatar_url:
-                # fall back to first value
-                vals = list(pub.values())
-                avatar_url = vals[0] if vals else None
-        else:
-            avatar_url = pub
+            print(f"Warning: could not read previous avatar: {e!r}")
         
         # Update profile (use explicit filter and handle DB errors)
         try:
             supabase.table("user_profiles")\
-                .update({"avatar_url": avatar_url})\
+                .update({"avatar_url": avatar_url, "avatar_image": avatar_image})\
                 .filter("user_id", "eq", user_id)\
                 .execute()
         except Exception as e:
             print(f"Avatar update error (db): {e!r}")
+            delete_image_assets([avatar_image])
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to update profile: {e}")
         
+        if previous:
+            delete_image_assets([previous])
+        home_cache.invalidate(user_id)
+        
         return {
             "message": "Avatar uploaded successfully",
-            "avatar_url": avatar_url
+            "avatar_url": avatar_url,
+            "avatar_image": avatar_image
         }
         
     except HTTPException:
@@ -313,35 +319,32 @@ def delete_avatar(current_user = Depends(get_current_user)):
         if not user_id or "\n" in user_id or "\r" in user_id or "." in user_id or " " in user_id:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user id")
         
-        # Remove from storage (ignore errors if file doesn't exist)
-        try:
-            bucket = getattr(settings, 'STORAGE_AVATAR_BUCKET', 'avatars')
-            # Try common extensions in case the uploaded file used a different one
-            tried = []
-            for ext in ('jpg', 'jpeg', 'png', 'webp', 'gif'):
-                file_path = f"{user_id}/avatar.{ext}"
-                try:
-                    supabase.storage().from_(bucket).remove([file_path])
-                    tried.append(file_path)
-                except Exception:
-                    # Ignore missing files for now
-                    pass
-            print(f"DEBUG: attempted to remove files: {tried}")
-        except Exception as exc:
-            print(f"Warning: failed to remove avatar from storage: {exc}")
-            pass
+        current = supabase.table("user_profiles")\
+            .select("avatar_url, avatar_image")\
+            .filter("user_id", "eq", user_id)\
+            .execute()
+        profile = current.data[0] if current.data else {}
         
         # Update profile
         try:
             supabase.table("user_profiles")\
-                .update({"avatar_url": None})\
+                .update({"avatar_url": None, "avatar_image": None})\
                 .filter("user_id", "eq", user_id)\
                 .execute()
         except Exception as e:
             print(f"Avatar delete update error (db): {e!r}")
-            # Don't fail the whole operation because storage removal might have worked
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to update profile: {e}")
         
+        # Queue the files for deletion (removed in the background)
+        bucket = getattr(settings, 'STORAGE_AVATAR_BUCKET', 'avatars')
+        avatar_url = profile.get("avatar_url") or ""
+        if profile.get("avatar_image"):
+            delete_image_assets([profile["avatar_image"]])
+        elif f"/{bucket}/" in avatar_url:
+            # Avatars uploaded before renditions lived at {user_id}/avatar.{ext}
+            enqueue_removal(bucket, [avatar_url.split(f"/{bucket}/")[1].split("?")[0]])
+        home_cache.invalidate(user_id)
+        
         return {
             "message": "Avatar deleted successfully",
             "success": True
@@ -355,48 +358,119 @@ def delete_avatar(current_user = Depends(get_current_user)):
         )
 
 
+PROFILE_FIELDS = [
+    'first_name', 'last_name', 'phone', 'location',
+    'birth_date', 'about_me', 'skills', 'availability',
+    'emergency_contact_name', 'emergency_contact_phone',
+    'address_city', 'avatar_url'
+]
+
+# Applications shown on the home page
+HOME_RECENT_APPLICATIONS = 5
+
+
+def _fetch_activities(user_id: str) -> List[dict]:
+    """Completed and upcoming activities in one query"""
+    response = get_supabase().table("user_activities")\
+        .select("hours, status")\
+        .eq("user_id", user_id)\
+        .in_("status", ["completed", "upcoming"])\
+        .execute()
+    return response.data or []
+
+
+def _user_stats(activities: List[dict], points: Optional[int]) -> UserStats:
+    completed = [a for a in activities if a.get("status") == "completed"]
+    return UserStats(
+        total_hours=float(sum(a.get("hours") or 0 for a in completed)),
+        completed_projects=len(completed),
+        upcoming_events=sum(1 for a in activities if a.get("status") == "upcoming"),
+        points=points or 0
+    )
+
+
+def _profile_completeness(profile: Optional[dict]) -> ProfileCompleteness:
+    if not profile:
+        return ProfileCompleteness(
+            percentage=0,
+            filled_fields=0,
+            total_fields=len(PROFILE_FIELDS),
+            missing_fields=[],
+            is_complete=False
+        )
+
+    filled_fields = sum(1 for field in PROFILE_FIELDS if profile.get(field))
+    total_fields = len(PROFILE_FIELDS)
+    percentage = int((filled_fields / total_fields) * 100)
+    missing_fields = [field for field in PROFILE_FIELDS if not profile.get(field)]
+
+    return ProfileCompleteness(
+        percentage=percentage,
+        filled_fields=filled_fields,
+        total_fields=total_fields,
+        missing_fields=missing_fields,
+        is_complete=percentage == 100
+    )
+
+
+def _fetch_recommendations() -> list:
+    # For now, return latest active opportunities as recommendations
+    # In a real app, this would use ML or matching logic based on user profile
+    response = get_supabase().table("opportunities")\
+        .select("*, organizer:organizer_id(organization_name)")\
+        .eq("status", "active")\
+        .eq("visibility", "public")\
+        .order("created_at", desc=True)\
+        .limit(6)\
+        .execute()
+    return response.data or []
+
+
+def _fetch_recent_applications(user_id: str, limit: int) -> dict:
+    """Newest applications, shaped like GET /api/applications/my"""
+    result = get_supabase().table("applications") \
+        .select("*, opportunities(title)", count="exact") \
+        .eq("user_id", user_id) \
+        .order("created_at", desc=True) \
+        .range(0, limit - 1) \
+        .execute()
+    data = []
+    for row in (result.data or []):
+        opp = row.get("opportunities")
+        if opp and isinstance(opp, dict):
+            row["opportunity_title"] = opp.get("title")
+        data.append(row)
+    return {
+        "data": data,
+        "total": result.count or 0,
+        "limit": limit,
+        "offset": 0
+    }
+
+
 @router.get("/stats", response_model=UserStats)
 def get_user_stats(current_user = Depends(get_current_user)):
     """Get user statistics"""
     supabase = get_supabase()
     user_id = extract_user_id(current_user)
-    
+
     try:
-        # Get completed activities
-        hours_response = supabase.table("user_activities")\
-            .select("hours")\
-            .eq("user_id", user_id)\
-            .eq("status", "completed")\
-            .execute()
-        
-        total_hours = sum(a.get("hours", 0) for a in (hours_response.data or []))
-        completed_count = len(hours_response.data or [])
-        
-        # Get upcoming activities
-        upcoming_response = supabase.table("user_activities")\
-            .select("id")\
-            .eq("user_id", user_id)\
-            .eq("status", "upcoming")\
-            .execute()
-        
-        upcoming_count = len(upcoming_response.data or [])
-        
-        # Get points
-        profile_response = supabase.table("user_profiles")\
-            .select("points")\
-            .eq("user_id", user_id)\
-            .single()\
-            .execute()
-        
+        # Activities and points are independent reads
+        fanout = run_concurrently({
+            "activities": lambda: _fetch_activities(user_id),
+            "profile": lambda: supabase.table("user_profiles")\
+                .select("points")\
+                .eq("user_id", user_id)\
+                .single()\
+                .execute(),
+        })
+        activities = fanout.value("activities")
+        profile_response = fanout.value("profile")
+
         points = profile_response.data.get("points", 0) if profile_response.data else 0
-        
-        return UserStats(
-            total_hours=float(total_hours),
-            completed_projects=completed_count,
-            upcoming_events=upcoming_count,
-            points=points
-        )
-        
+
+        return _user_stats(activities, points)
+
     except Exception as e:
         print(f"Get stats error: {e}")
         return UserStats(
@@ -412,78 +486,91 @@ def get_profile_completeness(current_user = Depends(get_current_user)):
     """Get profile completion percentage"""
     supabase = get_supabase()
     user_id = extract_user_id(current_user)
-    
+
     try:
         response = supabase.table("user_profiles")\
             .select("*")\
             .eq("user_id", user_id)\
             .single()\
             .execute()
-        
-        if not response.data:
-            return ProfileCompleteness(
-                percentage=0,
-                filled_fields=0,
-                total_fields=12,
-                missing_fields=[],
-                is_complete=False
-            )
-        
-        profile = response.data
-        
-        fields_to_check = [
-            'first_name', 'last_name', 'phone', 'location', 
-            'birth_date', 'about_me', 'skills', 'availability',
-            'emergency_contact_name', 'emergency_contact_phone',
-            'address_city', 'avatar_url'
-        ]
-        
-        filled_fields = sum(1 for field in fields_to_check if profile.get(field))
-        total_fields = len(fields_to_check)
-        percentage = int((filled_fields / total_fields) * 100)
-        missing_fields = [field for field in fields_to_check if not profile.get(field)]
-        
-        return ProfileCompleteness(
-            percentage=percentage,
-            filled_fields=filled_fields,
-            total_fields=total_fields,
-            missing_fields=missing_fields,
-            is_complete=percentage == 100
-        )
-        
+
+        return _profile_completeness(response.data)
+
     except Exception as e:
         print(f"Profile completeness error: {e}")
-        return ProfileCompleteness(
-            percentage=0,
-            filled_fields=0,
-            total_fields=12,
-            missing_fields=[],
-            is_complete=False
-        )
+        return _profile_completeness(None)
 
 
 @router.get("/recommendations", summary="Get recommended activities")
 def get_recommendations(current_user = Depends(get_current_user)):
     """Get recommended activities for the user based on their skills/interests."""
-    supabase = get_supabase()
     # user_id = extract_user_id(current_user) # We might use this for personalization later
-    
+
     try:
-        # For now, return latest active opportunities as recommendations
-        # In a real app, this would use ML or matching logic based on user profile
-        response = supabase.table("opportunities")\
-            .select("*, organizer:organizer_id(organization_name)")\
-            .eq("status", "active")\
-            .eq("visibility", "public")\
-            .order("created_at", desc=True)\
-            .limit(6)\
-            .execute()
-            
-        return response.data or []
-        
+        return _fetch_recommendations()
+
     except Exception as e:
         print(f"Get recommendations error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get recommendations: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/home", response_model=UserHome, summary="Volunteer home page data")
+def get_home(response: Response, current_user = Depends(get_current_user)):
+    """
+    Profile, stats, profile completeness, recommendations and recent applications
+    in one call. Authenticates once and runs the independent queries concurrently.
+
+    A section that fails is returned as null and named in `errors`; the rest still load.
+    Complete payloads are cached per user for HOME_CACHE_TTL seconds.
+    """
+    user_id = extract_user_id(current_user)
+    response.headers["Cache-Control"] = f"private, max-age={int(settings.HOME_CACHE_TTL)}"
+
+    cached = home_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    tasks = {
+        # get_profile also creates a missing profile, as the profile page does
+        "profile": lambda: get_profile(current_user),
+        "activities": lambda: _fetch_activities(user_id),
+        "recommendations": _fetch_recommendations,
+        "applications": lambda: _fetch_recent_applications(user_id, HOME_RECENT_APPLICATIONS),
+    }
+    fanout = run_concurrently(tasks)
+
+    results = fanout.results
+    errors = {}
+    for name, error in fanout.errors.items():
+        if isinstance(error.error, HTTPException):
+            errors[name] = str(error.error.detail)
+        else:
+            print(f"Home section {name} error: {error.error}")
+            errors[name] = f"Failed to load {name}"
+
+    profile = results.get("profile")
+    home = UserHome(
+        profile=profile,
+        profile_completeness=_profile_completeness(profile) if profile else None,
+        recommendations=results.get("recommendations"),
+        applications=results.get("applications"),
+    )
+    if "activities" in results:
+        home.stats = _user_stats(results["activities"], (profile or {}).get("points"))
+
+    # Report by the sections of the payload
+    if "profile" in errors:
+        home.errors["profile"] = home.errors["profile_completeness"] = errors["profile"]
+    if "activities" in errors:
+        home.errors["stats"] = errors["activities"]
+    for name in ("recommendations", "applications"):
+        if name in errors:
+            home.errors[name] = errors[name]
+
+    # Partial results are not cached, so the next load retries the failed sections
+    if not home.errors:
+        home_cache.set(user_id, home)
+    return home
@@ -0,0 +1,259 @@
+"""
+Buffered admin audit log
+
+Admin mutations record an audit entry with audit_log.log(), which only
+appends to an in-memory queue. A worker thread writes the queue to
+admin_activity_log in multi-row inserts of up to AUDIT_BATCH_SIZE entries,
+every AUDIT_FLUSH_INTERVAL seconds or as soon as a full batch is waiting,
+so the request never waits on the insert.
+
+A failed insert stays queued and is retried with exponential backoff (up
+to AUDIT_MAX_RETRY_DELAY seconds). Rows the database rejects outright
+(bad data rather than an outage) are written one by one so a single bad
+entry cannot block the rest. The queue holds at most AUDIT_MAX_QUEUE
+entries; beyond that the oldest are dropped and counted. Whatever is
+queued at shutdown is flushed.
+
+The table is partitioned by month (migration 023). A second worker calls
+maintain_admin_activity_log every AUDIT_MAINTENANCE_INTERVAL seconds to
+create upcoming partitions and move partitions older than
+AUDIT_RETENTION_MONTHS into the audit_archive schema.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, List, Optional
+
+from postgrest.exceptions import APIError
+
+from app.config import settings
+from app.database import get_supabase
+
+
+def _is_data_error(error: Exception) -> bool:
+    """Postgres data (22xxx) or constraint (23xxx) errors; retrying won't help"""
+    code = getattr(error, "code", None) if isinstance(error, APIError) else None
+    return bool(code) and str(code)[:2] in ("22", "23")
+
+
+class AuditLogWriter:
+    """Queues audit entries and writes them in batches from a worker thread"""
+
+    def __init__(self, table: str, batch_size: int, flush_interval: float, max_queue: int, max_retry_delay: float):
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue: Deque[dict] = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retry_delay = 0.0
+        # Metrics
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed_flushes = 0
+        self._last_error: Optional[str] = None
+        self._last_flush_at: Optional[float] = None
+
+    def log(self, admin_id: str, action: str, target_type: str, target_id: Any, details: Optional[str] = None):
+        """Queue one entry; returns immediately"""
+        entry = {
+            "admin_id": admin_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": str(target_id),
+            "details": details,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self._queue.append(entry)
+            self._enqueued += 1
+            self._trim_locked()
+            full = len(self._queue) >= self.batch_size
+        # While backing off, wait out the delay even if batches are full
+        if full and not self._retry_delay:
+            self._wake.set()
+
+    def _trim_locked(self):
+        while len(self._queue) > self.max_queue:
+            self._queue.popleft()
+            self._dropped += 1
+
+    def _insert(self, rows: List[dict]):
+        get_supabase().table(self.table).insert(rows).execute()
+
+    def _write_individually(self, batch: List[dict]) -> int:
+        """Write a batch the database rejected row by row; returns rows written"""
+        written = 0
+        for row in batch:
+            try:
+                self._insert([row])
+                written += 1
+            except Exception as e:
+                print(f"WARNING: Dropping audit entry {row.get('action')} on {row.get('target_id')}: {e}")
+                with self._lock:
+                    self._dropped += 1
+        return written
+
+    def flush(self) -> bool:
+        """
+        Write everything queued. Returns False if a batch failed; it is put back
+        at the front of the queue for the next attempt.
+        """
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    return True
+                try:
+                    self._insert(batch)
+                    written = len(batch)
+                except Exception as e:
+                    if not _is_data_error(e):
+                        with self._lock:
+                            self._queue.extendleft(reversed(batch))
+                            self._trim_locked()
+                            self._failed_flushes += 1
+                            self._last_error = str(e)
+                        print(f"WARNING: Audit log flush failed, will retry: {e}")
+                        return False
+                    written = self._write_individually(batch)
+                with self._lock:
+                    self._written += written
+                    self._last_flush_at = time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            oldest = self._queue[0]["created_at"] if self._queue else None
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "oldest_queued_at": oldest,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed_flushes": self._failed_flushes,
+                "retry_delay_seconds": self._retry_delay,
+                "last_error": self._last_error,
+                "last_flush_at": datetime.utcfromtimestamp(self._last_flush_at).isoformat() if self._last_flush_at else None,
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker and flush what is left"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if not self.flush():
+            print(f"WARNING: {len(self._queue)} audit entries could not be written at shutdown")
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Back off after a failure; otherwise wake on the interval or a full batch
+            self._wake.wait(self._retry_delay or self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self.flush():
+                self._retry_delay = 0.0
+            else:
+                self._retry_delay = min(self.max_retry_delay, max(1.0, self._retry_delay * 2))
+
+
+class AuditLogRetention:
+    """Periodically runs the partition maintenance RPC"""
+
+    def __init__(self, keep_months: int, interval: float):
+        self.keep_months = keep_months
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_run_at: Optional[float] = None
+        self._last_archived: List[str] = []
+        self._last_error: Optional[str] = None
+
+    def run_once(self) -> List[str]:
+        """Create upcoming partitions and archive expired ones; returns archived partition names"""
+        try:
+            response = get_supabase().rpc("maintain_admin_activity_log", {
+                "p_keep_months": self.keep_months,
+            }).execute()
+        except Exception as e:
+            self._last_error = str(e)
+            print(f"WARNING: Audit log maintenance failed: {e}")
+            return []
+        archived = [row["archived"] for row in (response.data or [])]
+        if archived:
+            print(f"Audit log: archived partitions {', '.join(archived)}")
+        self._last_run_at = time.time()
+        self._last_archived = archived
+        self._last_error = None
+        return archived
+
+    def stats(self) -> dict:
+        return {
+            "keep_months": self.keep_months,
+            "last_run_at": datetime.utcfromtimestamp(self._last_run_at).isoformat() if self._last_run_at else None,
+            "last_archived": self._last_archived,
+            "last_error": self._last_error,
+        }
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # Partitions for the coming months must exist before inserts reach them
+        self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+audit_log = AuditLogWriter(
+    table="admin_activity_log",
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    max_queue=settings.AUDIT_MAX_QUEUE,
+    max_retry_delay=settings.AUDIT_MAX_RETRY_DELAY,
+)
+
+
+audit_retention = AuditLogRetention(
+    keep_months=settings.AUDIT_RETENTION_MONTHS,
+    interval=settings.AUDIT_MAINTENANCE_INTERVAL,
+)
+
+
+def start_audit_log():
+    audit_log.start()
+    audit_retention.start()
+
+
+def stop_audit_log():
+    audit_retention.stop()
+    audit_log.stop()
@@ -0,0 +1,71 @@
+"""
+Small in-process TTL cache
+
+For short-lived, per-user or per-entity payloads that are expensive to
+assemble but fine to serve a few seconds stale (e.g. the volunteer home
+page). Entries live in this worker only; writes that change the underlying
+data call invalidate() so the author sees their own change immediately.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            # Least recently used go first once full
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Assembled GET /api/user/home payloads, keyed by user id
+home_cache = TTLCache(ttl=settings.HOME_CACHE_TTL)
+
+
+# Assembled GET /api/organizer/dashboard payloads, keyed by organizer id (as str)
+organizer_dashboard_cache = TTLCache(ttl=settings.ORGANIZER_DASHBOARD_CACHE_TTL)
+
+
+def invalidate_organizer_dashboard(organizer_id: Any):
+    """Call after changing an opportunity or application owned by this organizer"""
+    if organizer_id is not None:
+        organizer_dashboard_cache.invalidate(str(organizer_id))
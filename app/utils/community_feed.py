@@ -0,0 +1,227 @@
+"""
+Cached community feed
+
+The public feed (approved posts, newest first, overall and per category) is
+served from memory. Each feed keeps its newest COMMUNITY_FEED_WINDOW posts
+in (created_at, id) order, loaded with one single-table query: author names
+are denormalized onto community_posts, so no join is needed.
+
+Writes in this worker update the cached feeds in place (a post is inserted
+at its position when approved, removed when rejected or deleted) instead of
+dropping the cache. Likes are counted write-behind: pages add the deltas
+not yet written, and each flushed batch is applied to the cached posts. Feeds are reloaded after COMMUNITY_FEED_TTL seconds so
+changes made by other workers show up. Pages past the cached window fall
+through to a keyset query.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.database import get_supabase
+from app.models.community import CommunityCategoryEnum, CommunityStatusEnum
+from app.utils.counters import post_likes_counter
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+
+
+FEED_ALL = "all"
+FEED_CATEGORIES = {FEED_ALL} | {c.value for c in CommunityCategoryEnum}
+DEFAULT_AUTHOR = "Verified Volunteer"
+
+
+def _parse_timestamp(value) -> datetime:
+    """Parse a Postgres timestamp (any fraction length, 'Z' or offset) as aware UTC"""
+    text = str(value).replace("Z", "+00:00").replace(" ", "T", 1)
+    # Older Pythons only accept 3 or 6 fractional digits
+    text = re.sub(r"\.(\d+)", lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _sort_key(post: dict) -> Tuple[datetime, str]:
+    return (_parse_timestamp(post["created_at"]), str(post["id"]))
+
+
+def to_feed_item(row: dict) -> dict:
+    """Shape a community_posts row for CommunityPostResponse"""
+    item = dict(row)
+    item["comments"] = item.get("comments_count") or 0
+    item["organizer_name"] = item.get("organizer_name") or DEFAULT_AUTHOR
+    return item
+
+
+@dataclass
+class _Feed:
+    posts: List[dict] = field(default_factory=list)  # newest first
+    keys: List[Tuple[datetime, str]] = field(default_factory=list)
+    complete: bool = False  # posts hold the whole feed, not just its head
+    loaded_at: float = 0.0
+
+
+class CommunityFeedCache:
+    """Per-category feeds of approved posts with incremental updates"""
+
+    def __init__(self, window: int, ttl: float):
+        self.window = window
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, _Feed] = {}
+
+    def _query(self, category: str, limit: int, after: Optional[Tuple] = None) -> List[dict]:
+        query = get_supabase().table("community_posts")\
+            .select("*")\
+            .eq("status", CommunityStatusEnum.APPROVED.value)
+        if category != FEED_ALL:
+            query = query.eq("category", category)
+        if after:
+            query = query.or_(keyset_filter("created_at", "id", after[0], after[1]))
+        rows = query.order("created_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(limit)\
+            .execute()
+        return [to_feed_item(row) for row in rows.data or []]
+
+    def _load(self, category: str) -> _Feed:
+        rows = self._query(category, self.window + 1)
+        posts = rows[:self.window]
+        return _Feed(
+            posts=posts,
+            keys=[_sort_key(p) for p in posts],
+            complete=len(rows) <= self.window,
+            loaded_at=time.time(),
+        )
+
+    def _feed(self, category: str) -> _Feed:
+        with self._lock:
+            feed = self._feeds.get(category)
+        if feed is None or time.time() - feed.loaded_at > self.ttl:
+            feed = self._load(category)
+            with self._lock:
+                self._feeds[category] = feed
+        return feed
+
+    @staticmethod
+    def _position(keys: List[Tuple[datetime, str]], key: Tuple[datetime, str]) -> int:
+        """Index of the first entry strictly older than key (keys are descending)"""
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[mid] < key:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def page(self, category: Optional[str], cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+        """One page of the feed and the cursor for the next page (None at the end)"""
+        category = category or FEED_ALL
+        if category not in FEED_CATEGORIES:
+            return [], None
+        after = decode_cursor(cursor, 2)
+        after_key = None
+        if after:
+            try:
+                after_key = (_parse_timestamp(after[0]), str(after[1]))
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+
+        feed = self._feed(category)
+        with self._lock:
+            start = self._position(feed.keys, after_key) if after_key else 0
+            items = feed.posts[start:start + limit + 1]
+            complete = feed.complete
+
+        if len(items) <= limit and not complete:
+            # Past the cached head: continue from the database
+            if items:
+                last = items[-1]
+                after = (last["created_at"], last["id"])
+            items = items + self._query(category, limit + 1 - len(items), after)
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"]) if has_more else None
+
+        # Likes are counted write-behind; include increments not flushed yet
+        page = []
+        for post in items:
+            post = dict(post)
+            post["likes"] = max(0, (post.get("likes") or 0) + post_likes_counter.pending(str(post["id"])))
+            page.append(post)
+        return page, next_cursor
+
+    def apply_likes(self, deltas: Dict[str, int], started_at: float):
+        """
+        post_likes_counter flush listener: add written deltas to cached posts.
+        Feeds loaded after the flush began may already include them and are
+        left alone (reloaded within COMMUNITY_FEED_TTL anyway).
+        """
+        with self._lock:
+            seen = set()  # a post dict can be shared by the overall and category feeds
+            for feed in self._feeds.values():
+                if feed.loaded_at >= started_at:
+                    continue
+                for post in feed.posts:
+                    delta = deltas.get(str(post["id"]))
+                    if delta and id(post) not in seen:
+                        seen.add(id(post))
+                        # Tracks the stored counter; clamped when served
+                        post["likes"] = (post.get("likes") or 0) + delta
+
+    def _remove_locked(self, post_id: str):
+        for feed in self._feeds.values():
+            for i, post in enumerate(feed.posts):
+                if str(post["id"]) == post_id:
+                    del feed.posts[i]
+                    del feed.keys[i]
+                    break
+
+    def upsert(self, row: dict):
+        """A post was created, edited, approved or un-approved: update feeds in place"""
+        post_id = str(row["id"])
+        with self._lock:
+            self._remove_locked(post_id)
+            if row.get("status") != CommunityStatusEnum.APPROVED.value:
+                return
+            item = to_feed_item(row)
+            key = _sort_key(item)
+            for category in (FEED_ALL, item.get("category")):
+                feed = self._feeds.get(category)
+                if feed is None:
+                    continue
+                position = self._position(feed.keys, key)
+                if position >= len(feed.posts) and not feed.complete:
+                    # Older than the cached head; the database query will find it
+                    continue
+                feed.posts.insert(position, item)
+                feed.keys.insert(position, key)
+                if len(feed.posts) > self.window:
+                    feed.posts.pop()
+                    feed.keys.pop()
+                    feed.complete = False
+
+    def remove(self, post_id: str):
+        """A post was rejected or deleted"""
+        with self._lock:
+            self._remove_locked(str(post_id))
+
+    def clear(self):
+        with self._lock:
+            self._feeds.clear()
+
+
+community_feed = CommunityFeedCache(
+    window=settings.COMMUNITY_FEED_WINDOW,
+    ttl=settings.COMMUNITY_FEED_TTL,
+)
+post_likes_counter.add_flush_listener(community_feed.apply_likes)
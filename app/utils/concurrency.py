@@ -0,0 +1,151 @@
+"""
+Concurrent fan-out for independent queries
+
+Handlers that need several unrelated reads (counts, a profile and a lookup,
+...) can hand them to run_concurrently() as named thunks instead of running
+them one after another, so the handler takes as long as its slowest query
+rather than the sum of all of them.
+
+Thunks run on a pool shared by every request in this worker
+(FANOUT_MAX_WORKERS threads). Each call is capped at FANOUT_MAX_CONCURRENCY
+thunks in flight, so one handler cannot take over the pool, and at
+FANOUT_TIMEOUT seconds overall. A thunk that raises or misses the deadline
+is reported in FanOut.errors; the others still return.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.FANOUT_MAX_WORKERS,
+    thread_name_prefix="fanout",
+)
+_local = threading.local()
+
+
+class FanOutTimeout(Exception):
+    """The query did not finish before the fan-out deadline"""
+
+
+@dataclass
+class QueryError:
+    name: str
+    error: Exception
+    elapsed: float  # seconds
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, FanOutTimeout)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.error}"
+
+
+@dataclass
+class FanOut:
+    """Results of run_concurrently(), by thunk name"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, QueryError] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Result of a thunk, or default if it failed"""
+        return self.results.get(name, default)
+
+    def value(self, name: str) -> Any:
+        """Result of a thunk; re-raises its exception if it failed"""
+        if name in self.errors:
+            raise self.errors[name].error
+        return self.results[name]
+
+    def raise_first(self):
+        """Re-raise the first failure, for handlers that are all-or-nothing"""
+        for error in self.errors.values():
+            raise error.error
+
+
+def _run(thunk: Callable[[], Any]) -> Any:
+    _local.in_fanout = True
+    try:
+        return thunk()
+    finally:
+        _local.in_fanout = False
+
+
+def _run_inline(tasks: Dict[str, Callable[[], Any]], outcome: FanOut) -> FanOut:
+    for name, thunk in tasks.items():
+        started = time.monotonic()
+        try:
+            outcome.results[name] = thunk()
+        except Exception as e:
+            outcome.errors[name] = QueryError(name, e, time.monotonic() - started)
+    return outcome
+
+
+def run_concurrently(
+    tasks: Dict[str, Callable[[], Any]],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> FanOut:
+    """
+    Run independent thunks in parallel and collect their results by name.
+
+    Never raises for a failing thunk; check FanOut.errors, or use value() /
+    raise_first() to propagate. Thunks still running at the deadline are
+    reported as FanOutTimeout and left to finish in the background, so they
+    must not write anything the handler relies on.
+    """
+    outcome = FanOut()
+    if not tasks:
+        return outcome
+
+    # Nested fan-out would wait on the pool it is running on; run those in order
+    if getattr(_local, "in_fanout", False) or len(tasks) == 1:
+        return _run_inline(tasks, outcome)
+
+    cap = max(1, max_concurrency or settings.FANOUT_MAX_CONCURRENCY)
+    deadline = time.monotonic() + (settings.FANOUT_TIMEOUT if timeout is None else timeout)
+    queued = list(tasks.items())
+    running = {}  # future -> (name, started)
+
+    while queued or running:
+        while queued and len(running) < cap:
+            name, thunk = queued.pop(0)
+            running[_executor.submit(_run, thunk)] = (name, time.monotonic())
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+
+        for future in done:
+            name, started = running.pop(future)
+            try:
+                outcome.results[name] = future.result()
+            except Exception as e:
+                outcome.errors[name] = QueryError(name, e, time.monotonic() - started)
+
+    now = time.monotonic()
+    for future, (name, started) in running.items():
+        future.cancel()
+        outcome.errors[name] = QueryError(name, FanOutTimeout(f"{name} timed out"), now - started)
+    for name, _ in queued:
+        outcome.errors[name] = QueryError(name, FanOutTimeout(f"{name} not started before the deadline"), 0.0)
+    # Report in the order the tasks were given, not the order they finished
+    outcome.results = {name: outcome.results[name] for name in tasks if name in outcome.results}
+    return outcome
+
+
+def shutdown_fanout():
+    """Stop the shared pool (app shutdown)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
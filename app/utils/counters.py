@@ -0,0 +1,121 @@
+"""
+Write-behind counters
+
+Hot counters (e.g. community_posts.likes) are not updated once per event.
+Increments are coalesced in memory per key and applied periodically with a
+single batch RPC taking parallel arrays of keys and deltas, so a viral post
+costs one UPDATE per flush instead of one per like.
+
+Counts read from the database lag by up to the flush interval; pending()
+gives the delta for a key not yet written (including a flush in progress).
+Caches holding counts read earlier register a flush listener, which gets
+each batch of deltas once it has been written.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+from app.database import get_supabase
+
+
+class WriteBehindCounter:
+    """Coalesces counter increments and flushes them from a worker thread"""
+
+    def __init__(self, rpc: str, keys_param: str, deltas_param: str, flush_interval: float):
+        self.rpc = rpc
+        self.keys_param = keys_param
+        self.deltas_param = deltas_param
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._deltas: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}  # taken by the running flush
+        self._listeners: List[Callable[[Dict[str, int], float], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, key: str, delta: int = 1):
+        with self._lock:
+            total = self._deltas.get(key, 0) + delta
+            if total:
+                self._deltas[key] = total
+            else:
+                self._deltas.pop(key, None)
+
+    def pending(self, key: str) -> int:
+        with self._lock:
+            return self._deltas.get(key, 0) + self._in_flight.get(key, 0)
+
+    def add_flush_listener(self, listener: Callable[[Dict[str, int], float], None]):
+        """
+        Call listener(deltas, started_at) after each successful flush, where
+        started_at is the time.time() the flush began: counts read before it
+        lack these deltas, counts read after it finished include them.
+        """
+        self._listeners.append(listener)
+
+    def flush(self):
+        """Apply all pending deltas in one RPC; put them back if it fails"""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._deltas = self._deltas, {}
+                self._in_flight = deltas
+            if not deltas:
+                return
+            started_at = time.time()
+            keys = list(deltas)
+            try:
+                get_supabase().rpc(self.rpc, {
+                    self.keys_param: keys,
+                    self.deltas_param: [deltas[k] for k in keys],
+                }).execute()
+            except Exception as e:
+                print(f"WARNING: Counter flush ({self.rpc}) failed, will retry: {e}")
+                with self._lock:
+                    self._in_flight = {}
+                for key, delta in deltas.items():
+                    self.add(key, delta)
+                return
+            for listener in self._listeners:
+                try:
+                    listener(deltas, started_at)
+                except Exception as e:
+                    print(f"WARNING: Counter flush listener ({self.rpc}) failed: {e}")
+            with self._lock:
+                self._in_flight = {}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"counter-{self.rpc}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker and flush what is left"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+post_likes_counter = WriteBehindCounter(
+    rpc="increment_post_likes",
+    keys_param="p_post_ids",
+    deltas_param="p_deltas",
+    flush_interval=settings.COUNTER_FLUSH_INTERVAL,
+)
+
+
+def start_counters():
+    post_likes_counter.start()
+
+
+def stop_counters():
+    post_likes_counter.stop()
@@ -0,0 +1,89 @@
+"""
+Admin dashboard metrics snapshot
+
+The aggregates are computed in the database by the admin_dashboard_metrics()
+RPC (one round trip, no row downloads) and kept in memory. A worker thread
+recomputes them every ADMIN_METRICS_REFRESH_INTERVAL seconds, so
+GET /admin/metrics serves the last snapshot without touching the database
+and reports how old it is.
+
+If a refresh fails the previous snapshot is kept and its age keeps growing.
+"""
+import threading
+import time
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.database import get_supabase
+
+
+class MetricsSnapshot:
+    """Last result of an aggregation RPC, refreshed from a worker thread"""
+
+    def __init__(self, rpc: str, refresh_interval: float):
+        self.rpc = rpc
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._data: Optional[dict] = None
+        self._taken_at = 0.0  # time.time() of the last successful refresh
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """Recompute now; False (and the old snapshot kept) if the RPC fails"""
+        # One refresh at a time; a caller arriving mid-refresh gets its result
+        with self._refresh_lock:
+            try:
+                response = get_supabase().rpc(self.rpc, {}).execute()
+            except Exception as e:
+                print(f"WARNING: Metrics refresh ({self.rpc}) failed: {e}")
+                return False
+            with self._lock:
+                self._data = response.data or {}
+                self._taken_at = time.time()
+            return True
+
+    def get(self) -> Tuple[Optional[dict], Optional[float]]:
+        """(snapshot, age in seconds); computed on first use if the worker has not run yet"""
+        with self._lock:
+            data, taken_at = self._data, self._taken_at
+        if data is None:
+            self.refresh()
+            with self._lock:
+                data, taken_at = self._data, self._taken_at
+        if data is None:
+            return None, None
+        return data, max(0.0, time.time() - taken_at)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"metrics-{self.rpc}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        self.refresh()
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+
+dashboard_metrics = MetricsSnapshot(
+    rpc="admin_dashboard_metrics",
+    refresh_interval=settings.ADMIN_METRICS_REFRESH_INTERVAL,
+)
+
+
+def start_dashboard_metrics():
+    dashboard_metrics.start()
+
+
+def stop_dashboard_metrics():
+    dashboard_metrics.stop()
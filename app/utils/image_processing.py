@@ -0,0 +1,176 @@
+"""
+Upload-time image processing
+Turns one uploaded image into fixed-size WebP/AVIF renditions plus a
+metadata-free original, and computes dimensions and a blur placeholder.
+
+Decoding and encoding are CPU bound, so the work runs in a process pool;
+request threads only wait on the result.
+"""
+import base64
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from PIL import Image, ImageFilter, ImageOps, features
+
+from app.config import settings
+
+
+# Rendition name -> longest edge in pixels. Images are never upscaled.
+RENDITIONS = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600,
+}
+
+RENDITION_FORMATS = ["webp", "avif"] if settings.IMAGE_AVIF_ENABLED and features.check("avif") else ["webp"]
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+}
+
+# Refuse absurd pixel counts before decoding (decompression bombs)
+MAX_IMAGE_PIXELS = 40_000_000
+PLACEHOLDER_SIZE = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class ImageProcessingError(ValueError):
+    """Raised when an upload cannot be decoded as a supported image"""
+
+
+def _encode(image: Image.Image, fmt: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **params)
+    return buffer.getvalue()
+
+
+def _resize(image: Image.Image, max_edge: int) -> Image.Image:
+    resized = image.copy()
+    resized.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    return resized
+
+
+def process_image(content: bytes) -> dict:
+    """
+    Build renditions for a single image. Runs inside a worker process.
+
+    Args:
+        content: Raw bytes of the uploaded file
+
+    Returns:
+        Dict with width, height, placeholder (data URI), the re-encoded
+        original and a list of rendition files (name, format, bytes, size)
+
+    Raises:
+        ImageProcessingError: If the bytes are not a usable image
+    """
+    try:
+        source = Image.open(io.BytesIO(content))
+        if source.width * source.height > MAX_IMAGE_PIXELS:
+            raise ImageProcessingError("Image dimensions too large")
+        source_format = (source.format or "").lower()
+        source.load()
+    except ImageProcessingError:
+        raise
+    except Exception as e:
+        raise ImageProcessingError(f"Invalid image: {e}")
+
+    # Bake the EXIF orientation into the pixels, then drop all metadata by
+    # re-encoding without passing exif/icc/xmp through.
+    image = ImageOps.exif_transpose(source)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    if source_format == "gif":
+        # GIFs carry no EXIF; keep the bytes so animations survive
+        original_bytes = content
+        original_format = "gif"
+    elif source_format == "png":
+        original_bytes = _encode(image, "png", optimize=True)
+        original_format = "png"
+    else:
+        original_bytes = _encode(image.convert("RGB"), "jpeg", quality=92, optimize=True)
+        original_format = "jpeg"
+
+    files = []
+    for name, max_edge in RENDITIONS.items():
+        resized = _resize(image, max_edge)
+        for fmt in RENDITION_FORMATS:
+            if fmt == "avif":
+                data = _encode(resized, "avif", quality=55)
+            else:
+                data = _encode(resized, "webp", quality=80, method=4)
+            files.append({
+                "name": name,
+                "format": fmt,
+                "content_type": CONTENT_TYPES[fmt],
+                "width": resized.width,
+                "height": resized.height,
+                "size": len(data),
+                "bytes": data,
+            })
+
+    tiny = _resize(image, PLACEHOLDER_SIZE).filter(ImageFilter.GaussianBlur(1))
+    placeholder = "data:image/webp;base64," + base64.b64encode(
+        _encode(tiny, "webp", quality=40)
+    ).decode("ascii")
+
+    return {
+        "width": image.width,
+        "height": image.height,
+        "placeholder": placeholder,
+        "original": {
+            "format": original_format,
+            "content_type": CONTENT_TYPES[original_format],
+            "width": image.width,
+            "height": image.height,
+            "size": len(original_bytes),
+            "bytes": original_bytes,
+        },
+        "files": files,
+    }
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """
+    Lazily create the shared image processing pool.
+
+    Workers are spawned, not forked: by the time the first upload arrives the
+    server runs many threads (request pool, background workers), and a forked
+    child can inherit a lock one of them held and deadlock.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def process_image_in_pool(content: bytes) -> dict:
+    """
+    Run process_image in the process pool and wait for the result.
+    Call from sync route handlers (they already run off the event loop).
+    """
+    future = get_image_pool().submit(process_image, content)
+    return future.result(timeout=settings.IMAGE_PROCESS_TIMEOUT)
+
+
+def shutdown_image_pool():
+    """Stop worker processes (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
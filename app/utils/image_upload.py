@@ -1,15 +1,33 @@
 """
 Image upload utilities for Supabase Storage
 Handles uploading images to the opportunity-images bucket
+
+Uploaded images are content-addressed (stored under ab/<sha256>/, shared by
+identical uploads and reference counted in storage_objects) and described by
+structured assets:
+    {
+        "bucket", "sha256", "path", "width", "height", "placeholder",
+        "original": {"url", "path", "content_type", "width", "height", "size"},
+        "renditions": {"thumb"|"card"|"full": {"webp"|"avif": {"url", "path", "width", "height", "size"}}}
+    }
 """
 import os
 import uuid
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple
 from datetime import datetime
 from fastapi import UploadFile, HTTPException, status
 
 from app.database import get_supabase
 from app.config import settings
+from app.utils.image_processing import ImageProcessingError, get_image_pool, process_image
+from app.utils.storage_refs import (
+    acquire_objects,
+    content_hash,
+    content_path,
+    register_objects,
+)
+from app.utils.storage_gc import enqueue_release, enqueue_removal
 
 
 # Allowed image file extensions
@@ -44,26 +62,13 @@ def generate_unique_filename(original_filename: str) -> str:
     return f"{timestamp}_{unique_id}_{clean_name}{ext}"
 
 
-def upload_opportunity_image(
-    file: UploadFile,
-    organizer_id: int
-) -> str:
+def read_image_file(file: UploadFile) -> bytes:
     """
-    Upload a single image to Supabase Storage.
+    Validate an uploaded image and return its bytes.
     
-    Args:
-        file: The uploaded file
-        organizer_id: ID of the organizer (for organizing files)
-        
-    Returns:
-        Public URL of the uploaded image
-        
     Raises:
-        HTTPException: If upload fails
+        HTTPException: If the file is missing, not an allowed type, empty or too large
     """
-    supabase = get_supabase()
-    
-    # Validate file
     if not file.filename:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -76,84 +81,255 @@ def upload_opportunity_image(
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read file content
     try:
         file_content = file.file.read()
-        file_size = len(file_content)
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB"
-            )
-        
-        if file_size == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Empty file"
-            )
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error reading file: {str(e)}"
         )
     
-    # Generate unique filename
-    unique_filename = generate_unique_filename(file.filename)
-    
-    # Create path: organizer_id/filename
-    file_path = f"organizer_{organizer_id}/{unique_filename}"
+    if len(file_content) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB"
+        )
     
-    try:
-        # Upload to Supabase Storage
-        result = supabase.storage.from_(BUCKET_NAME).upload(
-            path=file_path,
-            file=file_content,
-            file_options={
-                "content-type": file.content_type or "image/jpeg",
-                "cache-control": "3600",
-                "upsert": "false"  # Don't overwrite existing files
-            }
+    if len(file_content) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty file"
         )
+    
+    return file_content
+
+
+def _upload_object(bucket: str, path: str, content: bytes, content_type: str) -> str:
+    """Upload one content-addressed object and return its public URL"""
+    supabase = get_supabase()
+    supabase.storage.from_(bucket).upload(
+        path=path,
+        file=content,
+        file_options={
+            "content-type": content_type,
+            # Paths are derived from the content hash, so the bytes never change
+            "cache-control": "31536000",
+            # A concurrent upload of the same bytes writes identical content
+            "upsert": "true"
+        }
+    )
+    return supabase.storage.from_(bucket).get_public_url(path)
+
+
+def upload_image_assets(
+    uploads: List[Tuple[str, bytes]],
+    bucket: str,
+    max_concurrency: Optional[int] = None
+) -> Tuple[List[Optional[dict]], List[str]]:
+    """
+    Process and store images as structured, content-addressed assets.
+    
+    Each image is keyed by the SHA-256 of its bytes. Hashes already in
+    storage_objects only gain a reference and reuse the stored asset; new
+    ones are decoded once in the process pool and their original and
+    renditions uploaded through one bounded thread pool shared by all
+    images of the request. An image whose files don't all upload is removed
+    again so no partial asset is left behind.
+    
+    Every returned asset holds one reference; release it with
+    delete_image_assets.
+    
+    Args:
+        uploads: (filename, bytes) pairs
+        bucket: Storage bucket name
+        max_concurrency: Maximum parallel storage uploads
         
-        # Get public URL
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(file_path)
+    Returns:
+        (assets, errors) where assets[i] is the asset for uploads[i] or None
+        if that image failed, and errors lists "filename: reason" messages
         
-        return public_url
+    Raises:
+        HTTPException: If the storage_objects bookkeeping is unavailable
+    """
+    errors: List[str] = []
+    assets: List[Optional[dict]] = [None] * len(uploads)
+    hashes = [content_hash(content) for _, content in uploads]
+    
+    # 0. Reuse anything already stored (one round trip for the whole request)
+    try:
+        existing = acquire_objects(bucket, hashes)
+    except Exception as e:
+        print(f"Storage lookup error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to look up stored images: {str(e)}"
+        )
+    for index, sha256 in enumerate(hashes):
+        if sha256 in existing:
+            assets[index] = existing[sha256]["asset"]
+    
+    # Each new hash is processed and uploaded once, even if repeated in this request
+    new_hashes: dict = {}  # sha256 -> [indexes]
+    for index, sha256 in enumerate(hashes):
+        if sha256 not in existing:
+            new_hashes.setdefault(sha256, []).append(index)
+    if not new_hashes:
+        return assets, errors
+    
+    # 1. Decode/encode new images in parallel worker processes
+    pool = get_image_pool()
+    processing = {
+        sha256: pool.submit(process_image, uploads[indexes[0]][1])
+        for sha256, indexes in new_hashes.items()
+    }
+    processed: dict = {}
+    for sha256, future in processing.items():
+        filename = uploads[new_hashes[sha256][0]][0]
+        try:
+            processed[sha256] = future.result(timeout=settings.IMAGE_PROCESS_TIMEOUT)
+        except ImageProcessingError as e:
+            errors.append(f"{filename}: {e}")
+        except Exception as e:
+            errors.append(f"{filename}: Image processing failed: {e}")
+    
+    # 2. Flatten every file of every new image into one upload batch
+    jobs = []  # (sha256, key, path, bytes, content type)
+    for sha256, result in processed.items():
+        base = content_path(sha256)
+        original = result["original"]
+        jobs.append((sha256, ("original", None), f"{base}/original.{original['format']}", original["bytes"], original["content_type"]))
+        for rendition in result["files"]:
+            key = (rendition["name"], rendition["format"])
+            jobs.append((sha256, key, f"{base}/{rendition['name']}.{rendition['format']}", rendition["bytes"], rendition["content_type"]))
+    
+    if not jobs:
+        return assets, errors
+    
+    workers = max(1, min(max_concurrency or settings.MAX_CONCURRENT_UPLOADS, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_upload_object, bucket, path, content, content_type)
+            for _, _, path, content, content_type in jobs
+        ]
+    
+    # 3. Assemble assets, dropping any image with a failed file
+    uploaded: dict = {}
+    failed: dict = {}
+    for (sha256, key, path, _, _), future in zip(jobs, futures):
+        try:
+            uploaded.setdefault(sha256, {})[key] = (path, future.result())
+        except Exception as e:
+            failed.setdefault(sha256, str(e))
+    
+    new_assets: dict = {}
+    for sha256, result in processed.items():
+        files = uploaded.get(sha256, {})
+        if sha256 in failed:
+            filename = uploads[new_hashes[sha256][0]][0]
+            print(f"Upload error: {failed[sha256]}")
+            errors.append(f"{filename}: Failed to upload image: {failed[sha256]}")
+            enqueue_removal(bucket, [path for path, _ in files.values()])
+            continue
         
+        original_path, original_url = files[("original", None)]
+        original = {k: v for k, v in result["original"].items() if k != "bytes"}
+        renditions: dict = {}
+        for rendition in result["files"]:
+            path, url = files[(rendition["name"], rendition["format"])]
+            renditions.setdefault(rendition["name"], {})[rendition["format"]] = {
+                "url": url,
+                "path": path,
+                "width": rendition["width"],
+                "height": rendition["height"],
+                "size": rendition["size"],
+            }
+        new_assets[sha256] = {
+            "bucket": bucket,
+            "sha256": sha256,
+            "path": content_path(sha256),
+            "width": result["width"],
+            "height": result["height"],
+            "placeholder": result["placeholder"],
+            "original": {**original, "url": original_url, "path": original_path},
+            "renditions": renditions,
+        }
+    
+    # 4. Register the new objects with one reference per occurrence
+    try:
+        register_objects(bucket, [
+            {
+                "sha256": sha256,
+                "path": asset["path"],
+                "content_type": asset["original"]["content_type"],
+                "size": asset["original"]["size"],
+                "asset": asset,
+                "refs": len(new_hashes[sha256]),
+            }
+            for sha256, asset in new_assets.items()
+        ])
     except Exception as e:
-        error_message = str(e)
-        print(f"Upload error: {error_message}")
+        print(f"Storage register error: {e}")
+        for sha256, asset in new_assets.items():
+            errors.append(f"{uploads[new_hashes[sha256][0]][0]}: Failed to record image: {e}")
+            enqueue_removal(bucket, asset_storage_paths(asset))
+        new_assets = {}
+    
+    for sha256, asset in new_assets.items():
+        for index in new_hashes[sha256]:
+            assets[index] = asset
+    
+    return assets, errors
+
+
+def upload_opportunity_image(
+    file: UploadFile,
+    organizer_id: int
+) -> dict:
+    """
+    Upload a single image to Supabase Storage.
+    
+    Args:
+        file: The uploaded file
+        organizer_id: ID of the organizer uploading the image
         
-        # Handle specific errors
-        if "already exists" in error_message.lower():
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="File already exists. Please try again."
-            )
+    Returns:
+        Image asset (original + renditions, see upload_image_assets)
         
+    Raises:
+        HTTPException: If upload fails
+    """
+    content = read_image_file(file)
+    assets, errors = upload_image_assets([(file.filename, content)], BUCKET_NAME)
+    if assets[0] is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to upload image: {error_message}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=errors[0] if errors else "Failed to upload image"
         )
+    return assets[0]
 
 
 def upload_multiple_opportunity_images(
     files: List[UploadFile],
     organizer_id: int,
-    max_files: int = 5
-) -> List[str]:
+    max_files: int = 5,
+    max_concurrency: Optional[int] = None
+) -> List[dict]:
     """
     Upload multiple images to Supabase Storage.
     
+    Images are processed in the process pool and their files uploaded
+    concurrently, so the total latency is roughly that of the slowest
+    image instead of the sum of all of them.
+    
     Args:
         files: List of uploaded files
         organizer_id: ID of the organizer
         max_files: Maximum number of files allowed (default 5)
+        max_concurrency: Maximum parallel uploads for this request
+            (defaults to settings.MAX_CONCURRENT_UPLOADS)
         
     Returns:
-        List of public URLs
+        List of image assets, in the same order as the successfully uploaded files
         
     Raises:
         HTTPException: If upload fails
@@ -170,20 +346,24 @@ def upload_multiple_opportunity_images(
             detail=f"Too many files. Maximum: {max_files}"
         )
     
-    urls = []
     errors: List[str] = []
+    uploads: List[Tuple[str, bytes]] = []
     for file in files:
         try:
-            url = upload_opportunity_image(file, organizer_id)
-            urls.append(url)
+            uploads.append((file.filename, read_image_file(file)))
         except HTTPException as e:
             # If one file fails, continue with others but track the error
             err = f"{file.filename or 'unknown'}: {e.detail}"
             print(f"Failed to upload {err}")
             errors.append(err)
-            continue
     
-    if not urls:
+    assets: List[dict] = []
+    if uploads:
+        results, upload_errors = upload_image_assets(uploads, BUCKET_NAME, max_concurrency)
+        assets = [asset for asset in results if asset is not None]
+        errors.extend(upload_errors)
+    
+    if not assets:
         # This usually means: wrong bucket name, bucket missing, bucket not public,
         # RLS/policies blocking storage, or invalid file types.
         raise HTTPException(
@@ -196,56 +376,100 @@ def upload_multiple_opportunity_images(
             }
         )
     
-    return urls
+    return assets
+
+
+def _image_url_path(image_url: str) -> Optional[str]:
+    """
+    Extract the storage path from a public image URL.
+    URL format: https://xxx.supabase.co/storage/v1/object/public/opportunity-images/organizer_X/filename.jpg
+    """
+    if image_url and f"/{BUCKET_NAME}/" in image_url:
+        return image_url.split(f"/{BUCKET_NAME}/")[1]
+    return None
 
 
 def delete_opportunity_image(image_url: str) -> bool:
     """
-    Delete an image from Supabase Storage.
+    Schedule an image for deletion from Supabase Storage.
     
     Args:
         image_url: Full public URL of the image
         
     Returns:
-        True if deleted successfully
+        True if the URL was valid and the delete was queued
     """
-    supabase = get_supabase()
-    
-    try:
-        # Extract file path from URL
-        # URL format: https://xxx.supabase.co/storage/v1/object/public/opportunity-images/organizer_X/filename.jpg
-        if f"/{BUCKET_NAME}/" in image_url:
-            file_path = image_url.split(f"/{BUCKET_NAME}/")[1]
-        else:
-            raise ValueError("Invalid image URL")
-        
-        # Delete from storage
-        supabase.storage.from_(BUCKET_NAME).remove([file_path])
-        
-        return True
-        
-    except Exception as e:
-        print(f"Error deleting image: {e}")
-        # Don't raise exception - image deletion is not critical
-        return False
+    return delete_multiple_images([image_url]) == 1
 
 
 def delete_multiple_images(image_urls: List[str]) -> int:
     """
-    Delete multiple images.
+    Schedule multiple images for deletion.
+    
+    The paths are queued and removed in batches by the storage deletion
+    worker, so this never waits on storage.
     
     Args:
         image_urls: List of image URLs
         
     Returns:
-        Number of successfully deleted images
+        Number of images queued for deletion
     """
-    deleted_count = 0
+    paths = []
     for url in image_urls:
-        if delete_opportunity_image(url):
-            deleted_count += 1
+        path = _image_url_path(url)
+        if path:
+            paths.append(path)
+        else:
+            print(f"Error deleting image: Invalid image URL {url}")
+    enqueue_removal(BUCKET_NAME, paths)
+    return len(paths)
+
+
+def asset_storage_paths(asset: dict) -> List[str]:
+    """List every storage path (original + renditions) belonging to an asset"""
+    bucket = asset.get("bucket") or BUCKET_NAME
+    paths = []
+    original = asset.get("original") or {}
+    if original.get("path"):
+        paths.append(original["path"])
+    elif original.get("url") and f"/{bucket}/" in original["url"]:
+        # Legacy entry built from the comma-separated images column
+        paths.append(original["url"].split(f"/{bucket}/")[1])
+    for formats in (asset.get("renditions") or {}).values():
+        for rendition in formats.values():
+            if rendition.get("path"):
+                paths.append(rendition["path"])
+    return paths
+
+
+def delete_image_assets(assets: List[dict]) -> int:
+    """
+    Release image assets; files nobody references any more are deleted.
+    
+    Content-addressed assets drop one reference each and their files are
+    removed only when the count reaches zero. Legacy assets without a hash
+    are removed directly. Both happen in the storage deletion worker (one
+    release RPC and batched removes per bucket), off the request path.
     
-    return deleted_count
+    Args:
+        assets: Image assets (see module docstring)
+        
+    Returns:
+        Number of assets queued for release or removal
+    """
+    queued = 0
+    for asset in assets:
+        bucket = asset.get("bucket") or BUCKET_NAME
+        if asset.get("sha256"):
+            enqueue_release(bucket, [asset["sha256"]])
+            queued += 1
+            continue
+        paths = asset_storage_paths(asset)
+        if paths:
+            enqueue_removal(bucket, paths)
+            queued += 1
+    return queued
 
 
 def get_image_urls_from_string(images_string: Optional[str]) -> List[str]:
@@ -280,6 +504,40 @@ def image_urls_to_string(urls: List[str]) -> str:
     Returns:
         Comma-separated string
     """
+    return ",".join(url.strip() for url in urls if url and url.strip())
+
+
+def get_image_assets(row: dict) -> List[dict]:
+    """
+    Return the structured image list of an opportunity row.
+    Rows written before image_assets existed fall back to the
+    comma-separated images column (original URL only, no renditions).
+    """
+    assets = row.get("image_assets")
+    if assets:
+        return assets
+    return [
+        {"original": {"url": url}, "renditions": {}}
+        for url in get_image_urls_from_string(row.get("images"))
+    ]
+
+
+def get_asset_url(asset: dict, variant: str = "card", fmt: str = "webp") -> Optional[str]:
+    """Pick a rendition URL, falling back to the original"""
+    rendition = (asset.get("renditions") or {}).get(variant) or {}
+    chosen = rendition.get(fmt) or next(iter(rendition.values()), None)
+    if chosen:
+        return chosen.get("url")
+    return (asset.get("original") or {}).get("url")
+
+
+def asset_urls_to_string(assets: List[dict], variant: str = "full") -> str:
+    """
+    Build the legacy comma-separated images value from assets.
+    Kept so clients reading `images` keep working.
+    """
+    return image_urls_to_string([get_asset_url(asset, variant) or "" for asset in assets])
+
 
 def upload_user_cv(
     file: UploadFile,
@@ -0,0 +1,258 @@
+"""
+Automatic content screening
+
+Active rows of moderation_terms are compiled into an Aho-Corasick automaton,
+so screening a comment or post is one pass over its text no matter how many
+terms the list holds. Content with a match is stored as 'pending' and waits
+for an admin instead of being published.
+
+The automaton is immutable once built; a background thread rebuilds it when
+the term list changes (admin edits in this worker wake it immediately, other
+workers notice within MODERATION_REFRESH_INTERVAL) and swaps it in, so
+requests never wait for a rebuild.
+
+Matching is case-insensitive on NFKC-normalized text with zero-width
+characters removed. Latin terms must match whole words ("ass" does not hit
+"class"); Khmer is written without spaces between words, so Khmer terms
+match anywhere.
+"""
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.database import get_supabase
+
+
+TERMS_PAGE_SIZE = 1000
+
+# Invisible characters used to split words past a filter
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad"))
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).translate(_ZERO_WIDTH).casefold()
+
+
+def _is_word_term(term: str) -> bool:
+    """Terms written in Latin script get word-boundary matching"""
+    return all(ord(ch) < 0x0250 for ch in term)
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a fixed set of terms"""
+
+    def __init__(self, terms: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Terms ending at a state, and the nearest state down the fail chain that ends a term
+        self._outputs: List[List[int]] = [[]]
+        self._output_link: List[int] = [0]
+        self.terms: List[str] = []
+        self._word_term: List[bool] = []
+
+        seen = set()
+        for term in terms:
+            key = normalize_text(term).strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._add(key, len(self.terms))
+            self.terms.append(key)
+            self._word_term.append(_is_word_term(key))
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, term: str, index: int):
+        state = 0
+        for ch in term:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._output_link.append(0)
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._outputs[state].append(index)
+
+    def _build_links(self):
+        # Breadth-first, so a state's fail target is always finished before the state itself
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target
+                self._output_link[child] = target if self._outputs[target] else self._output_link[target]
+                queue.append(child)
+
+    def _at_boundary(self, text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    def find(self, text: str) -> List[str]:
+        """Distinct terms found in text, in order of first occurrence"""
+        if not self.terms or not text:
+            return []
+        text = normalize_text(text)
+        goto, fail, outputs, output_link = self._goto, self._fail, self._outputs, self._output_link
+        found: List[str] = []
+        hit = set()
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            match_state = state if outputs[state] else output_link[state]
+            while match_state:
+                for index in outputs[match_state]:
+                    if index in hit:
+                        continue
+                    end = position + 1
+                    if self._word_term[index] and not self._at_boundary(text, end - len(self.terms[index]), end):
+                        continue
+                    hit.add(index)
+                    found.append(self.terms[index])
+                match_state = output_link[match_state]
+        return found
+
+
+class ContentScreen:
+    """Holds the current matcher and rebuilds it in the background"""
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._matcher = TermMatcher(())
+        self._version: Optional[Tuple[int, Optional[str]]] = None
+        self._built_at: Optional[float] = None
+        self._build_seconds = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def screen(self, *texts: Optional[str]) -> List[str]:
+        """Terms matched in any of texts; empty when the content is clean"""
+        matcher = self._matcher
+        found: List[str] = []
+        for text in texts:
+            for term in matcher.find(text or ""):
+                if term not in found:
+                    found.append(term)
+        return found
+
+    def status(self) -> dict:
+        return {
+            "enabled": settings.MODERATION_ENABLED,
+            "terms": len(self._matcher),
+            "built_at": self._built_at,
+            "build_seconds": round(self._build_seconds, 4),
+        }
+
+    def request_rebuild(self):
+        """Ask the worker to reload the term list now (after an admin edit)"""
+        self._version = None
+        self._wake.set()
+
+    def _current_version(self) -> Tuple[int, Optional[str]]:
+        """(active term count, latest updated_at): changes whenever the list does"""
+        result = get_supabase().table("moderation_terms") \
+            .select("updated_at", count="exact") \
+            .eq("is_active", True) \
+            .order("updated_at", desc=True) \
+            .limit(1) \
+            .execute()
+        latest = result.data[0]["updated_at"] if result.data else None
+        return (result.count or 0, latest)
+
+    def _load_terms(self) -> List[str]:
+        supabase = get_supabase()
+        terms: List[str] = []
+        last_id = 0
+        while True:
+            page = supabase.table("moderation_terms") \
+                .select("id, term") \
+                .eq("is_active", True) \
+                .gt("id", last_id) \
+                .order("id") \
+                .limit(TERMS_PAGE_SIZE) \
+                .execute()
+            rows = page.data or []
+            terms.extend(row["term"] for row in rows)
+            if len(rows) < TERMS_PAGE_SIZE:
+                return terms
+            last_id = rows[-1]["id"]
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the matcher if the term list changed; returns True when rebuilt"""
+        version = self._current_version()
+        if not force and version == self._version:
+            return False
+        started = time.perf_counter()
+        matcher = TermMatcher(self._load_terms())
+        self._build_seconds = time.perf_counter() - started
+        # Single reference swap: in-flight screen() calls finish on the old matcher
+        self._matcher = matcher
+        self._version = version
+        self._built_at = time.time()
+        return True
+
+    def start(self):
+        if not settings.MODERATION_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="moderation-terms", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                if self.refresh():
+                    print(f"✓ Moderation terms loaded: {len(self._matcher)} terms "
+                          f"in {self._build_seconds * 1000:.0f}ms")
+            except Exception as e:
+                print(f"WARNING: Moderation term refresh failed: {e}")
+
+
+content_screen = ContentScreen(settings.MODERATION_REFRESH_INTERVAL)
+
+
+def screen_content(*texts: Optional[str]) -> List[str]:
+    """Matched terms for the given texts ([] when screening is disabled)"""
+    if not settings.MODERATION_ENABLED:
+        return []
+    return content_screen.screen(*texts)
+
+
+def moderation_reason(matches: List[str]) -> str:
+    return "Matched terms: " + ", ".join(matches)
+
+
+def start_moderation():
+    content_screen.start()
+
+
+def stop_moderation():
+    content_screen.stop()
@@ -0,0 +1,68 @@
+"""
+Organizer review transitions
+
+Approve, reject and suspend are each one RPC (see migration 022) that
+updates organizer_applications, user_profiles and organizer_profiles in a
+single transaction, so a failure cannot leave an application approved
+without its organizer profile. Used by both admin routers.
+"""
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from postgrest.exceptions import APIError
+
+from app.database import get_supabase
+
+
+def _review(rpc: str, params: dict) -> dict:
+    """
+    Call a transition RPC and return {"application", "organizer_profile", "changed"}.
+
+    Raises:
+        HTTPException: 404 if the application does not exist,
+            400 if the transition is not allowed from its current status
+    """
+    try:
+        response = get_supabase().rpc(rpc, params).execute()
+    except APIError as e:
+        # P0002: no such application, 22P02/22003: id is not a valid application id
+        if e.code in ("P0002", "22P02", "22003"):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=e.message if e.code == "P0002" else "Organizer application not found"
+            )
+        # P0001: transition not allowed (e.g. "Cannot approve rejected application")
+        if e.code == "P0001":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=e.message
+            )
+        raise
+    return response.data or {}
+
+
+def approve_organizer_application(application_id: Any, admin_id: str, approved_status: str = "verified") -> dict:
+    """Approve a pending application; changed is False if it was already approved"""
+    return _review("approve_organizer_application", {
+        "p_application_id": application_id,
+        "p_admin_id": admin_id,
+        "p_status": approved_status,
+    })
+
+
+def reject_organizer_application(application_id: Any, admin_id: str, reason: Optional[str]) -> dict:
+    """Reject a pending application"""
+    return _review("reject_organizer_application", {
+        "p_application_id": application_id,
+        "p_admin_id": admin_id,
+        "p_reason": reason,
+    })
+
+
+def suspend_organizer(application_id: Any, admin_id: str, reason: Optional[str]) -> dict:
+    """Suspend an organizer (any current status)"""
+    return _review("suspend_organizer", {
+        "p_application_id": application_id,
+        "p_admin_id": admin_id,
+        "p_reason": reason,
+    })
@@ -0,0 +1,57 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token encoding the sort key of the last
+row of a page. The next page continues strictly after that key, so page
+cost doesn't grow with depth the way OFFSET does.
+"""
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key values of the last row of a page"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return tuple(values)
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for a PostgREST or=() filter (timestamps contain : and +)"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def keyset_filter(column: str, tiebreak: str, value: Any, tiebreak_value: Any, desc: bool = True) -> str:
+    """
+    PostgREST or=() expression selecting rows after (value, tiebreak_value)
+    in (column, tiebreak) order, e.g. for query.or_(...)
+    """
+    op = "lt" if desc else "gt"
+    return (
+        f"{column}.{op}.{_quote(value)},"
+        f"and({column}.eq.{_quote(value)},{tiebreak}.{op}.{_quote(tiebreak_value)})"
+    )
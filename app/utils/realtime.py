@@ -0,0 +1,222 @@
+"""
+Realtime push (SSE / WebSocket) broker
+
+Request handlers publish small JSON events to named channels:
+    entity:{entity_type}:{entity_id}        comment changes on an opportunity/blog/post
+    user:{user_id}                          changes to one user's applications
+    opportunity:{opportunity_id}:applications   application changes for the organizer
+
+Connections subscribe to channels after authorization has been checked
+once (see app/routers/realtime.py) and receive events through a bounded
+asyncio queue. Publishing is thread-safe so the sync route handlers (which
+run in the threadpool) can call publish() directly.
+
+Fan-out between worker processes is pluggable (REALTIME_BACKEND):
+    local   events reach connections of this process only (single worker)
+    redis   events go through Redis pub/sub and reach every worker
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from app.config import settings
+
+
+REDIS_CHANNEL_PREFIX = "realtime:"
+
+# Put in a subscriber queue to end its stream (overflow or shutdown)
+CLOSE = None
+
+
+class Subscription:
+    """One connection's view of the broker"""
+
+    def __init__(self, channels: Iterable[str], loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.channels = set(channels)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def _put(self, message: Optional[dict]):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop it and let the client resync instead of buffering forever
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSE)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next message; raises asyncio.TimeoutError when idle for timeout seconds"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    """Channel -> subscriptions registry with thread-safe local delivery"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+
+    @property
+    def connections(self) -> int:
+        return self._count
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Register a subscription; call from the connection's event loop"""
+        subscription = Subscription(channels, asyncio.get_running_loop(), settings.REALTIME_QUEUE_SIZE)
+        with self._lock:
+            if self._count >= settings.REALTIME_MAX_CONNECTIONS:
+                raise OverflowError("Too many realtime connections")
+            self._count += 1
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._count -= 1
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def deliver(self, channel: str, message: dict):
+        """Hand a message to every local subscriber of a channel (any thread)"""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+            except RuntimeError:
+                # Loop already closed (shutdown)
+                pass
+
+    def close_all(self):
+        """End every open stream"""
+        with self._lock:
+            subscribers = {s for subs in self._channels.values() for s in subs}
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, CLOSE)
+            except RuntimeError:
+                pass
+
+
+class LocalFanout:
+    """Single-process fan-out: publish delivers directly"""
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+
+    def publish(self, channel: str, message: dict):
+        self.broker.deliver(channel, message)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RedisFanout:
+    """Multi-worker fan-out over Redis pub/sub; every worker delivers to its own connections"""
+
+    def __init__(self, broker: Broker, url: str):
+        import redis  # Optional dependency, only needed for REALTIME_BACKEND=redis
+
+        self.broker = broker
+        self.client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, channel: str, message: dict):
+        self.client.publish(REDIS_CHANNEL_PREFIX + channel, json.dumps(message, default=str))
+
+    def start(self):
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(REDIS_CHANNEL_PREFIX + "*")
+        self._thread = threading.Thread(target=self._run, name="realtime-redis", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for item in self._pubsub.listen():
+                if item.get("type") != "pmessage":
+                    continue
+                channel = item["channel"].decode()[len(REDIS_CHANNEL_PREFIX):]
+                self.broker.deliver(channel, json.loads(item["data"]))
+        except Exception as e:
+            print(f"WARNING: Realtime Redis listener stopped: {e}")
+
+    def stop(self):
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+broker = Broker()
+_fanout = LocalFanout(broker)
+
+
+def entity_channel(entity_type: str, entity_id: str) -> str:
+    return f"entity:{entity_type}:{entity_id}"
+
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def opportunity_applications_channel(opportunity_id) -> str:
+    return f"opportunity:{opportunity_id}:applications"
+
+
+def publish(channels, event: str, data: dict):
+    """
+    Publish an event to one or more channels.
+    Never raises: a failed push must not fail the request that caused it.
+    """
+    if isinstance(channels, str):
+        channels = [channels]
+    message = {
+        "event": event,
+        "data": data,
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+    }
+    for channel in channels:
+        try:
+            _fanout.publish(channel, message)
+        except Exception as e:
+            print(f"WARNING: Realtime publish to {channel} failed: {e}")
+
+
+def format_sse(message: dict) -> str:
+    """Serialize a broker message as a Server-Sent Event"""
+    return f"event: {message['event']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+
+def start_realtime():
+    """Pick the fan-out backend and start it"""
+    global _fanout
+    if settings.REALTIME_BACKEND == "redis":
+        try:
+            _fanout = RedisFanout(broker, settings.REDIS_URL)
+        except ImportError:
+            print("WARNING: REALTIME_BACKEND=redis but the redis package is not installed; using local fan-out")
+            _fanout = LocalFanout(broker)
+    _fanout.start()
+
+
+def stop_realtime():
+    """Close open streams and stop the fan-out backend"""
+    broker.close_all()
+    _fanout.stop()
@@ -67,6 +67,14 @@ def get_current_user_optional(
         return None
 
 
+def get_user_from_token(token: str):
+    """
+    Verify a raw JWT (e.g. from a query parameter, where EventSource and
+    WebSocket clients can't send an Authorization header)
+    """
+    return get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
 def extract_user_id(user) -> str:
     """
     Extract user_id as clean UUID string
@@ -0,0 +1,240 @@
+"""
+Near-duplicate spam detection
+
+Each submission (comment, community post, contact message) is reduced to a
+64-bit SimHash over character 3-grams: lightly edited copies of a short text
+land within a few bits of each other (unrelated texts differ in ~32), and it
+works the same for Khmer, which has no spaces between words. Recent
+fingerprints are kept in memory for SPAM_WINDOW_SECONDS.
+
+Lookup is banded: the 64 bits are split into SPAM_MAX_DISTANCE + 1 bands,
+and two fingerprints within that Hamming distance must agree exactly on at
+least one band (pigeonhole). Buckets are keyed by sender (user and IP) as
+well as band, since only submissions from the same user or the same IP
+count as duplicates; candidates come from a few dict lookups instead of a
+scan over the whole window, and two people quoting the same text are not
+affected. The index is per worker process; with several workers a burst is
+still caught, a little later.
+"""
+import hashlib
+import ipaddress
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+from app.config import settings
+from app.utils.moderation import normalize_text
+
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3  # characters
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _words(text: str) -> List[str]:
+    return "".join(ch if ch.isalnum() else " " for ch in normalize_text(text)).split()
+
+
+def _features(text: str) -> List[str]:
+    joined = " ".join(_words(text))
+    return [joined[i:i + SHINGLE_SIZE] for i in range(max(1, len(joined) - SHINGLE_SIZE + 1))]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over character shingles"""
+    weights = [0] * FINGERPRINT_BITS
+    for feature in _features(text):
+        h = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass(eq=False)
+class _Entry:
+    scope: str
+    fingerprint: int
+    user_id: Optional[str]
+    ip: Optional[str]
+    at: float
+
+
+class SimHashIndex:
+    """Recent fingerprints with banded lookup and time-based eviction"""
+
+    def __init__(self, window_seconds: float, max_distance: int, max_entries: int, max_per_sender: int):
+        self.window_seconds = window_seconds
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        # Bounds the work per lookup for busy senders (e.g. a shared NAT IP)
+        self.max_per_sender = max_per_sender
+        bands = max_distance + 1
+        width, extra = divmod(FINGERPRINT_BITS, bands)
+        # (shift, mask) per band; the first `extra` bands are one bit wider
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for i in range(bands):
+            bits = width + (1 if i < extra else 0)
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+        # Buckets are insertion-ordered dicts used as sets, for O(1) removal
+        self._buckets: Dict[Tuple[str, str, int, int], Dict[_Entry, None]] = {}
+        self._by_sender: Dict[Tuple[str, str], Deque[_Entry]] = {}
+        self._entries: Deque[_Entry] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _senders(user_id: Optional[str], ip: Optional[str]) -> List[str]:
+        return ([f"user:{user_id}"] if user_id else []) + ([f"ip:{ip}"] if ip else [])
+
+    def _keys(self, scope: str, sender: str, fingerprint: int):
+        for band, (shift, mask) in enumerate(self._bands):
+            yield (scope, sender, band, fingerprint >> shift & mask)
+
+    def _unlink(self, entry: _Entry, sender: str):
+        for key in self._keys(entry.scope, sender, entry.fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.pop(entry, None)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._entries and (self._entries[0].at < cutoff or len(self._entries) > self.max_entries):
+            entry = self._entries.popleft()
+            for sender in self._senders(entry.user_id, entry.ip):
+                self._unlink(entry, sender)
+                history = self._by_sender.get((entry.scope, sender))
+                if history and history[0] is entry:
+                    history.popleft()
+                if not history:
+                    self._by_sender.pop((entry.scope, sender), None)
+
+    def check_and_add(
+        self,
+        scope: str,
+        fingerprint: int,
+        user_id: Optional[str] = None,
+        ip: Optional[str] = None
+    ) -> int:
+        """
+        Record a submission and return how many near-duplicates the same
+        user or IP sent in this scope within the window
+        """
+        now = time.time()
+        entry = _Entry(scope, fingerprint, user_id, ip, now)
+        with self._lock:
+            self._evict(now)
+            senders = self._senders(user_id, ip)
+            seen = set()
+            duplicates = 0
+            for sender in senders:
+                for key in self._keys(scope, sender, fingerprint):
+                    for other in self._buckets.get(key, ()):
+                        if other in seen:
+                            continue
+                        seen.add(other)
+                        if hamming_distance(fingerprint, other.fingerprint) <= self.max_distance:
+                            duplicates += 1
+
+            self._entries.append(entry)
+            for sender in senders:
+                for key in self._keys(scope, sender, fingerprint):
+                    self._buckets.setdefault(key, {})[entry] = None
+                history = self._by_sender.setdefault((scope, sender), deque())
+                history.append(entry)
+                if len(history) > self.max_per_sender:
+                    self._unlink(history.popleft(), sender)
+            self._evict(now)
+        return duplicates
+
+
+spam_index = SimHashIndex(
+    window_seconds=settings.SPAM_WINDOW_SECONDS,
+    max_distance=settings.SPAM_MAX_DISTANCE,
+    max_entries=settings.SPAM_INDEX_MAX_ENTRIES,
+    max_per_sender=settings.SPAM_MAX_PER_SENDER,
+)
+
+
+# Verdicts for check_spam
+ALLOW = "allow"
+QUEUE = "queue"
+REJECT = "reject"
+
+
+def check_spam(scope: str, text: str, user_id: Optional[str] = None, ip: Optional[str] = None) -> str:
+    """
+    ALLOW a first submission, QUEUE a near-duplicate for moderation and
+    REJECT once the same sender has sent SPAM_REJECT_AFTER near-duplicates.
+    Very short texts ("Thanks!") are always allowed.
+    """
+    if not settings.SPAM_DETECTION_ENABLED or not (user_id or ip):
+        return ALLOW
+    if len(_words(text)) < settings.SPAM_MIN_WORDS and len(text) < settings.SPAM_MIN_WORDS * 6:
+        return ALLOW
+    duplicates = spam_index.check_and_add(scope, simhash(text), user_id, ip)
+    if duplicates >= settings.SPAM_REJECT_AFTER:
+        return REJECT
+    if duplicates:
+        return QUEUE
+    return ALLOW
+
+
+def _parse_networks(entries: List[str]) -> list:
+    networks = []
+    for entry in entries:
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            print(f"WARNING: Ignoring invalid TRUSTED_PROXIES entry: {entry}")
+    return networks
+
+
+_trusted_proxies = _parse_networks(settings.TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(host: Optional[str]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    Caller IP. X-Forwarded-For is only believed when the direct peer is a
+    TRUSTED_PROXIES entry, and then the right-most hop that isn't one of our
+    proxies is the client (anything left of it is client-supplied).
+    """
+    peer = request.client.host if request.client else None
+    if not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+SPAM_QUEUE_REASON = "Near-duplicate of a recent submission"
@@ -0,0 +1,511 @@
+"""
+Deferred storage deletion and orphan garbage collection
+
+Request handlers never wait on storage deletes. They enqueue:
+- asset releases (content-addressed images, see storage_refs), resolved in
+  one release RPC per bucket per flush
+- plain object paths
+
+A background thread flushes the queue every few seconds, or sooner once a
+batch fills up, using the list form of storage remove().
+
+The reconciler periodically lists bucket objects, diffs them against the
+paths the database still references and removes orphans at a bounded rate.
+Each worker runs it on a timer, but a run first takes the storage_gc lease
+(migration 026), so only one worker reconciles at a time. Admin-triggered
+runs go through reconcile_job and happen in the background.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.config import settings
+from app.database import get_supabase
+from app.utils.storage_refs import hash_from_path, release_objects
+
+
+# Supabase storage rejects remove() with more than 1000 paths
+MAX_REMOVE_BATCH = 1000
+MAX_ATTEMPTS = 3
+LIST_PAGE_SIZE = 1000
+DB_PAGE_SIZE = 1000
+GC_LEASE = "storage_gc"
+GC_LEASE_SECONDS = 30 * 60  # renewed before each bucket
+
+
+class DeletionQueue:
+    """Buffers storage deletions and flushes them in batches from a worker thread"""
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = min(batch_size, MAX_REMOVE_BATCH)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._paths: Dict[str, Dict[str, int]] = {}  # bucket -> {path: attempts}
+        self._releases: Dict[str, List[str]] = {}  # bucket -> [sha256]
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- producers (request threads) ----------
+
+    def enqueue_paths(self, bucket: str, paths: Iterable[str]):
+        with self._lock:
+            pending = self._paths.setdefault(bucket, {})
+            for path in paths:
+                if path:
+                    pending.setdefault(path, 0)
+            full = len(pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def enqueue_release(self, bucket: str, hashes: Iterable[str]):
+        with self._lock:
+            self._releases.setdefault(bucket, []).extend(h for h in hashes if h)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(p) for p in self._paths.values()) + sum(len(r) for r in self._releases.values())
+
+    # ---------- worker ----------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-deletion-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker and flush whatever is still queued"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"WARNING: Storage deletion flush failed: {e}")
+
+    def flush(self):
+        """Resolve queued releases, then remove queued paths in batches"""
+        with self._lock:
+            releases, self._releases = self._releases, {}
+
+        for bucket, hashes in releases.items():
+            try:
+                released = release_objects(bucket, hashes)
+            except Exception as e:
+                print(f"WARNING: Failed to release storage objects: {e}")
+                self.enqueue_release(bucket, hashes)
+                continue
+            paths = []
+            for row in released:
+                paths.extend(_object_paths(row))
+            self.enqueue_paths(bucket, paths)
+
+        with self._lock:
+            batches, self._paths = self._paths, {}
+
+        for bucket, pending in batches.items():
+            paths = _drop_rereferenced(bucket, list(pending))
+            for start in range(0, len(paths), self.batch_size):
+                chunk = paths[start:start + self.batch_size]
+                try:
+                    get_supabase().storage.from_(bucket).remove(chunk)
+                except Exception as e:
+                    retry = [p for p in chunk if pending[p] + 1 < MAX_ATTEMPTS]
+                    print(f"WARNING: Failed to remove {len(chunk)} objects from {bucket} "
+                          f"({len(retry)} will be retried): {e}")
+                    with self._lock:
+                        queued = self._paths.setdefault(bucket, {})
+                        for path in retry:
+                            queued[path] = pending[path] + 1
+
+
+def _asset_file_paths(asset: dict) -> List[str]:
+    """Stored paths (original + renditions) recorded in an asset"""
+    paths = [(asset.get("original") or {}).get("path")]
+    for formats in (asset.get("renditions") or {}).values():
+        paths.extend(r.get("path") for r in formats.values())
+    return [p for p in paths if p]
+
+
+def _object_paths(row: dict) -> List[str]:
+    """All storage paths of a released storage_objects row"""
+    return _asset_file_paths(row.get("asset") or {}) or [row["path"]]
+
+
+def _drop_rereferenced(bucket: str, paths: List[str]) -> List[str]:
+    """
+    Content-addressed paths whose hash was registered again after it was
+    released (same file uploaded in between) must not be removed.
+    """
+    hashes = {hash_from_path(p) for p in paths} - {None}
+    if not hashes:
+        return paths
+    try:
+        live = get_supabase().table("storage_objects")\
+            .select("sha256")\
+            .eq("bucket", bucket)\
+            .in_("sha256", list(hashes))\
+            .execute()
+        referenced = {row["sha256"] for row in (live.data or [])}
+    except Exception as e:
+        # Can't tell - keep everything hashed for the next flush / GC run
+        print(f"WARNING: Could not verify released objects: {e}")
+        referenced = hashes
+    return [p for p in paths if hash_from_path(p) not in referenced]
+
+
+deletion_queue = DeletionQueue(
+    flush_interval=settings.STORAGE_DELETE_FLUSH_INTERVAL,
+    batch_size=settings.STORAGE_DELETE_BATCH_SIZE,
+)
+
+
+def enqueue_removal(bucket: str, paths: Iterable[str]):
+    """Schedule storage objects for deletion off the request path"""
+    deletion_queue.enqueue_paths(bucket, paths)
+
+
+def enqueue_release(bucket: str, hashes: Iterable[str]):
+    """Schedule content-addressed references for release off the request path"""
+    deletion_queue.enqueue_release(bucket, hashes)
+
+
+# ============================================
+# ORPHAN RECONCILER
+# ============================================
+
+def _list_objects(bucket: str, prefix: str = "") -> Iterable[dict]:
+    """Recursively yield every object (not folder) in a bucket"""
+    storage = get_supabase().storage.from_(bucket)
+    offset = 0
+    while True:
+        entries = storage.list(prefix, {"limit": LIST_PAGE_SIZE, "offset": offset})
+        for entry in entries:
+            path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+            if entry.get("id") is None:
+                # Folders have no id
+                yield from _list_objects(bucket, path)
+            else:
+                yield {**entry, "path": path}
+        if len(entries) < LIST_PAGE_SIZE:
+            break
+        offset += LIST_PAGE_SIZE
+
+
+def _select_all(table: str, columns: str) -> Iterable[dict]:
+    """Page through a table"""
+    supabase = get_supabase()
+    offset = 0
+    while True:
+        rows = supabase.table(table).select(columns).range(offset, offset + DB_PAGE_SIZE - 1).execute().data or []
+        yield from rows
+        if len(rows) < DB_PAGE_SIZE:
+            break
+        offset += DB_PAGE_SIZE
+
+
+def _url_path(url: Optional[str], bucket: str) -> Optional[str]:
+    if url and f"/{bucket}/" in url:
+        return url.split(f"/{bucket}/", 1)[1].split("?", 1)[0]
+    return None
+
+
+def _asset_paths(asset: Optional[dict], bucket: str) -> Set[str]:
+    if not asset:
+        return set()
+    paths = set(_asset_file_paths(asset))
+    paths.add(_url_path((asset.get("original") or {}).get("url"), bucket))
+    return paths - {None}
+
+
+def referenced_paths(bucket: str) -> Set[str]:
+    """Object paths the database still points at for one bucket"""
+    paths: Set[str] = set()
+    if bucket == settings.STORAGE_OPPORTUNITY_BUCKET:
+        for row in _select_all("opportunities", "images, image_assets"):
+            for url in (row.get("images") or "").split(","):
+                paths.add(_url_path(url.strip(), bucket))
+            for asset in row.get("image_assets") or []:
+                paths |= _asset_paths(asset, bucket)
+    elif bucket == settings.STORAGE_AVATAR_BUCKET:
+        for row in _select_all("user_profiles", "avatar_url, avatar_image"):
+            paths.add(_url_path(row.get("avatar_url"), bucket))
+            paths |= _asset_paths(row.get("avatar_image"), bucket)
+    elif bucket == settings.STORAGE_CARD_BUCKET:
+        for table in ("organizer_applications", "organizer_profiles"):
+            for row in _select_all(table, "card_image_url"):
+                paths.add(_url_path(row.get("card_image_url"), bucket))
+    elif bucket == settings.STORAGE_CV_BUCKET:
+        for row in _select_all("applications", "cv_url"):
+            paths.add(_url_path(row.get("cv_url"), bucket))
+    paths |= pending_upload_paths(bucket)
+    paths.discard(None)
+    return paths
+
+
+def pending_upload_paths(bucket: str) -> Set[str]:
+    """
+    Signed direct uploads (see uploads router) that can still be finalized,
+    or are finalized and waiting for the rendition worker
+    """
+    supabase = get_supabase()
+    now = datetime.now(timezone.utc).isoformat()
+    paths: Set[str] = set()
+    offset = 0
+    while True:
+        rows = supabase.table("pending_uploads")\
+            .select("path")\
+            .eq("bucket", bucket)\
+            .is_("processed_at", "null")\
+            .or_(f'finalized_at.not.is.null,expires_at.gt."{now}"')\
+            .range(offset, offset + DB_PAGE_SIZE - 1)\
+            .execute().data or []
+        paths.update(row["path"] for row in rows)
+        if len(rows) < DB_PAGE_SIZE:
+            break
+        offset += DB_PAGE_SIZE
+    return paths
+
+
+def referenced_hashes(bucket: str) -> Set[str]:
+    """Content hashes with a live storage_objects row"""
+    supabase = get_supabase()
+    hashes: Set[str] = set()
+    offset = 0
+    while True:
+        rows = supabase.table("storage_objects")\
+            .select("sha256")\
+            .eq("bucket", bucket)\
+            .range(offset, offset + DB_PAGE_SIZE - 1)\
+            .execute().data or []
+        hashes.update(row["sha256"] for row in rows)
+        if len(rows) < DB_PAGE_SIZE:
+            break
+        offset += DB_PAGE_SIZE
+    return hashes
+
+
+def _is_recent(entry: dict, grace: timedelta) -> bool:
+    stamp = entry.get("created_at") or entry.get("updated_at")
+    if not stamp:
+        return True
+    try:
+        created = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    return datetime.now(timezone.utc) - created < grace
+
+
+def reconcile_bucket(
+    bucket: str,
+    max_deletions: Optional[int] = None,
+    dry_run: bool = False
+) -> dict:
+    """
+    Remove objects no database row references.
+
+    Objects newer than STORAGE_GC_GRACE_SECONDS are skipped so uploads whose
+    row hasn't been written yet are never collected. At most max_deletions
+    objects are removed, STORAGE_GC_RATE_PER_SECOND per second.
+
+    Returns:
+        Summary with scanned/orphaned/deleted counts and a sample of paths
+    """
+    max_deletions = settings.STORAGE_GC_MAX_DELETIONS if max_deletions is None else max_deletions
+    grace = timedelta(seconds=settings.STORAGE_GC_GRACE_SECONDS)
+
+    # Read references first: anything written after this point is newer than the grace window
+    paths = referenced_paths(bucket)
+    hashes = referenced_hashes(bucket)
+
+    scanned = 0
+    orphans: List[str] = []
+    for entry in _list_objects(bucket):
+        scanned += 1
+        path = entry["path"]
+        sha256 = hash_from_path(path)
+        if path in paths or (sha256 and sha256 in hashes) or _is_recent(entry, grace):
+            continue
+        orphans.append(path)
+
+    to_delete = orphans[:max_deletions]
+    deleted = 0
+    if not dry_run:
+        rate = max(settings.STORAGE_GC_RATE_PER_SECOND, 1)
+        batch = max(1, min(rate, MAX_REMOVE_BATCH))
+        storage = get_supabase().storage.from_(bucket)
+        for start in range(0, len(to_delete), batch):
+            chunk = to_delete[start:start + batch]
+            try:
+                storage.remove(chunk)
+                deleted += len(chunk)
+            except Exception as e:
+                print(f"WARNING: Orphan removal failed in {bucket}: {e}")
+            time.sleep(len(chunk) / rate)
+
+    return {
+        "bucket": bucket,
+        "scanned": scanned,
+        "orphaned": len(orphans),
+        "deleted": deleted,
+        "dry_run": dry_run,
+        "sample": to_delete[:20],
+    }
+
+
+_lease_holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _acquire_gc_lease() -> bool:
+    """Take or renew the cross-worker reconcile lease"""
+    try:
+        response = get_supabase().rpc("acquire_maintenance_lease", {
+            "p_name": GC_LEASE,
+            "p_holder": _lease_holder,
+            "p_ttl_seconds": GC_LEASE_SECONDS,
+        }).execute()
+    except Exception as e:
+        # Can't tell whether another worker is running; don't risk a second run
+        print(f"WARNING: Could not take storage GC lease: {e}")
+        return False
+    return bool(response.data)
+
+
+def _release_gc_lease():
+    try:
+        get_supabase().rpc("release_maintenance_lease", {
+            "p_name": GC_LEASE,
+            "p_holder": _lease_holder,
+        }).execute()
+    except Exception as e:
+        # It expires on its own
+        print(f"WARNING: Could not release storage GC lease: {e}")
+
+
+def reconcile_all(dry_run: bool = False) -> Optional[List[dict]]:
+    """
+    Run the reconciler over every managed bucket.
+
+    Returns None without doing anything if another worker holds the lease.
+    """
+    if not _acquire_gc_lease():
+        return None
+    results = []
+    try:
+        for bucket in (
+            settings.STORAGE_OPPORTUNITY_BUCKET,
+            settings.STORAGE_AVATAR_BUCKET,
+            settings.STORAGE_CARD_BUCKET,
+            settings.STORAGE_CV_BUCKET,
+        ):
+            if results and not _acquire_gc_lease():
+                results.append({"bucket": bucket, "error": "Lost the storage GC lease"})
+                break
+            try:
+                results.append(reconcile_bucket(bucket, dry_run=dry_run))
+            except Exception as e:
+                print(f"WARNING: Storage reconcile failed for {bucket}: {e}")
+                results.append({"bucket": bucket, "error": str(e)})
+    finally:
+        _release_gc_lease()
+    return results
+
+
+class ReconcileJob:
+    """One admin-triggered reconcile at a time per worker, run off the request thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._status: dict = {"state": "idle"}
+
+    def start(self, dry_run: bool, on_done: Optional[Callable[[List[dict]], None]] = None) -> bool:
+        """Start a run; False if one is already running in this worker"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._status = {
+                "state": "running",
+                "dry_run": dry_run,
+                "started_at": datetime.utcnow().isoformat(),
+                "finished_at": None,
+                "buckets": None,
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(dry_run, on_done), name="storage-reconcile", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def _run(self, dry_run: bool, on_done: Optional[Callable[[List[dict]], None]]):
+        try:
+            results = reconcile_all(dry_run=dry_run)
+            state = "skipped" if results is None else "finished"
+        except Exception as e:
+            print(f"WARNING: Storage reconcile job failed: {e}")
+            results, state = None, "failed"
+        with self._lock:
+            self._status.update({
+                "state": state,
+                "finished_at": datetime.utcnow().isoformat(),
+                "buckets": results,
+            })
+            if state == "skipped":
+                self._status["detail"] = "Another worker is already reconciling"
+        if results and on_done:
+            try:
+                on_done(results)
+            except Exception as e:
+                print(f"WARNING: Storage reconcile callback failed: {e}")
+
+
+reconcile_job = ReconcileJob()
+
+
+_gc_stop = threading.Event()
+_gc_thread: Optional[threading.Thread] = None
+
+
+def _gc_loop():
+    while not _gc_stop.wait(settings.STORAGE_GC_INTERVAL):
+        results = reconcile_all()
+        if results is None:
+            continue  # another worker is on it
+        for result in results:
+            print(f"Storage GC: {result}")
+
+
+def start_storage_workers():
+    """Start the deletion queue and, if enabled, the periodic reconciler"""
+    global _gc_thread
+    deletion_queue.start()
+    if settings.STORAGE_GC_INTERVAL > 0 and not (_gc_thread and _gc_thread.is_alive()):
+        _gc_stop.clear()
+        _gc_thread = threading.Thread(target=_gc_loop, name="storage-gc", daemon=True)
+        _gc_thread.start()
+
+
+def stop_storage_workers():
+    """Stop background workers and flush pending deletions"""
+    global _gc_thread
+    _gc_stop.set()
+    _gc_thread = None
+    deletion_queue.stop()
@@ -0,0 +1,94 @@
+"""
+Content-addressed storage helpers
+Files are stored under a path derived from the SHA-256 of their bytes and
+tracked in the storage_objects table with a reference count, so identical
+uploads share one stored copy and deletes only remove unreferenced objects.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+from app.database import get_supabase
+
+
+_HASH_IN_PATH = re.compile(r"(?:^|/)([0-9a-f]{2})/([0-9a-f]{64})(?:[/.]|$)")
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest of the file bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_path(sha256: str, suffix: str = "") -> str:
+    """
+    Storage path for a content hash, fanned out by the first two hex chars.
+    Format: ab/abcdef...{suffix}
+    """
+    return f"{sha256[:2]}/{sha256}{suffix}"
+
+
+def hash_from_path(path_or_url: Optional[str]) -> Optional[str]:
+    """Recover the content hash from a content-addressed path or public URL"""
+    if not path_or_url:
+        return None
+    match = _HASH_IN_PATH.search(path_or_url)
+    if not match or not match.group(2).startswith(match.group(1)):
+        return None
+    return match.group(2)
+
+
+def acquire_objects(bucket: str, hashes: List[str]) -> Dict[str, dict]:
+    """
+    Take a reference on every hash that is already stored.
+
+    Args:
+        bucket: Storage bucket name
+        hashes: One entry per reference to take (duplicates count twice)
+
+    Returns:
+        {sha256: storage_objects row} for the hashes that already exist
+    """
+    if not hashes:
+        return {}
+    result = get_supabase().rpc(
+        "acquire_storage_objects",
+        {"p_bucket": bucket, "p_hashes": hashes}
+    ).execute()
+    return {row["sha256"]: row for row in (result.data or [])}
+
+
+def register_objects(bucket: str, objects: List[dict]) -> Dict[str, dict]:
+    """
+    Record newly uploaded objects.
+
+    Args:
+        bucket: Storage bucket name
+        objects: Dicts with sha256, path, content_type, size, asset and refs
+
+    Returns:
+        {sha256: storage_objects row}
+    """
+    if not objects:
+        return {}
+    result = get_supabase().rpc(
+        "register_storage_objects",
+        {"p_bucket": bucket, "p_objects": objects}
+    ).execute()
+    return {row["sha256"]: row for row in (result.data or [])}
+
+
+def release_objects(bucket: str, hashes: List[str]) -> List[dict]:
+    """
+    Drop one reference per hash occurrence.
+
+    Returns:
+        storage_objects rows that are no longer referenced; the caller
+        removes their files from storage
+    """
+    if not hashes:
+        return []
+    result = get_supabase().rpc(
+        "release_storage_objects",
+        {"p_bucket": bucket, "p_hashes": hashes}
+    ).execute()
+    return result.data or []
@@ -0,0 +1,222 @@
+"""
+Background processing of direct image uploads
+
+Finalizing a direct upload (see the uploads router) only checks the head of
+the stored object, so image bytes never pass through a request. The upload is
+queued here instead: a worker thread downloads it, runs it through the same
+pipeline as the multipart endpoints (EXIF orientation applied, metadata
+stripped, renditions, content-addressed dedup), attaches the asset to its
+opportunity or profile and deletes the raw upload. Nothing links to the
+unprocessed file; until the job is done an avatar stays the previous one.
+
+pending_uploads is the durable queue (migration 012): a finalized image has
+processed_at NULL until it is attached or given up on, and each worker sweeps
+for such rows periodically, so jobs queued on a worker that died still run.
+A job is claimed (claimed_until) before processing so two workers never
+process the same upload.
+"""
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.config import settings
+from app.database import get_supabase
+from app.utils.cache import home_cache
+from app.utils.image_upload import delete_image_assets, get_asset_url, upload_image_assets
+from app.utils.storage_gc import enqueue_removal
+
+
+MAX_OPPORTUNITY_IMAGES = 5
+MAX_ATTEMPTS = 3
+CLAIM_SECONDS = 5 * 60
+SWEEP_BATCH = 100
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class RenditionQueue:
+    """Processes finalized image uploads from a worker thread"""
+
+    def __init__(self, sweep_interval: float):
+        self.sweep_interval = sweep_interval
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, upload_id: str):
+        self._queue.put(upload_id)
+
+    # ---------- worker ----------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="upload-renditions", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker; unprocessed uploads are left for the next sweep"""
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        # Pick up whatever was left unprocessed before this worker started
+        self.sweep()
+        while not self._stop.is_set():
+            try:
+                upload_id = self._queue.get(timeout=self.sweep_interval)
+            except queue.Empty:
+                self.sweep()
+                continue
+            if upload_id is None:
+                continue
+            self.process(upload_id)
+
+    def sweep(self):
+        """Process finalized uploads no worker is handling (new, retried or orphaned)"""
+        try:
+            rows = get_supabase().table("pending_uploads")\
+                .select("id")\
+                .neq("purpose", "cv")\
+                .not_.is_("finalized_at", "null")\
+                .is_("processed_at", "null")\
+                .lt("attempts", MAX_ATTEMPTS)\
+                .or_(f'claimed_until.is.null,claimed_until.lt."{_now().isoformat()}"')\
+                .order("finalized_at")\
+                .limit(SWEEP_BATCH)\
+                .execute().data or []
+        except Exception as e:
+            print(f"WARNING: Upload rendition sweep failed: {e}")
+            return
+        for row in rows:
+            if self._stop.is_set():
+                return
+            self.process(row["id"])
+
+    def process(self, upload_id: str):
+        upload = _claim(upload_id)
+        if upload is None:
+            return  # done already, or another worker has it
+        asset = None
+        try:
+            content = get_supabase().storage.from_(upload["bucket"]).download(upload["path"])
+            assets, errors = upload_image_assets(
+                [(upload["path"].rsplit("/", 1)[-1], content)], upload["bucket"]
+            )
+            asset = assets[0]
+            if asset is None:
+                # Not a decodable image after all; nothing to retry
+                _finish(upload, f"Failed to process image: {errors[0] if errors else 'unknown error'}")
+                return
+            if upload["purpose"] == "opportunity_image":
+                error = _attach_opportunity_image(upload, asset)
+            else:
+                error = _attach_avatar(upload, asset)
+        except Exception as e:
+            print(f"WARNING: Upload rendition failed for {upload_id}: {e}")
+            if asset is not None:
+                delete_image_assets([asset])
+            _retry_later(upload, str(e))
+            return
+        try:
+            _finish(upload, error)
+        except Exception as e:
+            # Attached already; don't count this as a failed attempt
+            print(f"WARNING: Could not mark upload {upload_id} processed: {e}")
+
+
+def _claim(upload_id: str) -> Optional[dict]:
+    """Take an unprocessed upload for CLAIM_SECONDS; None if it isn't available"""
+    now = _now()
+    try:
+        claimed = get_supabase().table("pending_uploads")\
+            .update({"claimed_until": (now + timedelta(seconds=CLAIM_SECONDS)).isoformat()})\
+            .eq("id", upload_id)\
+            .not_.is_("finalized_at", "null")\
+            .is_("processed_at", "null")\
+            .or_(f'claimed_until.is.null,claimed_until.lt."{now.isoformat()}"')\
+            .execute()
+    except Exception as e:
+        print(f"WARNING: Could not claim upload {upload_id}: {e}")
+        return None
+    return claimed.data[0] if claimed.data else None
+
+
+def _finish(upload: dict, error: Optional[str] = None):
+    """Mark an upload done (attached, or given up on with error) and drop the raw file"""
+    get_supabase().table("pending_uploads")\
+        .update({"processed_at": _now().isoformat(), "claimed_until": None, "last_error": error})\
+        .eq("id", upload["id"])\
+        .execute()
+    enqueue_removal(upload["bucket"], [upload["path"]])
+
+
+def _retry_later(upload: dict, error: str):
+    attempts = (upload.get("attempts") or 0) + 1
+    try:
+        if attempts >= MAX_ATTEMPTS:
+            _finish(upload, error)
+            return
+        get_supabase().table("pending_uploads")\
+            .update({"attempts": attempts, "claimed_until": None, "last_error": error})\
+            .eq("id", upload["id"])\
+            .execute()
+    except Exception as e:
+        # The claim expires on its own and the next sweep retries
+        print(f"WARNING: Could not record upload rendition failure: {e}")
+
+
+def _attach_opportunity_image(upload: dict, asset: dict) -> Optional[str]:
+    """Append the asset to its opportunity; an error message if it can't be"""
+    updated = get_supabase().rpc("append_opportunity_image", {
+        "p_opportunity_id": upload["target_id"],
+        "p_asset": asset,
+        "p_url": get_asset_url(asset, "full"),
+        "p_max_images": MAX_OPPORTUNITY_IMAGES,
+    }).execute()
+    if not updated.data:
+        delete_image_assets([asset])
+        return f"Opportunity not found or already has {MAX_OPPORTUNITY_IMAGES} images"
+    return None
+
+
+def _attach_avatar(upload: dict, asset: dict) -> Optional[str]:
+    """Replace the user's avatar with the asset"""
+    supabase = get_supabase()
+    user_id = upload["user_id"]
+    previous = supabase.table("user_profiles")\
+        .select("avatar_image")\
+        .filter("user_id", "eq", user_id)\
+        .execute()
+    # Avatars are only ever shown small
+    supabase.table("user_profiles")\
+        .update({"avatar_url": get_asset_url(asset, "card"), "avatar_image": asset})\
+        .filter("user_id", "eq", user_id)\
+        .execute()
+    if previous.data and previous.data[0].get("avatar_image"):
+        delete_image_assets([previous.data[0]["avatar_image"]])
+    home_cache.invalidate(user_id)
+    return None
+
+
+rendition_queue = RenditionQueue(sweep_interval=settings.UPLOAD_RENDITION_SWEEP_INTERVAL)
+
+
+def enqueue_rendition(upload_id: str):
+    """Process a finalized image upload off the request path"""
+    rendition_queue.enqueue(upload_id)
+
+
+def start_upload_renditions():
+    rendition_queue.start()
+
+
+def stop_upload_renditions():
+    rendition_queue.stop()
@@ -0,0 +1,104 @@
+"""
+Load test for realtime SSE streams
+Opens many idle connections to one comment stream, checks they stay open
+(heartbeats arrive) and, with TOKEN set, measures fan-out latency of one comment.
+
+Run with: python load_test_realtime.py [connections] [seconds]
+  BASE_URL     server (default http://localhost:8000)
+  ENTITY       entity_type:entity_id to watch (default blog:<zero uuid>)
+  TOKEN        optional JWT; posts a comment and times its delivery to every stream
+
+Raise the open-file limit first (ulimit -n 65535) and run the server with
+REALTIME_HEARTBEAT_SECONDS lower than the test duration.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+ENTITY = os.getenv("ENTITY", "blog:00000000-0000-0000-0000-000000000000")
+TOKEN = os.getenv("TOKEN")
+
+CONNECTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+DURATION = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+stats = {"connected": 0, "failed": 0, "heartbeats": 0, "events": 0}
+latencies = []
+
+
+async def listen(client, url, marker):
+    try:
+        async with client.stream("GET", url) as response:
+            if response.status_code != 200:
+                stats["failed"] += 1
+                return
+            stats["connected"] += 1
+            async for line in response.aiter_lines():
+                if line.startswith(": ping"):
+                    stats["heartbeats"] += 1
+                elif line.startswith("data:"):
+                    stats["events"] += 1
+                    message = json.loads(line[5:])
+                    if message.get("data", {}).get("content") == marker["content"]:
+                        latencies.append(time.perf_counter() - marker["sent"])
+    except (httpx.HTTPError, asyncio.CancelledError):
+        pass
+
+
+async def post_comment(client, marker):
+    entity_type, entity_id = ENTITY.split(":", 1)
+    marker["sent"] = time.perf_counter()
+    response = await client.post(
+        f"{BASE_URL}/comments",
+        json={"entity_type": entity_type, "entity_id": entity_id, "content": marker["content"]},
+        headers={"Authorization": f"Bearer {TOKEN}"},
+    )
+    print(f"📝 Posted test comment: {response.status_code}")
+
+
+async def main():
+    entity_type, entity_id = ENTITY.split(":", 1)
+    url = f"{BASE_URL}/api/realtime/entity/{entity_type}/{entity_id}"
+    marker = {"content": f"load-test {time.time()}", "sent": None}
+
+    print(f"{'='*50}")
+    print(f"🧪 Realtime load test: {CONNECTIONS} SSE connections for {DURATION:.0f}s")
+    print(f"   {url}")
+    print(f"{'='*50}")
+
+    limits = httpx.Limits(max_connections=CONNECTIONS + 10, max_keepalive_connections=0)
+    timeout = httpx.Timeout(10.0, read=None)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(listen(client, url, marker)) for _ in range(CONNECTIONS)]
+
+        while stats["connected"] + stats["failed"] < CONNECTIONS and time.perf_counter() - started < 30:
+            await asyncio.sleep(0.5)
+        print(f"🔌 Connected: {stats['connected']}  Failed: {stats['failed']}  "
+              f"({time.perf_counter() - started:.1f}s)")
+
+        if TOKEN:
+            await post_comment(client, marker)
+
+        await asyncio.sleep(max(0, DURATION - (time.perf_counter() - started)))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"\n💓 Heartbeats received: {stats['heartbeats']}")
+    print(f"📨 Events received: {stats['events']}")
+    if latencies:
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"⏱️  Fan-out to {len(latencies)} streams: p50 {p50 * 1000:.0f}ms, p99 {p99 * 1000:.0f}ms")
+    ok = stats["connected"] == CONNECTIONS
+    print(f"\n{'✅' if ok else '❌'} {stats['connected']}/{CONNECTIONS} connections held")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+-- Migration: Structured image assets with renditions
+-- Date: 2026-10-19
+-- Description: Store uploaded images as a JSONB list (renditions, dimensions, blur placeholder)
+-- instead of relying on the comma-separated opportunities.images string
+
+ALTER TABLE opportunities
+ADD COLUMN IF NOT EXISTS image_assets JSONB NOT NULL DEFAULT '[]'::jsonb;
+
+ALTER TABLE user_profiles
+ADD COLUMN IF NOT EXISTS avatar_image JSONB;
+
+-- Backfill existing rows: each legacy URL becomes an asset with only an original
+UPDATE opportunities o
+SET image_assets = legacy.assets
+FROM (
+    SELECT id,
+           jsonb_agg(
+               jsonb_build_object('original', jsonb_build_object('url', trim(url)), 'renditions', '{}'::jsonb)
+               ORDER BY ordinality
+           ) AS assets
+    FROM opportunities,
+         unnest(string_to_array(images, ',')) WITH ORDINALITY AS u(url, ordinality)
+    WHERE images IS NOT NULL AND trim(url) <> ''
+    GROUP BY id
+) legacy
+WHERE o.id = legacy.id
+  AND o.image_assets = '[]'::jsonb;
+
+COMMENT ON COLUMN opportunities.image_assets IS 'JSONB array of image assets: {bucket, path, width, height, placeholder, original, renditions{thumb|card|full{webp|avif}}}';
+COMMENT ON COLUMN opportunities.images IS 'DEPRECATED: comma-separated full-size URLs, kept in sync with image_assets for older clients';
+COMMENT ON COLUMN user_profiles.avatar_image IS 'JSONB image asset for the avatar (avatar_url points at its card rendition)';
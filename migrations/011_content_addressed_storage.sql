@@ -0,0 +1,96 @@
+-- Migration: Content-addressed storage objects with reference counts
+-- Date: 2026-10-19
+-- Description: Uploaded files in opportunity-images, organization-cards and avatars are stored at
+-- paths derived from the SHA-256 of their bytes. This table maps (bucket, sha256) to the stored
+-- object (and, for images, the processed asset with its renditions) and counts how many rows
+-- reference it, so re-uploads of the same file skip storage and deletes only remove objects
+-- nobody references any more.
+
+CREATE TABLE IF NOT EXISTS storage_objects (
+    bucket TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_type TEXT,
+    size BIGINT,
+    asset JSONB,
+    ref_count INTEGER NOT NULL DEFAULT 1 CHECK (ref_count >= 0),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (bucket, sha256)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_storage_objects_path ON storage_objects(bucket, path);
+
+ALTER TABLE storage_objects ENABLE ROW LEVEL SECURITY;
+-- No policies: only the service role (API) reads or writes this table
+
+-- Take one reference per occurrence of each hash that is already stored.
+-- Returns the rows that exist; hashes not returned must be uploaded and registered.
+CREATE OR REPLACE FUNCTION acquire_storage_objects(p_bucket TEXT, p_hashes TEXT[])
+RETURNS SETOF storage_objects
+LANGUAGE sql
+AS $$
+    UPDATE storage_objects s
+    SET ref_count = s.ref_count + h.refs,
+        updated_at = now()
+    FROM (
+        SELECT sha256, count(*)::int AS refs
+        FROM unnest(p_hashes) AS sha256
+        GROUP BY sha256
+    ) h
+    WHERE s.bucket = p_bucket
+      AND s.sha256 = h.sha256
+    RETURNING s.*;
+$$;
+
+-- Record newly uploaded objects. p_objects is a JSON array of
+-- {sha256, path, content_type, size, asset, refs}. A concurrent upload of the
+-- same bytes wrote to the same path, so conflicts just add the references.
+CREATE OR REPLACE FUNCTION register_storage_objects(p_bucket TEXT, p_objects JSONB)
+RETURNS SETOF storage_objects
+LANGUAGE sql
+AS $$
+    INSERT INTO storage_objects AS s (bucket, sha256, path, content_type, size, asset, ref_count)
+    SELECT p_bucket,
+           o->>'sha256',
+           o->>'path',
+           o->>'content_type',
+           (o->>'size')::bigint,
+           o->'asset',
+           COALESCE((o->>'refs')::int, 1)
+    FROM jsonb_array_elements(p_objects) AS o
+    ON CONFLICT (bucket, sha256) DO UPDATE
+    SET ref_count = s.ref_count + EXCLUDED.ref_count,
+        updated_at = now()
+    RETURNING s.*;
+$$;
+
+-- Drop one reference per occurrence of each hash. Rows that reach zero are
+-- deleted and returned so the caller can remove their storage objects.
+CREATE OR REPLACE FUNCTION release_storage_objects(p_bucket TEXT, p_hashes TEXT[])
+RETURNS SETOF storage_objects
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE storage_objects s
+    SET ref_count = GREATEST(s.ref_count - h.refs, 0),
+        updated_at = now()
+    FROM (
+        SELECT sha256, count(*)::int AS refs
+        FROM unnest(p_hashes) AS sha256
+        GROUP BY sha256
+    ) h
+    WHERE s.bucket = p_bucket
+      AND s.sha256 = h.sha256;
+
+    RETURN QUERY
+    DELETE FROM storage_objects s
+    WHERE s.bucket = p_bucket
+      AND s.sha256 = ANY(p_hashes)
+      AND s.ref_count = 0
+    RETURNING s.*;
+END;
+$$;
+
+COMMENT ON TABLE storage_objects IS 'Content-addressed uploads: one row per distinct file per bucket, with reference count';
+COMMENT ON COLUMN storage_objects.asset IS 'Processed image asset (renditions, dimensions, placeholder) reused on duplicate uploads';
@@ -0,0 +1,63 @@
+-- Migration: Direct-to-storage uploads via signed URLs
+-- Date: 2026-10-19
+-- Description: Clients upload images and CVs straight to Supabase Storage with a short-lived
+-- signed URL and then call the API to finalize. Each issued URL is recorded here with the
+-- purpose, exact path and the limits the finished object must satisfy; finalize checks the
+-- stored object against this row before attaching it. Objects that are never finalized are
+-- removed by the storage reconciler (app/utils/storage_gc.py, every managed bucket including
+-- CVs) once the URL has expired and the object is older than the grace period.
+--
+-- Finalize only reads the head of the object. Images are then processed into renditions by
+-- a background worker (app/utils/upload_renditions.py) that uses this table as its queue: a
+-- finalized image stays here with processed_at NULL until it has been attached, so uploads
+-- queued on a worker that died are picked up by any other. claimed_until keeps two workers
+-- off the same upload.
+
+CREATE TABLE IF NOT EXISTS pending_uploads (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    purpose TEXT NOT NULL CHECK (purpose IN ('opportunity_image', 'avatar', 'cv')),
+    bucket TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    max_size BIGINT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    finalized_at TIMESTAMP WITH TIME ZONE,
+    target_id BIGINT,  -- opportunity an opportunity_image is appended to
+    processed_at TIMESTAMP WITH TIME ZONE,
+    claimed_until TIMESTAMP WITH TIME ZONE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pending_uploads_path ON pending_uploads(bucket, path);
+CREATE INDEX IF NOT EXISTS idx_pending_uploads_user ON pending_uploads(user_id, created_at DESC);
+-- Rendition queue sweep
+CREATE INDEX IF NOT EXISTS idx_pending_uploads_unprocessed ON pending_uploads(finalized_at)
+WHERE finalized_at IS NOT NULL AND processed_at IS NULL;
+
+ALTER TABLE pending_uploads ENABLE ROW LEVEL SECURITY;
+-- No policies: only the service role (API) reads or writes this table
+
+-- Append one image to an opportunity in a single statement so concurrent finalizes
+-- don't overwrite each other's read-modify-write of images/image_assets.
+CREATE OR REPLACE FUNCTION append_opportunity_image(
+    p_opportunity_id BIGINT,
+    p_asset JSONB,
+    p_url TEXT,
+    p_max_images INTEGER DEFAULT 5
+)
+RETURNS SETOF opportunities
+LANGUAGE sql
+AS $$
+    UPDATE opportunities
+    SET image_assets = COALESCE(image_assets, '[]'::jsonb) || jsonb_build_array(p_asset),
+        images = concat_ws(',', NULLIF(images, ''), p_url)
+    WHERE id = p_opportunity_id
+      AND jsonb_array_length(COALESCE(image_assets, '[]'::jsonb)) < p_max_images
+    RETURNING *;
+$$;
+
+COMMENT ON TABLE pending_uploads IS 'Signed direct-upload URLs issued by the API, checked on finalize; also the queue of images awaiting renditions';
+COMMENT ON FUNCTION append_opportunity_image IS 'Atomically append an uploaded image asset (and its legacy URL) to an opportunity';
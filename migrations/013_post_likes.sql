@@ -0,0 +1,72 @@
+-- Migration: Deduplicated community post likes
+-- Date: 2026-10-19
+-- Description: One row per (user, post) like so a user can like a post only once. The
+-- API records likes here synchronously and coalesces the community_posts.likes counter
+-- updates in memory, applying them in batches with increment_post_likes.
+
+CREATE TABLE IF NOT EXISTS post_likes (
+    user_id UUID NOT NULL REFERENCES user_profiles(user_id) ON DELETE CASCADE,
+    post_id UUID NOT NULL REFERENCES community_posts(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (user_id, post_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_post_likes_post ON post_likes(post_id);
+
+ALTER TABLE post_likes ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own likes"
+ON post_likes FOR SELECT
+USING (user_id = auth.uid());
+
+-- Record a like. liked is false when the user had already liked the post.
+-- likes is the stored counter (pending in-memory increments not included).
+CREATE OR REPLACE FUNCTION add_post_like(p_user_id UUID, p_post_id UUID)
+RETURNS TABLE (liked BOOLEAN, likes INTEGER)
+LANGUAGE sql
+AS $$
+    WITH inserted AS (
+        INSERT INTO post_likes (user_id, post_id)
+        VALUES (p_user_id, p_post_id)
+        ON CONFLICT (user_id, post_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM inserted), COALESCE(p.likes, 0)
+    FROM community_posts p
+    WHERE p.id = p_post_id;
+$$;
+
+-- Remove a like. unliked is false when there was nothing to remove.
+CREATE OR REPLACE FUNCTION remove_post_like(p_user_id UUID, p_post_id UUID)
+RETURNS TABLE (unliked BOOLEAN, likes INTEGER)
+LANGUAGE sql
+AS $$
+    WITH deleted AS (
+        DELETE FROM post_likes
+        WHERE user_id = p_user_id AND post_id = p_post_id
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM deleted), COALESCE(p.likes, 0)
+    FROM community_posts p
+    WHERE p.id = p_post_id;
+$$;
+
+-- Apply coalesced counter deltas in one statement: p_deltas[i] is added to p_post_ids[i].
+-- Deltas are coalesced per API worker, so an unlike can be written before the like it
+-- undoes; the stored count may then dip below 0 for a flush interval. It is not clamped
+-- here (that would drift it upwards for good); readers clamp instead.
+CREATE OR REPLACE FUNCTION increment_post_likes(p_post_ids UUID[], p_deltas INTEGER[])
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE community_posts p
+    SET likes = COALESCE(p.likes, 0) + d.delta
+    FROM unnest(p_post_ids, p_deltas) AS d(post_id, delta)
+    WHERE p.id = d.post_id;
+$$;
+
+-- Existing counters are kept as they are: earlier likes were anonymous increments
+-- with no per-user record to rebuild them from.
+
+COMMENT ON TABLE post_likes IS 'One like per user per community post';
+COMMENT ON FUNCTION increment_post_likes IS 'Batch-apply write-behind like counter deltas';
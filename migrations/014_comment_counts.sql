@@ -0,0 +1,111 @@
+-- Migration: Denormalized comment counts
+-- Date: 2026-10-19
+-- Description: Keep comments_count on opportunities, blogs and community_posts in sync with the
+-- number of visible comments, maintained by a trigger on comments. Inserts, deletes, status
+-- changes (visible <-> hidden/flagged) and moves between entities all adjust the counts.
+
+ALTER TABLE opportunities
+ADD COLUMN IF NOT EXISTS comments_count INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE blogs
+ADD COLUMN IF NOT EXISTS comments_count INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE community_posts
+ADD COLUMN IF NOT EXISTS comments_count INTEGER NOT NULL DEFAULT 0;
+
+-- comments.entity_id is TEXT (integer ids for opportunities, UUIDs otherwise); cast the
+-- value rather than the column so the primary key index is used
+-- SECURITY DEFINER: commenters must not need UPDATE rights on the commented tables
+CREATE OR REPLACE FUNCTION adjust_comment_count(p_entity_type TEXT, p_entity_id TEXT, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF p_delta = 0 THEN
+        RETURN;
+    END IF;
+
+    IF p_entity_type = 'opportunity' AND p_entity_id ~ '^[0-9]+$' THEN
+        UPDATE opportunities
+        SET comments_count = GREATEST(0, comments_count + p_delta)
+        WHERE id = p_entity_id::BIGINT;
+    ELSIF p_entity_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$' THEN
+        IF p_entity_type = 'blog' THEN
+            UPDATE blogs
+            SET comments_count = GREATEST(0, comments_count + p_delta)
+            WHERE id = p_entity_id::UUID;
+        ELSIF p_entity_type = 'community_post' THEN
+            UPDATE community_posts
+            SET comments_count = GREATEST(0, comments_count + p_delta)
+            WHERE id = p_entity_id::UUID;
+        END IF;
+    END IF;
+END;
+$$;
+
+-- SECURITY DEFINER so it can call adjust_comment_count, which clients may not
+CREATE OR REPLACE FUNCTION sync_comment_count()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'visible' THEN
+        PERFORM adjust_comment_count(OLD.entity_type, OLD.entity_id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'visible' THEN
+        PERFORM adjust_comment_count(NEW.entity_type, NEW.entity_id, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Only reachable through the trigger; otherwise anyone could set any count over /rpc
+REVOKE EXECUTE ON FUNCTION adjust_comment_count(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+
+DROP TRIGGER IF EXISTS trg_comments_sync_count ON comments;
+CREATE TRIGGER trg_comments_sync_count
+AFTER INSERT OR DELETE OR UPDATE OF status, entity_type, entity_id ON comments
+FOR EACH ROW
+EXECUTE FUNCTION sync_comment_count();
+
+-- Backfill from existing visible comments
+UPDATE opportunities o
+SET comments_count = COALESCE(c.n, 0)
+FROM (
+    SELECT o2.id, count(c2.id)::int AS n
+    FROM opportunities o2
+    LEFT JOIN comments c2
+      ON c2.entity_type = 'opportunity' AND c2.entity_id = o2.id::text AND c2.status = 'visible'
+    GROUP BY o2.id
+) c
+WHERE o.id = c.id;
+
+UPDATE blogs b
+SET comments_count = COALESCE(c.n, 0)
+FROM (
+    SELECT b2.id, count(c2.id)::int AS n
+    FROM blogs b2
+    LEFT JOIN comments c2
+      ON c2.entity_type = 'blog' AND c2.entity_id = b2.id::text AND c2.status = 'visible'
+    GROUP BY b2.id
+) c
+WHERE b.id = c.id;
+
+UPDATE community_posts p
+SET comments_count = COALESCE(c.n, 0)
+FROM (
+    SELECT p2.id, count(c2.id)::int AS n
+    FROM community_posts p2
+    LEFT JOIN comments c2
+      ON c2.entity_type = 'community_post' AND c2.entity_id = p2.id::text AND c2.status = 'visible'
+    GROUP BY p2.id
+) c
+WHERE p.id = c.id;
+
+COMMENT ON COLUMN opportunities.comments_count IS 'Visible comments, maintained by trg_comments_sync_count';
+COMMENT ON COLUMN blogs.comments_count IS 'Visible comments, maintained by trg_comments_sync_count';
+COMMENT ON COLUMN community_posts.comments_count IS 'Visible comments, maintained by trg_comments_sync_count';
@@ -0,0 +1,11 @@
+-- Migration: Index-backed keyset pagination for comment threads
+-- Date: 2026-10-19
+-- Description: Comment threads are read with entity_type = ?, entity_id = ?, status = 'visible',
+-- ordered by created_at DESC, id DESC and paged with a (created_at, id) cursor. This index
+-- matches that filter and order exactly, so each page is an index range scan regardless of
+-- how deep into the thread it is. It supersedes idx_comments_entity from migration 004.
+
+CREATE INDEX IF NOT EXISTS idx_comments_entity_thread
+ON comments(entity_type, entity_id, status, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_comments_entity;
@@ -0,0 +1,143 @@
+-- Migration: Threaded comment replies
+-- Date: 2026-10-19
+-- Description: Replies point at their parent (parent_id) and carry a materialized path of
+-- ancestor ids ("root/child/grandchild"), their thread root (root_id) and depth, all filled in
+-- by a BEFORE INSERT trigger. A whole thread is then a root_id range and any subtree a path
+-- prefix range, so no recursive query is ever needed. reply_count (visible descendants) is
+-- maintained incrementally on every ancestor by an AFTER trigger.
+
+ALTER TABLE comments
+ADD COLUMN IF NOT EXISTS parent_id UUID REFERENCES comments(id) ON DELETE CASCADE,
+ADD COLUMN IF NOT EXISTS root_id UUID,
+ADD COLUMN IF NOT EXISTS depth INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS path TEXT,
+ADD COLUMN IF NOT EXISTS reply_count INTEGER NOT NULL DEFAULT 0;
+
+-- Existing comments are all top level
+UPDATE comments
+SET root_id = id, depth = 0, path = id::text
+WHERE root_id IS NULL;
+
+-- Top-level page of a thread list (keyset on created_at, id)
+CREATE INDEX IF NOT EXISTS idx_comments_entity_top_level
+ON comments(entity_type, entity_id, status, created_at DESC, id DESC)
+WHERE parent_id IS NULL;
+
+-- Thread lists now only ever read top-level comments, so the full index from 015 (same
+-- keys, not partial) serves no query and only adds write cost
+DROP INDEX IF EXISTS idx_comments_entity_thread;
+
+-- Replies of a thread in chronological order
+CREATE INDEX IF NOT EXISTS idx_comments_root_replies
+ON comments(root_id, status, created_at, id)
+WHERE parent_id IS NOT NULL;
+
+-- Subtree of a nested reply (path LIKE 'prefix/%')
+CREATE INDEX IF NOT EXISTS idx_comments_path ON comments(path text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments(parent_id);
+
+CREATE OR REPLACE FUNCTION set_comment_thread_fields()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    parent comments%ROWTYPE;
+BEGIN
+    IF NEW.parent_id IS NULL THEN
+        NEW.root_id := NEW.id;
+        NEW.depth := 0;
+        NEW.path := NEW.id::text;
+        RETURN NEW;
+    END IF;
+
+    SELECT * INTO parent FROM comments WHERE id = NEW.parent_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Parent comment % not found', NEW.parent_id USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    IF parent.entity_type <> NEW.entity_type OR parent.entity_id <> NEW.entity_id THEN
+        RAISE EXCEPTION 'Reply must be on the same entity as its parent' USING ERRCODE = 'check_violation';
+    END IF;
+
+    NEW.root_id := parent.root_id;
+    NEW.depth := parent.depth + 1;
+    NEW.path := parent.path || '/' || NEW.id::text;
+    NEW.reply_count := 0;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_comments_thread_fields ON comments;
+CREATE TRIGGER trg_comments_thread_fields
+BEFORE INSERT ON comments
+FOR EACH ROW
+EXECUTE FUNCTION set_comment_thread_fields();
+
+-- Add p_delta to reply_count of every ancestor of a comment (all but the last path segment)
+CREATE OR REPLACE FUNCTION adjust_reply_counts(p_path TEXT, p_depth INTEGER, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE comments
+    SET reply_count = GREATEST(0, reply_count + p_delta)
+    WHERE p_depth > 0
+      AND id = ANY ((string_to_array(p_path, '/'))[1:p_depth]::uuid[]);
+$$;
+
+-- SECURITY DEFINER so it can call adjust_reply_counts, which clients may not
+CREATE OR REPLACE FUNCTION sync_reply_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'visible' THEN
+        PERFORM adjust_reply_counts(OLD.path, OLD.depth, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'visible' THEN
+        PERFORM adjust_reply_counts(NEW.path, NEW.depth, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Only reachable through the trigger; otherwise anyone could rewrite reply counts over /rpc
+REVOKE EXECUTE ON FUNCTION adjust_reply_counts(TEXT, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- Only status changes affect counts; reply_count updates themselves don't re-fire this
+DROP TRIGGER IF EXISTS trg_comments_reply_counts ON comments;
+CREATE TRIGGER trg_comments_reply_counts
+AFTER INSERT OR DELETE OR UPDATE OF status ON comments
+FOR EACH ROW
+EXECUTE FUNCTION sync_reply_counts();
+
+-- First p_limit replies (oldest first) of each thread root, in one call.
+-- Each root is an index range scan on idx_comments_root_replies.
+CREATE OR REPLACE FUNCTION get_comment_reply_previews(
+    p_root_ids UUID[],
+    p_limit INTEGER DEFAULT 3,
+    p_visible_only BOOLEAN DEFAULT TRUE
+)
+RETURNS SETOF comments
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT r.*
+    FROM unnest(p_root_ids) AS t(root_id)
+    CROSS JOIN LATERAL (
+        SELECT c.*
+        FROM comments c
+        WHERE c.root_id = t.root_id
+          AND c.parent_id IS NOT NULL
+          AND (NOT p_visible_only OR c.status = 'visible')
+        ORDER BY c.created_at, c.id
+        LIMIT p_limit
+    ) r;
+$$;
+
+COMMENT ON COLUMN comments.path IS 'Materialized path of comment ids from the thread root to this comment, "/"-separated';
+COMMENT ON COLUMN comments.reply_count IS 'Visible descendants, maintained by trg_comments_reply_counts';
+COMMENT ON FUNCTION get_comment_reply_previews IS 'First N replies per thread root for a page of top-level comments';
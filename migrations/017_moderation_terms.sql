@@ -0,0 +1,38 @@
+-- Migration: Automatic content screening
+-- Date: 2026-10-19
+-- Description: Admin-editable list of blocked terms (English and Khmer). The API compiles the
+-- active terms into an Aho-Corasick automaton and screens new comments and community posts;
+-- matches are held as 'pending' for review instead of being published. updated_at lets every
+-- worker notice list changes and rebuild its automaton in the background.
+
+CREATE TABLE IF NOT EXISTS moderation_terms (
+    id BIGSERIAL PRIMARY KEY,
+    term TEXT NOT NULL CHECK (length(btrim(term)) > 0),
+    language TEXT NOT NULL DEFAULT 'en' CHECK (language IN ('en', 'km')),
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_by UUID REFERENCES user_profiles(user_id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_moderation_terms_term ON moderation_terms(lower(term));
+
+ALTER TABLE moderation_terms ENABLE ROW LEVEL SECURITY;
+
+-- Comments held by the screen wait in 'pending' until an admin approves or hides them
+ALTER TABLE comments DROP CONSTRAINT IF EXISTS comments_status_check;
+ALTER TABLE comments
+ADD CONSTRAINT comments_status_check CHECK (status IN ('visible', 'hidden', 'flagged', 'pending'));
+
+-- Why content was held (matched terms), shown in the moderation queue
+ALTER TABLE comments
+ADD COLUMN IF NOT EXISTS moderation_reason TEXT;
+
+ALTER TABLE community_posts
+ADD COLUMN IF NOT EXISTS moderation_reason TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_comments_pending ON comments(created_at DESC) WHERE status = 'pending';
+
+COMMENT ON TABLE moderation_terms IS 'Terms that hold comments and community posts for review; compiled into an in-memory matcher by the API';
+COMMENT ON COLUMN comments.moderation_reason IS 'Terms matched by automatic screening when the comment was held as pending';
+COMMENT ON COLUMN community_posts.moderation_reason IS 'Terms matched by automatic screening when the post was held as pending';
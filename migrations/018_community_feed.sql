@@ -0,0 +1,114 @@
+-- Migration: Denormalized community post authors
+-- Date: 2026-10-19
+-- Description: Store the author's display name and avatar on community_posts so the public
+-- feed is a single-table read (no embedded join to user_profiles). Names are resolved at
+-- write time (organization name, else the person's name) and refreshed by triggers when a
+-- profile or organizer profile changes. Adds partial indexes for the approved feed in
+-- (created_at, id) keyset order, overall and per category.
+
+ALTER TABLE community_posts
+ADD COLUMN IF NOT EXISTS organizer_name TEXT,
+ADD COLUMN IF NOT EXISTS organizer_avatar TEXT;
+
+CREATE OR REPLACE FUNCTION community_author_name(p_user_id UUID)
+RETURNS TEXT
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT COALESCE(
+        (SELECT NULLIF(btrim(op.organization_name), '')
+         FROM organizer_profiles op
+         WHERE op.user_id = p_user_id
+         LIMIT 1),
+        (SELECT NULLIF(btrim(concat_ws(' ', up.first_name, up.last_name)), '')
+         FROM user_profiles up
+         WHERE up.user_id = p_user_id),
+        'Verified Volunteer'
+    );
+$$;
+
+-- Only reachable through the triggers below (SECURITY DEFINER, so posts written by
+-- client roles still get an author); otherwise anyone could read profile names over /rpc
+REVOKE EXECUTE ON FUNCTION community_author_name(UUID) FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION set_community_post_author()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    NEW.organizer_name := community_author_name(NEW.organizer_id);
+    NEW.organizer_avatar := (SELECT avatar_url FROM user_profiles WHERE user_id = NEW.organizer_id);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_community_posts_author ON community_posts;
+CREATE TRIGGER trg_community_posts_author
+BEFORE INSERT OR UPDATE OF organizer_id ON community_posts
+FOR EACH ROW
+EXECUTE FUNCTION set_community_post_author();
+
+-- Re-resolve the author on every post by this user (posts per author are few)
+CREATE OR REPLACE FUNCTION refresh_community_post_authors(p_user_id UUID)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE community_posts
+    SET organizer_name = community_author_name(p_user_id),
+        organizer_avatar = (SELECT avatar_url FROM user_profiles WHERE user_id = p_user_id)
+    WHERE organizer_id = p_user_id;
+$$;
+
+-- Only reachable through trg_*_community_author; otherwise anyone could rewrite
+-- authors on other users' posts over /rpc
+REVOKE EXECUTE ON FUNCTION refresh_community_post_authors(UUID) FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION sync_community_authors_from_profile()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM refresh_community_post_authors(NEW.user_id);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_user_profiles_community_author ON user_profiles;
+CREATE TRIGGER trg_user_profiles_community_author
+AFTER UPDATE OF first_name, last_name, avatar_url ON user_profiles
+FOR EACH ROW
+WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+   OR OLD.last_name IS DISTINCT FROM NEW.last_name
+   OR OLD.avatar_url IS DISTINCT FROM NEW.avatar_url)
+EXECUTE FUNCTION sync_community_authors_from_profile();
+
+DROP TRIGGER IF EXISTS trg_organizer_profiles_community_author ON organizer_profiles;
+CREATE TRIGGER trg_organizer_profiles_community_author
+AFTER INSERT OR UPDATE OF organization_name ON organizer_profiles
+FOR EACH ROW
+EXECUTE FUNCTION sync_community_authors_from_profile();
+
+-- Backfill
+UPDATE community_posts
+SET organizer_name = community_author_name(organizer_id),
+    organizer_avatar = (SELECT avatar_url FROM user_profiles WHERE user_id = community_posts.organizer_id);
+
+-- Approved feed, newest first, overall and per category
+CREATE INDEX IF NOT EXISTS idx_community_posts_feed
+ON community_posts(created_at DESC, id DESC)
+WHERE status = 'approved';
+
+CREATE INDEX IF NOT EXISTS idx_community_posts_feed_category
+ON community_posts(category, created_at DESC, id DESC)
+WHERE status = 'approved';
+
+COMMENT ON COLUMN community_posts.organizer_name IS 'Author display name, maintained by triggers on community_posts, user_profiles and organizer_profiles';
+COMMENT ON COLUMN community_posts.organizer_avatar IS 'Author avatar URL, maintained with organizer_name';
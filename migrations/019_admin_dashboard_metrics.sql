@@ -0,0 +1,36 @@
+-- Migration: Admin dashboard aggregation RPC
+-- Date: 2026-10-19
+-- Description: Compute the admin dashboard aggregates (donation total, opportunity and
+-- organizer application counts per status, user count) in the database and return them
+-- as one JSON object, instead of downloading every row and summing in the API. The API
+-- calls this from a background refresher and serves the last snapshot.
+
+CREATE INDEX IF NOT EXISTS idx_organizer_applications_status
+ON organizer_applications(status);
+
+CREATE OR REPLACE FUNCTION admin_dashboard_metrics()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'donations_total',
+        (SELECT COALESCE(SUM(amount), 0) FROM donations),
+        'opportunities_count',
+        (SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb)
+         FROM (SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n
+               FROM opportunities
+               GROUP BY 1) o),
+        'organizers_count',
+        (SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb)
+         FROM (SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n
+               FROM organizer_applications
+               GROUP BY 1) a),
+        'users_count',
+        (SELECT COUNT(*) FROM user_profiles),
+        'generated_at',
+        timezone('utc'::text, now())
+    );
+$$;
+
+COMMENT ON FUNCTION admin_dashboard_metrics() IS 'Admin dashboard aggregates as JSON; polled by the API metrics snapshot refresher';
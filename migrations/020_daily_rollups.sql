@@ -0,0 +1,203 @@
+-- Migration: Daily rollups for admin analytics
+-- Date: 2026-10-19
+-- Description: Per-day counters maintained incrementally by triggers so admin time series
+-- (signups, donations, applications, opportunities by status) are read from a small
+-- table instead of being recomputed from raw rows.
+--
+-- Metrics (dimension in brackets):
+--   signups [role]                  new user_profiles rows, by creation day
+--   donations / donation_amount     donation count and total, by creation day
+--   applications [status at insert] new applications, by creation day
+--   opportunities_by_status [status]
+--                                   change in the number of opportunities per status on
+--                                   that day; the level on day D is the running sum up to D
+
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day DATE NOT NULL,
+    metric TEXT NOT NULL,
+    dimension TEXT NOT NULL DEFAULT '',
+    value NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, day, dimension)
+);
+
+ALTER TABLE daily_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION bump_daily_rollup(p_day DATE, p_metric TEXT, p_dimension TEXT, p_delta NUMERIC)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO daily_rollups (day, metric, dimension, value)
+    VALUES (p_day, p_metric, COALESCE(p_dimension, ''), p_delta)
+    ON CONFLICT (metric, day, dimension)
+    DO UPDATE SET value = daily_rollups.value + EXCLUDED.value;
+$$;
+
+-- Only reachable through the rollup_* triggers (SECURITY DEFINER below, so writes by
+-- client roles still count); otherwise anyone could forge analytics over /rpc
+REVOKE EXECUTE ON FUNCTION bump_daily_rollup(DATE, TEXT, TEXT, NUMERIC) FROM PUBLIC, anon, authenticated;
+
+-- Signups
+CREATE OR REPLACE FUNCTION rollup_user_profiles()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM bump_daily_rollup(COALESCE(NEW.created_at, now())::date, 'signups', COALESCE(NEW.role, 'user'), 1);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_user_profiles_rollup ON user_profiles;
+CREATE TRIGGER trg_user_profiles_rollup
+AFTER INSERT ON user_profiles
+FOR EACH ROW
+EXECUTE FUNCTION rollup_user_profiles();
+
+-- Donations (deleted rows and amount corrections are subtracted from their original day)
+CREATE OR REPLACE FUNCTION rollup_donations()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_daily_rollup(COALESCE(OLD.created_at, now())::date, 'donations', '', -1);
+        PERFORM bump_daily_rollup(COALESCE(OLD.created_at, now())::date, 'donation_amount', '', -COALESCE(OLD.amount, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_daily_rollup(COALESCE(NEW.created_at, now())::date, 'donations', '', 1);
+        PERFORM bump_daily_rollup(COALESCE(NEW.created_at, now())::date, 'donation_amount', '', COALESCE(NEW.amount, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_donations_rollup ON donations;
+CREATE TRIGGER trg_donations_rollup
+AFTER INSERT OR DELETE OR UPDATE OF amount, created_at ON donations
+FOR EACH ROW
+EXECUTE FUNCTION rollup_donations();
+
+-- Applications
+CREATE OR REPLACE FUNCTION rollup_applications()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM bump_daily_rollup(COALESCE(NEW.created_at, now())::date, 'applications', COALESCE(NEW.status, 'pending'), 1);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_applications_rollup ON applications;
+CREATE TRIGGER trg_applications_rollup
+AFTER INSERT ON applications
+FOR EACH ROW
+EXECUTE FUNCTION rollup_applications();
+
+-- Opportunities by status: +1 to the new status and -1 to the old one on the day it changes
+CREATE OR REPLACE FUNCTION rollup_opportunity_status()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_daily_rollup(COALESCE(NEW.created_at, now())::date, 'opportunities_by_status', COALESCE(NEW.status, 'unknown'), 1);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_daily_rollup(now()::date, 'opportunities_by_status', COALESCE(OLD.status, 'unknown'), -1);
+    ELSIF OLD.status IS DISTINCT FROM NEW.status THEN
+        PERFORM bump_daily_rollup(now()::date, 'opportunities_by_status', COALESCE(OLD.status, 'unknown'), -1);
+        PERFORM bump_daily_rollup(now()::date, 'opportunities_by_status', COALESCE(NEW.status, 'unknown'), 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_opportunities_status_rollup ON opportunities;
+CREATE TRIGGER trg_opportunities_status_rollup
+AFTER INSERT OR DELETE OR UPDATE OF status ON opportunities
+FOR EACH ROW
+EXECUTE FUNCTION rollup_opportunity_status();
+
+-- Time series for one metric, summed per day/week/month bucket. With p_cumulative the
+-- value is the running total up to the end of each bucket (for level metrics such as
+-- opportunities_by_status); the last bucket before p_from is then returned too, per
+-- dimension, so callers can carry the level into the start of the range.
+CREATE OR REPLACE FUNCTION admin_timeseries(
+    p_metric TEXT,
+    p_from DATE,
+    p_to DATE,
+    p_granularity TEXT DEFAULT 'day',
+    p_cumulative BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (bucket DATE, dimension TEXT, value NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH per_bucket AS (
+        SELECT date_trunc(p_granularity, r.day)::date AS bucket, r.dimension, SUM(r.value) AS value
+        FROM daily_rollups r
+        WHERE r.metric = p_metric
+          AND r.day <= p_to
+          AND (p_cumulative OR r.day >= p_from)
+        GROUP BY 1, 2
+    ),
+    running AS (
+        SELECT b.bucket, b.dimension,
+               CASE WHEN p_cumulative
+                    THEN SUM(b.value) OVER (PARTITION BY b.dimension ORDER BY b.bucket)
+                    ELSE b.value
+               END AS value
+        FROM per_bucket b
+    )
+    SELECT r.bucket, r.dimension, r.value
+    FROM running r
+    WHERE r.bucket >= date_trunc(p_granularity, p_from)::date
+       OR (p_cumulative AND r.bucket = (
+            SELECT MAX(x.bucket) FROM running x
+            WHERE x.dimension = r.dimension AND x.bucket < date_trunc(p_granularity, p_from)::date))
+    ORDER BY r.bucket, r.dimension;
+$$;
+
+-- Backfill from the current tables (rebuilds the rollups from scratch)
+DELETE FROM daily_rollups
+WHERE metric IN ('signups', 'donations', 'donation_amount', 'applications', 'opportunities_by_status');
+
+INSERT INTO daily_rollups (day, metric, dimension, value)
+SELECT COALESCE(created_at, now())::date, 'signups', COALESCE(role, 'user'), COUNT(*)
+FROM user_profiles
+GROUP BY 1, 3;
+
+INSERT INTO daily_rollups (day, metric, dimension, value)
+SELECT COALESCE(created_at, now())::date, 'donations', '', COUNT(*)
+FROM donations
+GROUP BY 1;
+
+INSERT INTO daily_rollups (day, metric, dimension, value)
+SELECT COALESCE(created_at, now())::date, 'donation_amount', '', COALESCE(SUM(amount), 0)
+FROM donations
+GROUP BY 1;
+
+INSERT INTO daily_rollups (day, metric, dimension, value)
+SELECT COALESCE(created_at, now())::date, 'applications', COALESCE(status, 'pending'), COUNT(*)
+FROM applications
+GROUP BY 1, 3;
+
+-- Past status changes are not recorded; existing opportunities are counted in their
+-- current status from the day they were created
+INSERT INTO daily_rollups (day, metric, dimension, value)
+SELECT COALESCE(created_at, now())::date, 'opportunities_by_status', COALESCE(status, 'unknown'), COUNT(*)
+FROM opportunities
+GROUP BY 1, 3;
+
+COMMENT ON TABLE daily_rollups IS 'Per-day analytics counters maintained by triggers; read by GET /admin/analytics/timeseries';
+COMMENT ON FUNCTION admin_timeseries(TEXT, DATE, DATE, TEXT, BOOLEAN) IS 'Rollup time series per day/week/month bucket, optionally as running totals';
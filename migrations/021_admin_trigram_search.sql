@@ -0,0 +1,131 @@
+-- Migration: Trigram search for the admin lists
+-- Date: 2026-10-19
+-- Description: Admin search over users (name, email), organizer applications (organization,
+-- contact person, email) and comments (content) used unanchored ILIKE with an exact count,
+-- a full scan per keystroke. Each table gets a lower-cased search_text column with a
+-- pg_trgm GIN index, and an RPC that ranks matches by word similarity and pages by
+-- (score, id) keyset.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE user_profiles
+ADD COLUMN IF NOT EXISTS search_text TEXT GENERATED ALWAYS AS (
+    lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(email, ''))
+) STORED;
+
+ALTER TABLE organizer_applications
+ADD COLUMN IF NOT EXISTS search_text TEXT GENERATED ALWAYS AS (
+    lower(coalesce(organization_name, '') || ' ' || coalesce(contact_person, '') || ' ' || coalesce(email, ''))
+) STORED;
+
+ALTER TABLE comments
+ADD COLUMN IF NOT EXISTS search_text TEXT GENERATED ALWAYS AS (lower(content)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_search_trgm
+ON user_profiles USING GIN (search_text gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_organizer_applications_search_trgm
+ON organizer_applications USING GIN (search_text gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_comments_search_trgm
+ON comments USING GIN (search_text gin_trgm_ops);
+
+-- Escape LIKE wildcards so the query is matched literally
+CREATE OR REPLACE FUNCTION like_escape(p_text TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT replace(replace(replace(p_text, '\', '\\'), '%', '\%'), '_', '\_');
+$$;
+
+-- Each search returns (score, row) ordered by score, then id, both descending.
+-- A row matches if it contains the query or a word in it is similar to the query
+-- (typos, partial words); both conditions are served by the trigram index.
+-- Pass the last (score, id) of a page as p_after_score / p_after_id for the next
+-- page; p_offset is only applied when no keyset is given.
+
+CREATE OR REPLACE FUNCTION admin_search_users(
+    p_query TEXT,
+    p_role TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50,
+    p_after_score REAL DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (score REAL, id TEXT, row_data JSONB)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (SELECT lower(btrim(p_query)) AS term),
+    matches AS (
+        SELECT word_similarity(q.term, u.search_text) AS score, u.id::text AS id, to_jsonb(u) - 'search_text' AS row_data
+        FROM user_profiles u, q
+        WHERE (u.search_text LIKE '%' || like_escape(q.term) || '%' OR q.term <% u.search_text)
+          AND (p_role IS NULL OR u.role = p_role)
+    )
+    SELECT m.score, m.id, m.row_data
+    FROM matches m
+    WHERE p_after_score IS NULL OR (m.score, m.id) < (p_after_score, p_after_id)
+    ORDER BY m.score DESC, m.id DESC
+    OFFSET CASE WHEN p_after_score IS NULL THEN GREATEST(p_offset, 0) ELSE 0 END
+    LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION admin_search_organizers(
+    p_query TEXT,
+    p_status TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50,
+    p_after_score REAL DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (score REAL, id TEXT, row_data JSONB)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (SELECT lower(btrim(p_query)) AS term),
+    matches AS (
+        SELECT word_similarity(q.term, o.search_text) AS score, o.id::text AS id, to_jsonb(o) - 'search_text' AS row_data
+        FROM organizer_applications o, q
+        WHERE (o.search_text LIKE '%' || like_escape(q.term) || '%' OR q.term <% o.search_text)
+          AND (p_status IS NULL OR o.status = p_status)
+    )
+    SELECT m.score, m.id, m.row_data
+    FROM matches m
+    WHERE p_after_score IS NULL OR (m.score, m.id) < (p_after_score, p_after_id)
+    ORDER BY m.score DESC, m.id DESC
+    OFFSET CASE WHEN p_after_score IS NULL THEN GREATEST(p_offset, 0) ELSE 0 END
+    LIMIT p_limit;
+$$;
+
+CREATE OR REPLACE FUNCTION admin_search_comments(
+    p_query TEXT,
+    p_status TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50,
+    p_after_score REAL DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (score REAL, id TEXT, row_data JSONB)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (SELECT lower(btrim(p_query)) AS term),
+    matches AS (
+        SELECT word_similarity(q.term, c.search_text) AS score, c.id::text AS id, to_jsonb(c) - 'search_text' AS row_data
+        FROM comments c, q
+        WHERE (c.search_text LIKE '%' || like_escape(q.term) || '%' OR q.term <% c.search_text)
+          AND (p_status IS NULL OR c.status = p_status)
+    )
+    SELECT m.score, m.id, m.row_data
+    FROM matches m
+    WHERE p_after_score IS NULL OR (m.score, m.id) < (p_after_score, p_after_id)
+    ORDER BY m.score DESC, m.id DESC
+    OFFSET CASE WHEN p_after_score IS NULL THEN GREATEST(p_offset, 0) ELSE 0 END
+    LIMIT p_limit;
+$$;
+
+COMMENT ON COLUMN user_profiles.search_text IS 'Lower-cased name and email for trigram search (admin_search_users)';
+COMMENT ON COLUMN organizer_applications.search_text IS 'Lower-cased organization, contact and email for trigram search (admin_search_organizers)';
+COMMENT ON COLUMN comments.search_text IS 'Lower-cased content for trigram search (admin_search_comments)';
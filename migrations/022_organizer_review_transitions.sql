@@ -0,0 +1,188 @@
+-- Migration: Atomic organizer review transitions
+-- Date: 2026-10-19
+-- Description: Approving, rejecting or suspending an organizer touched organizer_applications,
+-- user_profiles and organizer_profiles in separate requests, with no transaction, so a
+-- failure half way left partial state (e.g. approved application without a profile). Each
+-- transition is now one function call that locks the application row, applies every write
+-- in the same transaction and returns the result.
+--
+-- Each returns {"application": ..., "organizer_profile": ..., "changed": bool}.
+-- Errors: P0002 when the application does not exist, P0001 (message for the client) when
+-- the transition is not allowed from the current status.
+
+CREATE OR REPLACE FUNCTION approve_organizer_application(
+    p_application_id BIGINT,
+    p_admin_id UUID,
+    p_status TEXT DEFAULT 'verified'
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_app organizer_applications%ROWTYPE;
+    v_profile organizer_profiles%ROWTYPE;
+BEGIN
+    SELECT * INTO v_app FROM organizer_applications WHERE id = p_application_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Organizer application not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    -- Already approved ('verified' and 'approved' are both used): nothing to do
+    IF v_app.status IN ('verified', 'approved') THEN
+        SELECT * INTO v_profile FROM organizer_profiles WHERE user_id = v_app.user_id LIMIT 1;
+        RETURN jsonb_build_object(
+            'application', to_jsonb(v_app),
+            'organizer_profile', CASE WHEN v_profile.id IS NULL THEN NULL ELSE to_jsonb(v_profile) END,
+            'changed', FALSE
+        );
+    END IF;
+
+    IF v_app.status <> 'pending' THEN
+        RAISE EXCEPTION 'Cannot approve % application', v_app.status USING ERRCODE = 'P0001';
+    END IF;
+
+    UPDATE organizer_applications
+    SET status = p_status,
+        reviewed_at = now(),
+        reviewed_by = p_admin_id
+    WHERE id = p_application_id
+    RETURNING * INTO v_app;
+
+    UPDATE user_profiles
+    SET role = 'organizer',
+        status = 'active'
+    WHERE user_id = v_app.user_id;
+
+    UPDATE organizer_profiles
+    SET organization_name = v_app.organization_name,
+        organizer_type = v_app.organizer_type,
+        phone = v_app.phone,
+        website = v_app.website,
+        address = v_app.address,
+        description = v_app.description,
+        contact_person = v_app.contact_person,
+        registration_number = v_app.registration_number,
+        card_image_url = v_app.card_image_url,
+        verified_at = now(),
+        is_active = TRUE
+    WHERE user_id = v_app.user_id
+    RETURNING * INTO v_profile;
+
+    IF NOT FOUND THEN
+        INSERT INTO organizer_profiles (
+            user_id, organization_name, organizer_type, phone, website, address,
+            description, contact_person, registration_number, card_image_url,
+            verified_at, is_active
+        )
+        VALUES (
+            v_app.user_id, v_app.organization_name, v_app.organizer_type, v_app.phone, v_app.website, v_app.address,
+            v_app.description, v_app.contact_person, v_app.registration_number, v_app.card_image_url,
+            now(), TRUE
+        )
+        RETURNING * INTO v_profile;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'application', to_jsonb(v_app),
+        'organizer_profile', to_jsonb(v_profile),
+        'changed', TRUE
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION reject_organizer_application(
+    p_application_id BIGINT,
+    p_admin_id UUID,
+    p_reason TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_app organizer_applications%ROWTYPE;
+    v_profile organizer_profiles%ROWTYPE;
+BEGIN
+    SELECT * INTO v_app FROM organizer_applications WHERE id = p_application_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Organizer application not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    IF v_app.status <> 'pending' THEN
+        RAISE EXCEPTION 'Cannot reject % application', v_app.status USING ERRCODE = 'P0001';
+    END IF;
+
+    UPDATE organizer_applications
+    SET status = 'rejected',
+        reviewed_at = now(),
+        reviewed_by = p_admin_id,
+        rejection_reason = p_reason
+    WHERE id = p_application_id
+    RETURNING * INTO v_app;
+
+    UPDATE user_profiles
+    SET status = 'rejected'
+    WHERE user_id = v_app.user_id;
+
+    SELECT * INTO v_profile FROM organizer_profiles WHERE user_id = v_app.user_id LIMIT 1;
+
+    RETURN jsonb_build_object(
+        'application', to_jsonb(v_app),
+        'organizer_profile', CASE WHEN v_profile.id IS NULL THEN NULL ELSE to_jsonb(v_profile) END,
+        'changed', TRUE
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION suspend_organizer(
+    p_application_id BIGINT,
+    p_admin_id UUID,
+    p_reason TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_app organizer_applications%ROWTYPE;
+    v_profile organizer_profiles%ROWTYPE;
+BEGIN
+    SELECT * INTO v_app FROM organizer_applications WHERE id = p_application_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Organizer not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    UPDATE organizer_applications
+    SET status = 'suspended',
+        reviewed_at = now(),
+        reviewed_by = p_admin_id,
+        rejection_reason = p_reason
+    WHERE id = p_application_id
+    RETURNING * INTO v_app;
+
+    UPDATE user_profiles
+    SET status = 'suspended'
+    WHERE user_id = v_app.user_id;
+
+    SELECT * INTO v_profile FROM organizer_profiles WHERE user_id = v_app.user_id LIMIT 1;
+
+    RETURN jsonb_build_object(
+        'application', to_jsonb(v_app),
+        'organizer_profile', CASE WHEN v_profile.id IS NULL THEN NULL ELSE to_jsonb(v_profile) END,
+        'changed', TRUE
+    );
+END;
+$$;
+
+-- Admin-only: the API calls these with the service key
+REVOKE EXECUTE ON FUNCTION approve_organizer_application(BIGINT, UUID, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION reject_organizer_application(BIGINT, UUID, TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION suspend_organizer(BIGINT, UUID, TEXT) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON FUNCTION approve_organizer_application(BIGINT, UUID, TEXT) IS 'Approve a pending organizer application, promote the user and upsert the organizer profile, atomically';
+COMMENT ON FUNCTION reject_organizer_application(BIGINT, UUID, TEXT) IS 'Reject a pending organizer application and block the user, atomically';
+COMMENT ON FUNCTION suspend_organizer(BIGINT, UUID, TEXT) IS 'Suspend an organizer application and the user, atomically';
@@ -0,0 +1,164 @@
+-- Migration: Monthly partitions for admin_activity_log
+-- Date: 2026-10-19
+-- Description: Convert admin_activity_log to a table range-partitioned by created_at, one
+-- partition per month, with indexes for the activity log queries (by admin, by target,
+-- newest first). Old months are retired by detaching whole partitions into the
+-- audit_archive schema instead of deleting rows.
+--
+-- The existing table is kept as admin_activity_log_legacy after its rows are copied;
+-- drop it once the copy has been checked.
+
+CREATE SCHEMA IF NOT EXISTS audit_archive;
+
+-- Create the partition for the month containing p_month (no-op if it exists)
+CREATE OR REPLACE FUNCTION create_admin_activity_log_partition(p_month DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_start DATE := date_trunc('month', p_month)::date;
+    v_name TEXT := 'admin_activity_log_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass('public.' || v_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.admin_activity_log FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, (v_start + INTERVAL '1 month')::date
+        );
+    END IF;
+    RETURN v_name;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_month DATE;
+    v_last DATE;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'admin_activity_log' AND c.relnamespace = 'public'::regnamespace
+    ) THEN
+        RETURN;  -- already partitioned
+    END IF;
+
+    LOCK TABLE admin_activity_log IN EXCLUSIVE MODE;
+    ALTER TABLE admin_activity_log RENAME TO admin_activity_log_legacy;
+
+    -- The partition key must be part of the primary key
+    CREATE TABLE admin_activity_log (
+        id UUID NOT NULL DEFAULT uuid_generate_v4(),
+        admin_id UUID NOT NULL REFERENCES user_profiles(user_id) ON DELETE CASCADE,
+        action TEXT NOT NULL,
+        target_type TEXT NOT NULL,
+        target_id TEXT NOT NULL,
+        details TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    -- Catches rows outside the monthly partitions; normally stays empty
+    CREATE TABLE admin_activity_log_default PARTITION OF admin_activity_log DEFAULT;
+
+    -- One partition per month from the oldest entry to three months ahead
+    SELECT date_trunc('month', COALESCE(MIN(created_at), now()))::date INTO v_month FROM admin_activity_log_legacy;
+    v_last := (date_trunc('month', now()) + INTERVAL '3 months')::date;
+    WHILE v_month <= v_last LOOP
+        PERFORM create_admin_activity_log_partition(v_month);
+        v_month := (v_month + INTERVAL '1 month')::date;
+    END LOOP;
+
+    INSERT INTO admin_activity_log (id, admin_id, action, target_type, target_id, details, created_at)
+    SELECT id, admin_id, action, COALESCE(target_type, 'unknown'), COALESCE(target_id, ''), details, COALESCE(created_at, now())
+    FROM admin_activity_log_legacy;
+
+    ALTER TABLE admin_activity_log ENABLE ROW LEVEL SECURITY;
+
+    CREATE POLICY "Admin can view activity logs"
+    ON admin_activity_log FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM user_profiles
+            WHERE user_profiles.user_id = auth.uid()
+            AND user_profiles.role = 'admin'
+        )
+    );
+
+    CREATE POLICY "Admin can create activity logs"
+    ON admin_activity_log FOR INSERT
+    WITH CHECK (
+        admin_id = auth.uid() AND
+        EXISTS (
+            SELECT 1 FROM user_profiles
+            WHERE user_profiles.user_id = auth.uid()
+            AND user_profiles.role = 'admin'
+        )
+    );
+END;
+$$;
+
+-- Indexes on the parent cascade to every partition, including future ones
+CREATE INDEX IF NOT EXISTS idx_admin_activity_log_created
+ON admin_activity_log(created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_admin_activity_log_admin
+ON admin_activity_log(admin_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_admin_activity_log_target
+ON admin_activity_log(target_type, target_id);
+
+CREATE INDEX IF NOT EXISTS idx_admin_activity_log_action
+ON admin_activity_log(action, created_at DESC);
+
+-- Retention: make sure the coming months have partitions, then detach every monthly
+-- partition that ends before the last p_keep_months months and move it into
+-- audit_archive (still queryable; drop it there when no longer needed). p_keep_months
+-- <= 0 keeps everything. Returns the partitions archived by this call. Safe to call
+-- from several API workers at once.
+CREATE OR REPLACE FUNCTION maintain_admin_activity_log(p_keep_months INTEGER, p_months_ahead INTEGER DEFAULT 3)
+RETURNS TABLE (archived TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_cutoff DATE := (date_trunc('month', now()) - make_interval(months => GREATEST(p_keep_months, 0)))::date;
+    v_partition RECORD;
+    i INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('maintain_admin_activity_log')) THEN
+        RETURN;
+    END IF;
+
+    FOR i IN 0..GREATEST(p_months_ahead, 0) LOOP
+        PERFORM create_admin_activity_log_partition((date_trunc('month', now()) + make_interval(months => i))::date);
+    END LOOP;
+
+    IF p_keep_months <= 0 THEN
+        RETURN;
+    END IF;
+
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits inh
+        JOIN pg_class c ON c.oid = inh.inhrelid
+        WHERE inh.inhparent = 'public.admin_activity_log'::regclass
+          AND c.relname ~ '^admin_activity_log_\d{4}_\d{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < v_cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE public.admin_activity_log DETACH PARTITION public.%I', v_partition.relname);
+        EXECUTE format('ALTER TABLE public.%I SET SCHEMA audit_archive', v_partition.relname);
+        archived := v_partition.relname;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION create_admin_activity_log_partition(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION maintain_admin_activity_log(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON TABLE admin_activity_log IS 'Admin audit trail, partitioned by month on created_at; old months are moved to audit_archive by maintain_admin_activity_log';
+COMMENT ON FUNCTION maintain_admin_activity_log(INTEGER, INTEGER) IS 'Create upcoming monthly partitions and archive those older than p_keep_months';
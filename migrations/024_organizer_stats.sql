@@ -0,0 +1,260 @@
+-- Migration: Denormalized organizer dashboard stats
+-- Date: 2026-10-19
+-- Description: One row per organizer with opportunity and application counts per status
+-- and total capacity, plus per-day application activity, kept current by triggers on
+-- opportunities and applications. GET /api/organizer/dashboard reads them through
+-- organizer_dashboard() in one round trip instead of listing every opportunity and
+-- downloading every application status.
+--
+-- organizer_id is stored as text so the table does not depend on the key type of
+-- opportunities.organizer_id. Inserts and status changes adjust the counters in place;
+-- deleting an opportunity or moving it to another organizer recomputes the affected rows
+-- (that also drops the applications of a deleted opportunity, whichever order the
+-- cascade runs in). Approvals are counted in the activity table on the day they happen,
+-- so the backfill can only restore received applications.
+
+CREATE TABLE IF NOT EXISTS organizer_stats (
+    organizer_id TEXT PRIMARY KEY,
+    opportunities_by_status JSONB NOT NULL DEFAULT '{}'::jsonb,
+    applications_by_status JSONB NOT NULL DEFAULT '{}'::jsonb,
+    capacity_total BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS organizer_daily_activity (
+    organizer_id TEXT NOT NULL,
+    day DATE NOT NULL,
+    applications_received INTEGER NOT NULL DEFAULT 0,
+    applications_approved INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (organizer_id, day)
+);
+
+ALTER TABLE organizer_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE organizer_daily_activity ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION jsonb_increment(p_counts JSONB, p_key TEXT, p_delta INTEGER)
+RETURNS JSONB
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT jsonb_set(
+        COALESCE(p_counts, '{}'::jsonb),
+        ARRAY[p_key],
+        to_jsonb(COALESCE((p_counts ->> p_key)::INTEGER, 0) + p_delta)
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION bump_organizer_opportunities(p_organizer_id TEXT, p_status TEXT, p_delta INTEGER, p_capacity_delta BIGINT)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO organizer_stats (organizer_id, opportunities_by_status, capacity_total)
+    VALUES (p_organizer_id, jsonb_increment('{}'::jsonb, COALESCE(p_status, 'unknown'), p_delta), p_capacity_delta)
+    ON CONFLICT (organizer_id) DO UPDATE
+    SET opportunities_by_status = jsonb_increment(organizer_stats.opportunities_by_status, COALESCE(p_status, 'unknown'), p_delta),
+        capacity_total = organizer_stats.capacity_total + p_capacity_delta,
+        updated_at = now();
+$$;
+
+CREATE OR REPLACE FUNCTION bump_organizer_applications(p_organizer_id TEXT, p_status TEXT, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO organizer_stats (organizer_id, applications_by_status)
+    VALUES (p_organizer_id, jsonb_increment('{}'::jsonb, COALESCE(p_status, 'pending'), p_delta))
+    ON CONFLICT (organizer_id) DO UPDATE
+    SET applications_by_status = jsonb_increment(organizer_stats.applications_by_status, COALESCE(p_status, 'pending'), p_delta),
+        updated_at = now();
+$$;
+
+CREATE OR REPLACE FUNCTION bump_organizer_activity(p_organizer_id TEXT, p_day DATE, p_received INTEGER, p_approved INTEGER)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO organizer_daily_activity (organizer_id, day, applications_received, applications_approved)
+    VALUES (p_organizer_id, p_day, p_received, p_approved)
+    ON CONFLICT (organizer_id, day) DO UPDATE
+    SET applications_received = organizer_daily_activity.applications_received + EXCLUDED.applications_received,
+        applications_approved = organizer_daily_activity.applications_approved + EXCLUDED.applications_approved;
+$$;
+
+-- Recompute one organizer's counters from the source tables
+CREATE OR REPLACE FUNCTION refresh_organizer_stats(p_organizer_id TEXT)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO organizer_stats (organizer_id, opportunities_by_status, applications_by_status, capacity_total, updated_at)
+    SELECT
+        p_organizer_id,
+        (SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb)
+         FROM (SELECT COALESCE(status, 'unknown') AS status, COUNT(*) AS n
+               FROM opportunities
+               WHERE organizer_id::text = p_organizer_id
+               GROUP BY 1) o),
+        (SELECT COALESCE(jsonb_object_agg(status, n), '{}'::jsonb)
+         FROM (SELECT COALESCE(a.status, 'pending') AS status, COUNT(*) AS n
+               FROM applications a
+               JOIN opportunities o ON o.id = a.opportunity_id
+               WHERE o.organizer_id::text = p_organizer_id
+               GROUP BY 1) a),
+        (SELECT COALESCE(SUM(capacity), 0)
+         FROM opportunities
+         WHERE organizer_id::text = p_organizer_id),
+        now()
+    ON CONFLICT (organizer_id) DO UPDATE
+    SET opportunities_by_status = EXCLUDED.opportunities_by_status,
+        applications_by_status = EXCLUDED.applications_by_status,
+        capacity_total = EXCLUDED.capacity_total,
+        updated_at = EXCLUDED.updated_at;
+$$;
+
+-- Only reachable through the organizer_stats_* triggers (SECURITY DEFINER below, so
+-- writes by client roles still count); otherwise anyone could rewrite any dashboard
+REVOKE EXECUTE ON FUNCTION bump_organizer_opportunities(TEXT, TEXT, INTEGER, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION bump_organizer_applications(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION bump_organizer_activity(TEXT, DATE, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION refresh_organizer_stats(TEXT) FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION organizer_stats_opportunities()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.organizer_id IS NOT NULL THEN
+            PERFORM bump_organizer_opportunities(NEW.organizer_id::text, NEW.status, 1, COALESCE(NEW.capacity, 0));
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF OLD.organizer_id IS NOT NULL THEN
+            PERFORM refresh_organizer_stats(OLD.organizer_id::text);
+        END IF;
+    ELSIF OLD.organizer_id IS DISTINCT FROM NEW.organizer_id THEN
+        -- Its applications move with it
+        IF OLD.organizer_id IS NOT NULL THEN
+            PERFORM refresh_organizer_stats(OLD.organizer_id::text);
+        END IF;
+        IF NEW.organizer_id IS NOT NULL THEN
+            PERFORM refresh_organizer_stats(NEW.organizer_id::text);
+        END IF;
+    ELSIF NEW.organizer_id IS NOT NULL THEN
+        IF OLD.status IS DISTINCT FROM NEW.status THEN
+            PERFORM bump_organizer_opportunities(NEW.organizer_id::text, OLD.status, -1, 0);
+            PERFORM bump_organizer_opportunities(NEW.organizer_id::text, NEW.status, 1, 0);
+        END IF;
+        IF OLD.capacity IS DISTINCT FROM NEW.capacity THEN
+            PERFORM bump_organizer_opportunities(NEW.organizer_id::text, NEW.status, 0, COALESCE(NEW.capacity, 0) - COALESCE(OLD.capacity, 0));
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_opportunities_organizer_stats ON opportunities;
+CREATE TRIGGER trg_opportunities_organizer_stats
+AFTER INSERT OR DELETE OR UPDATE OF status, capacity, organizer_id ON opportunities
+FOR EACH ROW
+EXECUTE FUNCTION organizer_stats_opportunities();
+
+CREATE OR REPLACE FUNCTION organizer_stats_applications()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_old_organizer TEXT;
+    v_new_organizer TEXT;
+BEGIN
+    -- No organizer (admin-created opportunity) or opportunity already gone (cascade
+    -- delete, already recomputed by the opportunities trigger): nothing to count
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT organizer_id::text INTO v_old_organizer FROM opportunities WHERE id = OLD.opportunity_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT organizer_id::text INTO v_new_organizer FROM opportunities WHERE id = NEW.opportunity_id;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND OLD.status IS NOT DISTINCT FROM NEW.status
+       AND v_old_organizer IS NOT DISTINCT FROM v_new_organizer THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_old_organizer IS NOT NULL THEN
+        PERFORM bump_organizer_applications(v_old_organizer, OLD.status, -1);
+    END IF;
+    IF v_new_organizer IS NOT NULL THEN
+        PERFORM bump_organizer_applications(v_new_organizer, NEW.status, 1);
+        IF TG_OP = 'INSERT' THEN
+            PERFORM bump_organizer_activity(v_new_organizer, now()::date, 1, CASE WHEN NEW.status = 'approved' THEN 1 ELSE 0 END);
+        ELSIF NEW.status = 'approved' AND OLD.status IS DISTINCT FROM 'approved' THEN
+            PERFORM bump_organizer_activity(v_new_organizer, now()::date, 0, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_applications_organizer_stats ON applications;
+CREATE TRIGGER trg_applications_organizer_stats
+AFTER INSERT OR DELETE OR UPDATE OF status, opportunity_id ON applications
+FOR EACH ROW
+EXECUTE FUNCTION organizer_stats_applications();
+
+-- Dashboard payload: counters plus one activity row per day for the last p_days days
+CREATE OR REPLACE FUNCTION organizer_dashboard(p_organizer_id TEXT, p_days INTEGER DEFAULT 7)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'opportunities_by_status', COALESCE(s.opportunities_by_status, '{}'::jsonb),
+        'applications_by_status', COALESCE(s.applications_by_status, '{}'::jsonb),
+        'capacity_total', COALESCE(s.capacity_total, 0),
+        'updated_at', s.updated_at,
+        'recent_activity',
+        (SELECT jsonb_agg(jsonb_build_object(
+                    'day', d.day,
+                    'applications_received', COALESCE(a.applications_received, 0),
+                    'applications_approved', COALESCE(a.applications_approved, 0))
+                ORDER BY d.day)
+         FROM (SELECT generate_series(now()::date - (p_days - 1), now()::date, INTERVAL '1 day')::date AS day) d
+         LEFT JOIN organizer_daily_activity a
+           ON a.organizer_id = p_organizer_id AND a.day = d.day)
+    )
+    FROM (SELECT 1) one
+    LEFT JOIN organizer_stats s ON s.organizer_id = p_organizer_id;
+$$;
+
+-- Backfill: counters for every organizer that owns an opportunity, and received
+-- applications per day (approval days are not recorded on applications)
+SELECT refresh_organizer_stats(organizer_id)
+FROM (SELECT DISTINCT organizer_id::text AS organizer_id
+      FROM opportunities
+      WHERE organizer_id IS NOT NULL) o;
+
+INSERT INTO organizer_daily_activity (organizer_id, day, applications_received)
+SELECT o.organizer_id::text, a.created_at::date, COUNT(*)
+FROM applications a
+JOIN opportunities o ON o.id = a.opportunity_id
+WHERE o.organizer_id IS NOT NULL
+  AND a.created_at IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT (organizer_id, day) DO UPDATE
+SET applications_received = EXCLUDED.applications_received;
+
+COMMENT ON TABLE organizer_stats IS
+'Per-organizer opportunity/application counts by status and total capacity, maintained by triggers on opportunities and applications.';
+
+COMMENT ON TABLE organizer_daily_activity IS
+'Applications received and approved per organizer per day, for the organizer dashboard.';
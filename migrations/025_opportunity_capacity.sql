@@ -0,0 +1,107 @@
+-- Migration: Approved count and spots left on opportunities
+-- Date: 2026-10-19
+-- Description: Keep approved_count on opportunities in sync with the number of approved
+-- applications, maintained by a trigger on applications, and expose spots_left
+-- (capacity - approved_count, never below 0; NULL when capacity is not set) as a stored
+-- generated column so lists can filter and sort by availability without counting
+-- applications per card.
+--
+-- Capacity is enforced by the same trigger: an application only becomes approved if
+-- the conditional increment of approved_count succeeds. The UPDATE locks the
+-- opportunity row and re-checks approved_count < capacity after acquiring the lock, so
+-- concurrent approvals cannot overfill it. Otherwise the write fails with SQLSTATE
+-- PT409 (PostgREST answers 409 Conflict; the API maps it to 409 as well).
+-- Lowering capacity below approved_count is allowed; spots_left is then 0.
+--
+-- NULL capacity means unlimited. Migration 008 gave capacity DEFAULT 0, so existing rows
+-- and opportunities created without one (e.g. by admins) hold 0 where nothing was set;
+-- those are turned into NULL and the default is dropped, so 0 from here on only ever
+-- means a capacity explicitly set to 0 (no spots).
+
+-- 0 was the column default, not a limit anyone chose
+UPDATE opportunities SET capacity = NULL WHERE capacity = 0;
+ALTER TABLE opportunities ALTER COLUMN capacity DROP DEFAULT;
+
+ALTER TABLE opportunities
+ADD COLUMN IF NOT EXISTS approved_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill before the trigger exists
+UPDATE opportunities o
+SET approved_count = COALESCE(a.n, 0)
+FROM (
+    SELECT o2.id, count(a2.id)::int AS n
+    FROM opportunities o2
+    LEFT JOIN applications a2
+      ON a2.opportunity_id = o2.id AND a2.status = 'approved'
+    GROUP BY o2.id
+) a
+WHERE o.id = a.id;
+
+ALTER TABLE opportunities
+ADD COLUMN IF NOT EXISTS spots_left INTEGER
+GENERATED ALWAYS AS (
+    CASE WHEN capacity IS NULL THEN NULL ELSE GREATEST(capacity - approved_count, 0) END
+) STORED;
+
+-- SECURITY DEFINER: organizers approving applications must not need UPDATE rights on
+-- approved_count
+CREATE OR REPLACE FUNCTION sync_opportunity_approved_count()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_was_approved BOOLEAN := FALSE;
+    v_is_approved BOOLEAN := FALSE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_was_approved := OLD.status = 'approved';
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_is_approved := NEW.status = 'approved';
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND v_was_approved AND v_is_approved
+       AND OLD.opportunity_id IS NOT DISTINCT FROM NEW.opportunity_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_was_approved THEN
+        UPDATE opportunities
+        SET approved_count = GREATEST(0, approved_count - 1)
+        WHERE id = OLD.opportunity_id;
+    END IF;
+
+    IF v_is_approved THEN
+        UPDATE opportunities
+        SET approved_count = approved_count + 1
+        WHERE id = NEW.opportunity_id
+          AND (capacity IS NULL OR approved_count < capacity);
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'Opportunity is full: all % spots are taken',
+                (SELECT capacity FROM opportunities WHERE id = NEW.opportunity_id)
+                USING ERRCODE = 'PT409';
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_applications_approved_count ON applications;
+CREATE TRIGGER trg_applications_approved_count
+AFTER INSERT OR DELETE OR UPDATE OF status, opportunity_id ON applications
+FOR EACH ROW
+EXECUTE FUNCTION sync_opportunity_approved_count();
+
+-- Public list: active + public, "available" filter and "most spots" sort
+CREATE INDEX IF NOT EXISTS idx_opportunities_public_spots_left
+ON opportunities(spots_left DESC NULLS LAST, created_at DESC)
+WHERE status = 'active' AND visibility = 'public';
+
+-- Admin list filters on availability across all statuses
+CREATE INDEX IF NOT EXISTS idx_opportunities_spots_left
+ON opportunities(spots_left);
+
+COMMENT ON COLUMN opportunities.approved_count IS 'Approved applications, maintained by trg_applications_approved_count';
+COMMENT ON COLUMN opportunities.spots_left IS 'capacity - approved_count (not below 0); NULL when capacity is not set';
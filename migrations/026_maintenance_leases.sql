@@ -0,0 +1,56 @@
+-- Migration: Leases for cross-worker maintenance jobs
+-- Date: 2026-10-19
+-- Description: Every API worker runs the storage reconciler on a timer, and admins can start
+-- it by hand. A run spans many storage API calls, so a transaction-scoped advisory lock
+-- cannot cover it; instead a worker takes a named lease before starting. The lease row is
+-- claimed under pg_try_advisory_xact_lock (as maintain_admin_activity_log does) and expires
+-- on its own if the holder dies, so a crashed worker never blocks the job for good.
+
+CREATE TABLE IF NOT EXISTS maintenance_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE maintenance_leases ENABLE ROW LEVEL SECURITY;
+
+-- TRUE if p_holder now holds the lease (newly taken, or renewed by the same holder)
+CREATE OR REPLACE FUNCTION acquire_maintenance_lease(p_name TEXT, p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('maintenance_lease:' || p_name)) THEN
+        RETURN FALSE;
+    END IF;
+
+    INSERT INTO maintenance_leases (name, holder, expires_at)
+    VALUES (p_name, p_holder, now() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+    SET holder = EXCLUDED.holder,
+        expires_at = EXCLUDED.expires_at
+    WHERE maintenance_leases.holder = EXCLUDED.holder
+       OR maintenance_leases.expires_at < now();
+
+    RETURN FOUND;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_maintenance_lease(p_name TEXT, p_holder TEXT)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    DELETE FROM maintenance_leases
+    WHERE name = p_name AND holder = p_holder;
+$$;
+
+-- Server-side only: the API calls these with the service key
+REVOKE EXECUTE ON FUNCTION acquire_maintenance_lease(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_maintenance_lease(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON TABLE maintenance_leases IS
+'Named, expiring locks so only one API worker runs a maintenance job (e.g. storage_gc) at a time.';